@@ -2,7 +2,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPExce
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from backend.infrastructure.database import SessionLocal
+from backend.infrastructure.database import SessionLocal, get_db
 from backend.infrastructure.models import Track, DigitalSignageContent, DigitalSignageSchedule
 from pydantic import BaseModel
 
@@ -66,7 +66,7 @@ from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPExce
 from typing import List, Optional
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from backend.infrastructure.database import SessionLocal
+from backend.infrastructure.database import get_db
 from backend.infrastructure.models import Track, DigitalSignageContent, DigitalSignageSchedule
 from pydantic import BaseModel
 
@@ -117,13 +117,22 @@ class TrackCreate(BaseModel):
 
 
 # --- Pydantic Schemas for Digital Signage ---
+from datetime import datetime, timedelta, timezone
+from fastapi import Query, Response
+from backend.serialization import FastJSONResponse, row_dicts
+from sqlalchemy import delete as sa_delete
+from backend import signage_manifest, signage_timeline
+from backend.schedule_index import as_utc
+
 class DigitalSignageContentOut(BaseModel):
     id: str
     filename: str
     content_type: str
     url: str
+    checksum: Optional[str] = None
+    duration: Optional[int] = None
     uploaded_by: Optional[str]
-    uploaded_at: Optional[str]
+    uploaded_at: Optional[datetime]
     is_active: bool
     class Config:
         orm_mode = True
@@ -132,33 +141,49 @@ class DigitalSignageContentCreate(BaseModel):
     filename: str
     content_type: str
     url: str
+    checksum: Optional[str] = None
+    duration: Optional[int] = None
     uploaded_by: Optional[str]
     is_active: Optional[bool] = True
 
 class DigitalSignageScheduleOut(BaseModel):
     id: str
     content_id: str
-    start_time: str
-    end_time: str
+    display_id: Optional[str] = None
+    start_time: datetime
+    end_time: datetime
     repeat_pattern: Optional[str]
-    created_at: Optional[str]
-    updated_at: Optional[str]
+    created_at: Optional[datetime]
+    updated_at: Optional[datetime]
     class Config:
         orm_mode = True
 
 class DigitalSignageScheduleCreate(BaseModel):
     content_id: str
-    start_time: str
-    end_time: str
+    display_id: Optional[str] = None
+    start_time: datetime
+    end_time: datetime
     repeat_pattern: Optional[str]
 
+SIGNAGE_CONTENT_FIELDS = ("id", "filename", "content_type", "url", "checksum", "duration", "uploaded_by", "uploaded_at", "is_active")
+# Longest window GET /signage/preview expands; the compiled horizon is 7 days
+SIGNAGE_PREVIEW_MAX_HOURS = 24 * 7
+
 # --- Digital Signage Endpoints ---
+@router.get("/signage/content", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def signage_list_content(db: AsyncSession = Depends(get_db)):
+    columns = [getattr(DigitalSignageContent, name) for name in SIGNAGE_CONTENT_FIELDS]
+    result = await db.execute(select(*columns).order_by(DigitalSignageContent.uploaded_at.desc()))
+    return FastJSONResponse(row_dicts((row._mapping for row in result), SIGNAGE_CONTENT_FIELDS))
+
 @router.post("/signage/upload", response_model=DigitalSignageContentOut, dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def signage_upload(payload: DigitalSignageContentCreate, db: AsyncSession = Depends(SessionLocal)):
+async def signage_upload(payload: DigitalSignageContentCreate, db: AsyncSession = Depends(get_db)):
     signage = DigitalSignageContent(
         filename=payload.filename,
         content_type=payload.content_type,
         url=payload.url,
+        checksum=payload.checksum,
+        duration=payload.duration,
         uploaded_by=payload.uploaded_by,
         is_active=payload.is_active if payload.is_active is not None else True
     )
@@ -169,111 +194,205 @@ async def signage_upload(payload: DigitalSignageContentCreate, db: AsyncSession
 
 
 @router.delete("/signage/content/{content_id}", dependencies=[Depends(require_role(["admin"]))])
-async def signage_delete_content(content_id: str, db: AsyncSession = Depends(SessionLocal)):
+async def signage_delete_content(content_id: str, db: AsyncSession = Depends(get_db)):
     signage = await db.get(DigitalSignageContent, content_id)
     if not signage:
         raise HTTPException(status_code=404, detail="Signage content not found")
+    # Its schedules go with it; they would otherwise block the delete (FK)
+    await db.execute(sa_delete(DigitalSignageSchedule).where(DigitalSignageSchedule.content_id == content_id))
     await db.delete(signage)
     await db.commit()
+    await signage_timeline.invalidate(None)
     return {"message": "Signage content deleted"}
 
 @router.post("/signage/schedule", response_model=DigitalSignageScheduleOut, dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def signage_schedule(payload: DigitalSignageScheduleCreate, db: AsyncSession = Depends(SessionLocal)):
+async def signage_schedule(payload: DigitalSignageScheduleCreate, db: AsyncSession = Depends(get_db)):
+    if as_utc(payload.end_time) <= as_utc(payload.start_time):
+        raise HTTPException(status_code=422, detail="end_time must be after start_time")
+    pattern = (payload.repeat_pattern or "").strip().lower() or None
+    if pattern not in signage_timeline.ONE_OFF_PATTERNS and pattern not in signage_timeline.REPEAT_PATTERNS:
+        raise HTTPException(status_code=422, detail=f"Unknown repeat_pattern {payload.repeat_pattern!r}")
+    if await db.get(DigitalSignageContent, payload.content_id) is None:
+        raise HTTPException(status_code=404, detail="Signage content not found")
     schedule = DigitalSignageSchedule(
         content_id=payload.content_id,
-        start_time=payload.start_time,
-        end_time=payload.end_time,
-        repeat_pattern=payload.repeat_pattern
+        display_id=payload.display_id,
+        # Stored as naive UTC, like the other timestamp columns
+        start_time=as_utc(payload.start_time).replace(tzinfo=None),
+        end_time=as_utc(payload.end_time).replace(tzinfo=None),
+        repeat_pattern=pattern
     )
     db.add(schedule)
     await db.commit()
     await db.refresh(schedule)
+    await signage_timeline.invalidate(payload.display_id)
     return schedule
 
-
-
-# --- Digital Signage ---
-# (Moved below router/require_role definitions)
-
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, Depends, HTTPException, status, Request
-from typing import List, Optional
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from backend.infrastructure.database import SessionLocal
-from backend.infrastructure.models import Track
-from pydantic import BaseModel
-
-
-def get_current_user_role(request: Request):
-    # Placeholder: Extract user role from JWT or session (to be replaced with real JWT logic)
-    # Example: return request.state.user_role
-    # For now, default to 'admin' for demonstration
-    return "admin"
-
-def require_role(required_roles):
-    def dependency(role=Depends(get_current_user_role)):
-        if role not in required_roles:
-            raise HTTPException(status_code=403, detail="Insufficient permissions")
-    return dependency
-
-router = APIRouter()
-
-# --- Pydantic Schemas ---
-class TrackOut(BaseModel):
-    id: str
-    title: str
-    artist: Optional[str]
-    album: Optional[str]
-    duration: Optional[int]
-    bpm: Optional[int]
-    genre: Optional[str]
-    storage_url: str
-    artwork_url: Optional[str]
-    uploaded_by: Optional[str]
-    is_public: bool
-    created_at: Optional[str]
-    updated_at: Optional[str]
-
-    class Config:
-        orm_mode = True
-
-class TrackCreate(BaseModel):
-    title: str
-    artist: Optional[str]
-    album: Optional[str]
-    duration: Optional[int]
-    bpm: Optional[int]
-    genre: Optional[str]
-    storage_url: str
-    artwork_url: Optional[str]
-    uploaded_by: Optional[str]
-    is_public: Optional[bool] = True
+@router.get("/signage/displays/{display_id}/now")
+async def signage_now(display_id: str, at: Optional[datetime] = None, db: AsyncSession = Depends(get_db)):
+    at = as_utc(at) if at is not None else datetime.now(timezone.utc)
+    timeline = await signage_timeline.get_timeline(db, display_id, at)
+    segment = signage_timeline.segment_at(timeline, at)
+    upcoming = signage_timeline.segments_between(timeline, segment["end_time"] if segment else at, at + signage_timeline.HORIZON)
+    return FastJSONResponse({
+        "display_id": display_id,
+        "at": at,
+        "content": segment["content"] if segment else None,
+        "until": segment["end_time"] if segment else None,
+        "next": upcoming[0] if upcoming else None,
+    })
+
+@router.get("/signage/displays/{display_id}/manifest")
+async def signage_display_manifest(display_id: str, request: Request, since: Optional[str] = None, db: AsyncSession = Depends(get_db)):
+    """
+    The display's playout manifest: ordered items with URL, checksum,
+    duration and validity window, versioned by content. A matching
+    ``If-None-Match`` (or ``since`` equal to the current version) gets a 304;
+    ``since=<version>`` returns only the items upserted and the keys removed
+    since that version, or the full manifest if it is too old to diff.
+    """
+    manifest = await signage_manifest.get_manifest(db, display_id)
+    headers = {"ETag": f'"{manifest["version"]}"', "Cache-Control": "no-cache"}
+    if since == manifest["version"] or _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    if since:
+        delta = await signage_manifest.get_delta(display_id, since, manifest)
+        if delta is not None:
+            return FastJSONResponse({"display_id": display_id, "full": False, **delta}, headers=headers)
+    return FastJSONResponse({"display_id": display_id, "full": True, **manifest}, headers=headers)
+
+@router.get("/signage/preview")
+async def signage_preview(display_id: Optional[str] = None, hours: int = Query(24, ge=1, le=SIGNAGE_PREVIEW_MAX_HOURS), db: AsyncSession = Depends(get_db)):
+    # Without display_id: schedules that apply to every display
+    now = datetime.now(timezone.utc)
+    timeline = await signage_timeline.get_timeline(db, display_id, now)
+    return FastJSONResponse({
+        "display_id": display_id,
+        "from": now,
+        "segments": signage_timeline.segments_between(timeline, now, now + timedelta(hours=hours)),
+    })
 
 # --- Tracks ---
+from datetime import datetime
+from fastapi import Query, Response
+from fastapi.responses import StreamingResponse
+from backend.pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, encode_cursor, keyset_after, parse_fields
+from backend.suggest import suggest_index
+from backend.suggest_sync import suggest_sync
+from backend.bulk_ingest import ingest_tracks
+from backend.infrastructure.cache import catalog_cache
+from backend.singleflight import singleflight
+from backend.serialization import FastJSONResponse, dumps, row_dicts
+
+# Columns a client may request through ``fields=``
+TRACK_FIELDS = [name for name in TrackOut.__annotations__ if name in Track.__table__.c]
+NDJSON_BATCH_SIZE = 1000
+
+def _track_columns(fields: Optional[List[str]]):
+    # The keyset columns are always selected so the next cursor can be built,
+    # but only the requested ones are written to the response.
+    names = list(dict.fromkeys((fields or TRACK_FIELDS) + ["created_at", "id"]))
+    return [Track.__table__.c[name] for name in names]
+
 @router.get("/tracks", response_model=List[TrackOut])
-async def list_tracks(db: AsyncSession = Depends(SessionLocal)):
-    result = await db.execute(select(Track))
-    tracks = result.scalars().all()
-    return tracks
+async def list_tracks(
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Keyset-paginated track listing ordered by (created_at, id).
+
+    ``fields=id,title,artist`` projects the SELECT down to the named columns.
+    ``format=ndjson`` streams every row from ``cursor`` onwards (ignoring ``limit``)
+    for full catalog exports, reading the result in fixed-size batches so memory
+    stays flat regardless of catalog size. JSON pages carry the cursor for the
+    following page in the ``X-Next-Cursor`` header.
+    """
+    projection = parse_fields(fields, TRACK_FIELDS)
+    out_fields = projection or TRACK_FIELDS
+    stmt = select(*_track_columns(projection)).order_by(Track.created_at, Track.id)
+    after = keyset_after(Track.created_at, Track.id, cursor)
+    if after is not None:
+        stmt = stmt.where(after)
+
+    if format == "ndjson":
+        async def export():
+            result = await db.stream(stmt.execution_options(yield_per=NDJSON_BATCH_SIZE))
+            async for rows in result.mappings().partitions():
+                yield b"".join(dumps(row) + b"\n" for row in row_dicts(rows, out_fields))
+        return StreamingResponse(export(), media_type="application/x-ndjson")
+
+    async def load_page():
+        result = await db.execute(stmt.limit(limit))
+        rows = result.mappings().all()
+        next_cursor = encode_cursor(rows[-1]["created_at"], rows[-1]["id"]) if len(rows) == limit else None
+        return {"rows": row_dicts(rows, out_fields), "next_cursor": next_cursor}
+
+    page = await catalog_cache.get_or_load("tracks", f"{cursor}:{limit}:{','.join(out_fields)}", load_page)
+    headers = {"X-Next-Cursor": page["next_cursor"]} if page["next_cursor"] else {}
+    return FastJSONResponse(page["rows"], headers=headers)
 
 @router.post("/tracks", response_model=TrackOut, dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def upload_track(track: TrackCreate, db: AsyncSession = Depends(SessionLocal)):
+async def upload_track(track: TrackCreate, db: AsyncSession = Depends(get_db)):
     db_track = Track(**track.dict())
     db.add(db_track)
     await db.commit()
     await db.refresh(db_track)
+    await suggest_sync.add([(db_track.id, db_track.title, db_track.artist)])
+    await catalog_cache.invalidate("tracks", f"track:{db_track.id}")
     return db_track
 
+@router.post("/tracks/bulk", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def bulk_upload_tracks(request: Request, format: Optional[str] = Query(None, pattern="^(ndjson|csv)$"), db: AsyncSession = Depends(get_db)):
+    """
+    Import a venue library from an NDJSON or CSV request body (chosen by
+    ``format`` or the Content-Type). Returns counts plus per-row errors;
+    bad rows never abort the import.
+    """
+    fmt = format or ("csv" if "csv" in request.headers.get("content-type", "") else "ndjson")
+
+    report = await ingest_tracks(db, request.stream(), fmt, TrackCreate, on_inserted=suggest_sync.add)
+    if report.inserted:
+        await catalog_cache.invalidate("tracks")
+    return report.as_dict()
+
 @router.get("/tracks/{id}", response_model=TrackOut)
-async def get_track(id: str, db: AsyncSession = Depends(SessionLocal)):
+async def get_track(id: str):
+    # Shared loaders open their own session: the request that started one
+    # may finish or disconnect while other requests still await its result
+    async def load_track():
+        async with SessionLocal() as db:
+            result = await db.execute(select(*(Track.__table__.c[name] for name in TRACK_FIELDS)).where(Track.id == id))
+            track = result.mappings().one_or_none()
+        if not track:
+            raise HTTPException(status_code=404, detail="Track not found")
+        return dict(track)
+
+    # Every client asks for the new track the moment it starts playing
+    track = await singleflight.do("track", id, lambda: catalog_cache.get_or_load(f"track:{id}", "detail", load_track))
+    return FastJSONResponse(track)
+
+@router.delete("/tracks/{id}", dependencies=[Depends(require_role(["admin"]))])
+async def delete_track(id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Track).where(Track.id == id))
     track = result.scalar_one_or_none()
     if not track:
         raise HTTPException(status_code=404, detail="Track not found")
-    return track
+    await db.delete(track)
+    await db.commit()
+    await suggest_sync.remove(track.id)
+    await catalog_cache.invalidate("tracks", f"track:{id}")
+    return {"message": "Track deleted"}
 
 
 # --- Pydantic Schemas for Queue ---
+from backend.queue_engine import request_queue
+from backend.vote_engine import vote_aggregator, voter_from_token, NOT_QUEUED, DUPLICATE, VOTER_COOKIE, VOTER_COOKIE_MAX_AGE
+from backend.websocket_manager import event_handler
+from backend.player_sync import player_sync
 from sqlalchemy import select as sa_select
 from sqlalchemy import desc as sa_desc
 from backend.infrastructure.models import Track
@@ -283,33 +402,71 @@ from typing import Optional
 class QueueItem(BaseModel):
     track_id: str
     position: int
+    votes: int = 0
 
 class QueueAdd(BaseModel):
     track_id: str
 
-# For demonstration, use a simple in-memory queue (replace with DB-backed model for production)
-queue: list[QueueItem] = []
+class QueueMove(BaseModel):
+    position: int
 
 @router.get("/queue", response_model=list[QueueItem])
 async def get_queue():
-    return queue
+    return await request_queue.items()
+
+async def _queue_changed(upserted=(), removed=()):
+    # Queue state lives in Redis, so changes go to the players of every worker
+    await event_handler.fanout.broadcast_to_type({"type": "queue_update", "upserted": list(upserted), "removed": list(removed)}, 'player')
 
 @router.post("/queue", dependencies=[Depends(require_role(["admin", "moderator", "user"]))])
 async def add_to_queue(item: QueueAdd):
-    position = len(queue) + 1
-    queue.append(QueueItem(track_id=item.track_id, position=position))
-    return {"message": "Track added to queue"}
+    position = await request_queue.add(item.track_id)
+    if position is None:
+        raise HTTPException(status_code=409, detail="Track already in queue")
+    await _queue_changed(upserted=[{"track_id": item.track_id, "votes": 0, "position": position}])
+    return {"message": "Track added to queue", "position": position}
+
+@router.post("/queue/next", response_model=QueueItem, dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def pop_next_from_queue():
+    item = await request_queue.pop_next()
+    if not item:
+        raise HTTPException(status_code=404, detail="Queue is empty")
+    await vote_aggregator.forget(item["track_id"])
+    await _queue_changed(removed=[item["track_id"]])
+    return QueueItem(position=1, **item)
+
+@router.patch("/queue/{track_id}", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def move_in_queue(track_id: str, move: QueueMove):
+    position = await request_queue.move(track_id, move.position)
+    if position is None:
+        raise HTTPException(status_code=404, detail="Track not in queue")
+    await _queue_changed(upserted=[{"track_id": track_id, "position": position}])
+    return {"message": "Track moved", "position": position}
 
 @router.delete("/queue/{track_id}", dependencies=[Depends(require_role(["admin", "moderator"]))])
 async def remove_from_queue(track_id: str):
-    global queue
-    queue = [item for item in queue if item.track_id != track_id]
+    if not await request_queue.remove(track_id):
+        raise HTTPException(status_code=404, detail="Track not in queue")
+    await vote_aggregator.forget(track_id)
+    await _queue_changed(removed=[track_id])
     return {"message": "Track removed from queue"}
 
 # --- Voting & Favorites ---
 @router.post("/queue/{track_id}/vote")
-async def vote_track(track_id: str, up: bool = True):
-    # TODO: Register vote
+async def vote_track(track_id: str, request: Request, response: Response, up: bool = True):
+    # Voters are ids the server issued to the device, never a client-chosen value
+    voter = voter_from_token(request.cookies.get(VOTER_COOKIE))
+    if voter is None:
+        token = await vote_aggregator.issue_voter(request.client.host)
+        if token is None:
+            raise HTTPException(status_code=429, detail="Too many new voters from this address")
+        voter = voter_from_token(token)
+        response.set_cookie(VOTER_COOKIE, token, max_age=VOTER_COOKIE_MAX_AGE, httponly=True, samesite="lax")
+    outcome = await vote_aggregator.record(track_id, voter, up)
+    if outcome == NOT_QUEUED:
+        raise HTTPException(status_code=404, detail="Track not in queue")
+    if outcome == DUPLICATE:
+        raise HTTPException(status_code=409, detail="Already voted for this track")
     return {"message": "Vote registered"}
 
 @router.post("/tracks/{track_id}/favorite")
@@ -328,9 +485,16 @@ class PlaybackState(BaseModel):
     position: float = 0.0
     repeat_mode: str = "off"  # off, one, all
     shuffle: bool = False
+    # Set by the scheduler runtime for the default venue
+    active_playlist_id: Optional[str] = None
+    schedule_entry_id: Optional[str] = None
 
 playback_state = PlaybackState()
 
+async def _playback_changed(*fields):
+    # Playback state is per worker, so only this worker's players hear about it
+    await event_handler.manager.broadcast_to_type({"type": "playback", "changes": {name: getattr(playback_state, name) for name in fields}}, 'player')
+
 @router.get("/playback", response_model=PlaybackState)
 async def get_playback_state():
     return playback_state
@@ -338,43 +502,48 @@ async def get_playback_state():
 @router.post("/playback/play")
 async def play():
     playback_state.state = "playing"
+    await _playback_changed("state")
     return {"message": "Playback started"}
 
 @router.post("/playback/pause")
 async def pause():
     playback_state.state = "paused"
+    await _playback_changed("state")
     return {"message": "Playback paused"}
 
 @router.post("/playback/seek")
 async def seek(position: float):
     playback_state.position = position
+    await _playback_changed("position")
     return {"message": f"Seeked to {position}"}
 
 @router.post("/playback/shuffle")
 async def shuffle():
     playback_state.shuffle = not playback_state.shuffle
+    await _playback_changed("shuffle")
     return {"message": f"Shuffle set to {playback_state.shuffle}"}
 
 @router.post("/playback/repeat")
 async def repeat(mode: str):
     playback_state.repeat_mode = mode
+    await _playback_changed("repeat_mode")
     return {"message": f"Repeat mode set to {mode}"}
 
 # --- WebSocket for Real-Time Player Sync ---
+async def _player_state() -> dict:
+    return {"playback": playback_state.dict(), "queue": await request_queue.items()}
+
 @router.websocket("/ws/player")
 async def player_ws(websocket: WebSocket):
-    await websocket.accept()
-    try:
-        while True:
-            data = await websocket.receive_text()
-            # TODO: Handle real-time player events
-            await websocket.send_text(f"Echo: {data}")
-    except WebSocketDisconnect:
-        pass
+    # Snapshot or resumed replay first, then sequenced deltas (see backend/player_sync.py)
+    await player_sync.serve(websocket, _player_state)
 
 
 # --- Pydantic Schemas for Playlists ---
+import hashlib
+from sqlalchemy import bindparam, func, update
 from backend.infrastructure.models import Playlist, PlaylistTrack
+from backend.ordering import key_between, keys_between
 
 class PlaylistOut(BaseModel):
     id: str
@@ -404,68 +573,254 @@ class PlaylistUpdate(BaseModel):
 
 class PlaylistTrackAdd(BaseModel):
     track_id: str
-    position: int
+    position: Optional[int] = None  # 1-based; appended when omitted
+
+class PlaylistTrackMove(BaseModel):
+    track_id: str
+    after_track_id: Optional[str] = None  # None moves the track to the top
+
+class PlaylistReorder(BaseModel):
+    moves: List[PlaylistTrackMove]
+
+# Ranks longer than this trigger a renumbering of the playlist. Only reached
+# after dozens of inserts into the very same gap.
+MAX_RANK_LENGTH = 48
+
+async def _first_rank(db: AsyncSession, playlist_id: str, after: Optional[str] = None, exclude: Optional[str] = None):
+    stmt = select(PlaylistTrack.rank).where(PlaylistTrack.playlist_id == playlist_id)
+    if after is not None:
+        stmt = stmt.where(PlaylistTrack.rank > after)
+    if exclude is not None:
+        stmt = stmt.where(PlaylistTrack.track_id != exclude)
+    return (await db.execute(stmt.order_by(PlaylistTrack.rank).limit(1))).scalar_one_or_none()
+
+async def _last_rank(db: AsyncSession, playlist_id: str):
+    stmt = select(PlaylistTrack.rank).where(PlaylistTrack.playlist_id == playlist_id).order_by(PlaylistTrack.rank.desc()).limit(1)
+    return (await db.execute(stmt)).scalar_one_or_none()
+
+async def _rank_at(db: AsyncSession, playlist_id: str, position: Optional[int]) -> str:
+    """Rank for a new track at 1-based ``position``, found from its two would-be neighbours."""
+    if position is None:
+        return key_between(await _last_rank(db, playlist_id), None)
+    if position <= 1:
+        return key_between(None, await _first_rank(db, playlist_id))
+    stmt = (select(PlaylistTrack.rank).where(PlaylistTrack.playlist_id == playlist_id)
+            .order_by(PlaylistTrack.rank).offset(position - 2).limit(2))
+    ranks = (await db.execute(stmt)).scalars().all()
+    if not ranks:
+        return key_between(await _last_rank(db, playlist_id), None)
+    return key_between(ranks[0], ranks[1] if len(ranks) > 1 else None)
+
+async def _rebalance_playlist(db: AsyncSession, playlist_id: str):
+    stmt = select(PlaylistTrack.track_id).where(PlaylistTrack.playlist_id == playlist_id).order_by(PlaylistTrack.rank)
+    track_ids = (await db.execute(stmt)).scalars().all()
+    if not track_ids:
+        return
+    # A Core executemany: an ORM update() with a parameter list is a bulk
+    # update by primary key, which these rows are not addressed by
+    table = PlaylistTrack.__table__
+    conn = await db.connection()
+    await conn.execute(
+        update(table)
+        .where(table.c.playlist_id == playlist_id, table.c.track_id == bindparam("b_track_id"))
+        .values(rank=bindparam("b_rank")),
+        [{"b_track_id": track_id, "b_rank": rank} for track_id, rank in zip(track_ids, keys_between(None, None, len(track_ids)))],
+    )
+
+PLAYLIST_FIELDS = [name for name in PlaylistOut.__annotations__ if name in Playlist.__table__.c]
+PLAYLIST_TRACKS_PAGE_SIZE = 100
+MAX_PLAYLIST_TRACKS_PAGE_SIZE = 500
+
+async def _touch_playlist(db: AsyncSession, playlist_id: str) -> bool:
+    """
+    Bump the playlist version in the current transaction; False if it does not
+    exist. The UPDATE also locks the playlist row until commit, so writers of
+    one playlist run one after another and never compute ranks from the same
+    snapshot; call it before reading any ranks.
+    """
+    result = await db.execute(
+        update(Playlist)
+        .where(Playlist.id == playlist_id)
+        .values(version=Playlist.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    return result.rowcount > 0
+
+def _playlist_etag(playlist_id: str, version: int, variant: str) -> str:
+    # Strong validator: the version changes with every write to the playlist,
+    # and the variant keeps differently shaped responses apart.
+    digest = hashlib.sha1(f"{playlist_id}:{version}:{variant}".encode()).hexdigest()[:16]
+    return f'"{digest}"'
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # If-None-Match uses the weak comparison, so W/ prefixes are ignored
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return etag in (tag[2:] if tag.startswith("W/") else tag for tag in candidates)
+
+def _playlist_tracks_query(playlist_id: str, limit: int, offset: int):
+    # One round trip: the track columns are joined in rather than loaded per
+    # item, and come back as Core rows rather than ORM objects
+    return (
+        select(PlaylistTrack.rank, *(Track.__table__.c[name] for name in TRACK_FIELDS))
+        .join(Track, Track.id == PlaylistTrack.track_id)
+        .where(PlaylistTrack.playlist_id == playlist_id)
+        .order_by(PlaylistTrack.rank)
+        .offset(offset)
+        .limit(limit)
+    )
 
 @router.get("/playlists", response_model=List[PlaylistOut])
-async def list_playlists(db: AsyncSession = Depends(SessionLocal)):
-    result = await db.execute(select(Playlist))
-    playlists = result.scalars().all()
-    return playlists
+async def list_playlists():
+    async def load_playlists():
+        async with SessionLocal() as db:
+            result = await db.execute(select(*(Playlist.__table__.c[name] for name in PLAYLIST_FIELDS)))
+            return [dict(row) for row in result.mappings()]
+
+    playlists = await singleflight.do("playlists", "all", lambda: catalog_cache.get_or_load("playlists", "all", load_playlists))
+    return FastJSONResponse(playlists)
 
 @router.post("/playlists", response_model=PlaylistOut, dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def create_playlist(playlist: PlaylistCreate, db: AsyncSession = Depends(SessionLocal)):
+async def create_playlist(playlist: PlaylistCreate, db: AsyncSession = Depends(get_db)):
     db_playlist = Playlist(**playlist.dict())
     db.add(db_playlist)
     await db.commit()
     await db.refresh(db_playlist)
+    await catalog_cache.invalidate("playlists")
     return db_playlist
 
 @router.get("/playlists/{id}", response_model=PlaylistOut)
-async def get_playlist(id: str, db: AsyncSession = Depends(SessionLocal)):
-    result = await db.execute(select(Playlist).where(Playlist.id == id))
-    playlist = result.scalar_one_or_none()
-    if not playlist:
-        raise HTTPException(status_code=404, detail="Playlist not found")
-    return playlist
+async def get_playlist(
+    id: str,
+    request: Request,
+    include: Optional[str] = Query(None, pattern="^tracks$"),
+    limit: int = Query(PLAYLIST_TRACKS_PAGE_SIZE, ge=1, le=MAX_PLAYLIST_TRACKS_PAGE_SIZE),
+    offset: int = Query(0, ge=0),
+):
+    """
+    Playlist detail. ``include=tracks`` embeds one page (``limit``/``offset``)
+    of the playlist's tracks in playlist order, loaded in a single joined query.
+
+    Responses carry a strong ETag built from the playlist version; a matching
+    ``If-None-Match`` gets a 304, usually straight from the cache.
+    """
+    variant = f"tracks:{offset}:{limit}" if include else "base"
+
+    async def load_playlist():
+        track_count = select(func.count()).where(PlaylistTrack.playlist_id == Playlist.id).scalar_subquery()
+        columns = [Playlist.__table__.c[name] for name in PLAYLIST_FIELDS]
+        stmt = select(*columns, Playlist.version, track_count.label("track_count")).where(Playlist.id == id)
+        async with SessionLocal() as db:
+            playlist = (await db.execute(stmt)).mappings().one_or_none()
+            if not playlist:
+                raise HTTPException(status_code=404, detail="Playlist not found")
+            body = dict(playlist)
+            if include:
+                rows = (await db.execute(_playlist_tracks_query(id, limit, offset))).mappings().all()
+                body["tracks"] = [
+                    {"position": offset + i + 1, "rank": row["rank"], "track": {name: row[name] for name in TRACK_FIELDS}}
+                    for i, row in enumerate(rows)
+                ]
+        return {"etag": _playlist_etag(id, playlist["version"], variant), "body": body}
+
+    cached = await singleflight.do("playlist", f"{id}:{variant}", lambda: catalog_cache.get_or_load(f"playlist:{id}", variant, load_playlist))
+    headers = {"ETag": cached["etag"], "Cache-Control": "no-cache"}
+    if _etag_matches(request.headers.get("if-none-match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return FastJSONResponse(cached["body"], headers=headers)
 
 @router.patch("/playlists/{id}", response_model=PlaylistOut, dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def update_playlist(id: str, update: PlaylistUpdate, db: AsyncSession = Depends(SessionLocal)):
+async def update_playlist(id: str, update: PlaylistUpdate, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Playlist).where(Playlist.id == id))
     playlist = result.scalar_one_or_none()
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
     for key, value in update.dict(exclude_unset=True).items():
         setattr(playlist, key, value)
+    playlist.version = Playlist.version + 1
     db.add(playlist)
     await db.commit()
     await db.refresh(playlist)
+    await catalog_cache.invalidate("playlists", f"playlist:{id}")
     return playlist
 
 @router.delete("/playlists/{id}", dependencies=[Depends(require_role(["admin"]))])
-async def delete_playlist(id: str, db: AsyncSession = Depends(SessionLocal)):
+async def delete_playlist(id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(Playlist).where(Playlist.id == id))
     playlist = result.scalar_one_or_none()
     if not playlist:
         raise HTTPException(status_code=404, detail="Playlist not found")
     await db.delete(playlist)
     await db.commit()
+    await catalog_cache.invalidate("playlists", f"playlist:{id}")
+    # schedule_entries rows went with it (ON DELETE CASCADE)
+    await schedule_sync.remove_playlist(id)
     return {"message": "Playlist deleted"}
 
 @router.post("/playlists/{id}/tracks", dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def add_track_to_playlist(id: str, item: PlaylistTrackAdd, db: AsyncSession = Depends(SessionLocal)):
-    playlist_track = PlaylistTrack(playlist_id=id, track_id=item.track_id, position=item.position)
+async def add_track_to_playlist(id: str, item: PlaylistTrackAdd, db: AsyncSession = Depends(get_db)):
+    if not await _touch_playlist(db, id):
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    # Only the new row is written; neighbours keep their ranks
+    rank = await _rank_at(db, id, item.position)
+    playlist_track = PlaylistTrack(playlist_id=id, track_id=item.track_id, rank=rank)
     db.add(playlist_track)
+    if len(rank) > MAX_RANK_LENGTH:
+        await db.flush()
+        await _rebalance_playlist(db, id)
     await db.commit()
+    # updated_at is part of the listing, so both scopes change
+    await catalog_cache.invalidate("playlists", f"playlist:{id}")
     return {"message": "Track added to playlist"}
 
+@router.patch("/playlists/{id}/tracks:reorder", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def reorder_playlist_tracks(id: str, reorder: PlaylistReorder, db: AsyncSession = Depends(get_db)):
+    """
+    Apply a batch of moves in one transaction. Each move places ``track_id``
+    right after ``after_track_id`` (or first) and rewrites only that row.
+    Moves apply in order, so later moves see earlier ones.
+    """
+    if not await _touch_playlist(db, id):
+        raise HTTPException(status_code=404, detail="Playlist not found")
+    rebalance = False
+    for move in reorder.moves:
+        if move.after_track_id is None:
+            before = None
+        else:
+            stmt = select(PlaylistTrack.rank).where(PlaylistTrack.playlist_id == id, PlaylistTrack.track_id == move.after_track_id)
+            before = (await db.execute(stmt)).scalar_one_or_none()
+            if before is None:
+                raise HTTPException(status_code=404, detail=f"Track {move.after_track_id} not found in playlist")
+        after = await _first_rank(db, id, after=before, exclude=move.track_id)
+        rank = key_between(before, after)
+        result = await db.execute(
+            update(PlaylistTrack)
+            .where(PlaylistTrack.playlist_id == id, PlaylistTrack.track_id == move.track_id)
+            .values(rank=rank)
+            .execution_options(synchronize_session=False)
+        )
+        if result.rowcount == 0:
+            raise HTTPException(status_code=404, detail=f"Track {move.track_id} not found in playlist")
+        rebalance = rebalance or len(rank) > MAX_RANK_LENGTH
+    if rebalance:
+        await _rebalance_playlist(db, id)
+    await db.commit()
+    await catalog_cache.invalidate("playlists", f"playlist:{id}")
+    return {"message": f"Applied {len(reorder.moves)} moves"}
+
 @router.delete("/playlists/{id}/tracks/{track_id}", dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def remove_track_from_playlist(id: str, track_id: str, db: AsyncSession = Depends(SessionLocal)):
+async def remove_track_from_playlist(id: str, track_id: str, db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(PlaylistTrack).where(PlaylistTrack.playlist_id == id, PlaylistTrack.track_id == track_id))
     playlist_track = result.scalar_one_or_none()
     if not playlist_track:
         raise HTTPException(status_code=404, detail="Track not found in playlist")
     await db.delete(playlist_track)
+    await _touch_playlist(db, id)
     await db.commit()
+    await catalog_cache.invalidate("playlists", f"playlist:{id}")
     return {"message": "Track removed from playlist"}
 
 # --- Spotify Integration ---
@@ -480,10 +835,23 @@ async def sync_spotify():
     return {"message": "Spotify sync started"}
 
 # --- Advanced Search ---
+from backend import search
+
 @router.get("/search/tracks")
-async def search_tracks(query: str = "", genre: str = None, bpm_min: int = None, bpm_max: int = None):
-    # TODO: Advanced search for tracks
-    return []
+async def search_tracks(
+    query: str = "",
+    genre: str = None,
+    bpm_min: int = None,
+    bpm_max: int = None,
+    limit: int = Query(20, ge=1, le=100),
+    db: AsyncSession = Depends(get_db),
+):
+    return await search.search_tracks(db, query=query, genre=genre, bpm_min=bpm_min, bpm_max=bpm_max, limit=limit)
+
+@router.get("/search/suggest")
+async def suggest_tracks(q: str = "", limit: int = Query(10, ge=1, le=50)):
+    # Served from the in-process index; no database round trip per keystroke
+    return suggest_index.suggest(q, limit=limit)
 
 @router.get("/search/playlists")
 async def search_playlists(query: str = ""): 
@@ -494,51 +862,158 @@ async def search_playlists(query: str = ""):
 # --- Pydantic Schemas for Scheduler ---
 from pydantic import BaseModel
 from typing import Optional
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete as sa_delete
+from sqlalchemy.exc import IntegrityError
+from backend.infrastructure.models import PlaylistScheduleEntry
+from backend.schedule_index import DEFAULT_VENUE, ENTRY_FIELDS, as_utc, schedule_index
+from backend.scheduler_runtime import scheduler_runtime
+from backend.schedule_sync import schedule_sync
 
 class ScheduleEntry(BaseModel):
     id: Optional[str]
+    venue: str = DEFAULT_VENUE
     playlist_id: str
     start_time: datetime
     end_time: datetime
     description: Optional[str]
 
 class ScheduleEntryCreate(BaseModel):
+    venue: str = DEFAULT_VENUE
     playlist_id: str
     start_time: datetime
     end_time: datetime
-    description: Optional[str]
-
-# For demonstration, use a simple in-memory schedule (replace with DB-backed model for production)
-schedule_entries: list[ScheduleEntry] = []
+    description: Optional[str] = None
+
+# Postgres SQLSTATEs surfaced by schedule writes
+EXCLUSION_VIOLATION = "23P01"
+FOREIGN_KEY_VIOLATION = "23503"
+
+def _schedule_window(entry: ScheduleEntryCreate):
+    start, end = as_utc(entry.start_time), as_utc(entry.end_time)
+    if end <= start:
+        raise HTTPException(status_code=422, detail="end_time must be after start_time")
+    return start, end
+
+def _schedule_conflict(conflicts) -> HTTPException:
+    return HTTPException(status_code=409, detail={
+        "message": "Schedule entry overlaps existing entries",
+        "conflicts": [
+            {"id": c["id"], "start_time": c["start_time"].isoformat(), "end_time": c["end_time"].isoformat()}
+            for c in conflicts
+        ],
+    })
+
+def _schedule_entry_dict(row: PlaylistScheduleEntry) -> dict:
+    return {name: getattr(row, name) for name in ENTRY_FIELDS}
+
+async def _stored_conflicts(db: AsyncSession, venue: str, start: datetime, end: datetime, exclude_id=None) -> list:
+    """
+    The stored entries overlapping ``[start, end)``, fetched through the GiST
+    index. The local index is brought in line with them, so entries it holds
+    that are gone from the table no longer count as conflicts.
+    """
+    columns = [getattr(PlaylistScheduleEntry, name) for name in ENTRY_FIELDS]
+    result = await db.execute(sa_select(*columns).where(
+        PlaylistScheduleEntry.venue == venue,
+        PlaylistScheduleEntry.start_time < end,
+        PlaylistScheduleEntry.end_time > start,
+        PlaylistScheduleEntry.id != exclude_id,
+    ))
+    stored = [schedule_index.add(dict(row._mapping)) for row in result]
+    stored_ids = {entry["id"] for entry in stored}
+    for stale in schedule_index.conflicts(venue, start, end, exclude_id=exclude_id):
+        if stale["id"] not in stored_ids:
+            schedule_index.remove(stale["id"])
+    return stored
+
+async def _check_schedule_conflicts(db: AsyncSession, venue: str, start: datetime, end: datetime, exclude_id=None):
+    # The index answers the common no-conflict case without a query; a
+    # conflict it reports is confirmed against the table before refusing
+    if schedule_index.conflicts(venue, start, end, exclude_id=exclude_id):
+        conflicts = await _stored_conflicts(db, venue, start, end, exclude_id)
+        if conflicts:
+            raise _schedule_conflict(conflicts)
+
+async def _commit_schedule_entry(db: AsyncSession, venue: str, start: datetime, end: datetime, exclude_id=None):
+    try:
+        await db.commit()
+    except IntegrityError as e:
+        await db.rollback()
+        sqlstate = getattr(e.orig, "sqlstate", None)
+        if sqlstate == EXCLUSION_VIOLATION:
+            # Another worker wrote an overlapping entry this process has not
+            # seen yet
+            raise _schedule_conflict(await _stored_conflicts(db, venue, start, end, exclude_id))
+        if sqlstate == FOREIGN_KEY_VIOLATION:
+            raise HTTPException(status_code=404, detail="Playlist not found")
+        raise
 
 @router.get("/scheduler/entries", response_model=list[ScheduleEntry])
-async def list_schedule_entries():
-    return schedule_entries
+async def list_schedule_entries(venue: Optional[str] = None, start: Optional[datetime] = None, end: Optional[datetime] = None):
+    # Served from the in-process interval index, which backend.schedule_sync
+    # keeps in step across workers; no database round trip
+    if start is None and end is None:
+        return schedule_index.entries(venue)
+    if start is None or end is None:
+        raise HTTPException(status_code=422, detail="start and end must be given together")
+    venues = [venue] if venue is not None else schedule_index.venues()
+    return [entry for v in venues for entry in schedule_index.overlapping(v, start, end)]
+
+@router.get("/scheduler/now")
+async def get_scheduled_now(venue: str = DEFAULT_VENUE, at: Optional[datetime] = None):
+    at = as_utc(at) if at is not None else datetime.now(timezone.utc)
+    entry = schedule_index.at(venue, at)
+    return {"venue": venue, "at": at, "entry": ScheduleEntry(**entry) if entry else None}
 
 @router.post("/scheduler/entries", response_model=ScheduleEntry, dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def create_schedule_entry(entry: ScheduleEntryCreate):
-    new_entry = ScheduleEntry(id=str(len(schedule_entries)+1), **entry.dict())
-    schedule_entries.append(new_entry)
-    return new_entry
+async def create_schedule_entry(entry: ScheduleEntryCreate, db: AsyncSession = Depends(get_db)):
+    start, end = _schedule_window(entry)
+    await _check_schedule_conflicts(db, entry.venue, start, end)
+    row = PlaylistScheduleEntry(
+        venue=entry.venue,
+        playlist_id=entry.playlist_id,
+        start_time=start,
+        end_time=end,
+        description=entry.description,
+    )
+    db.add(row)
+    await _commit_schedule_entry(db, entry.venue, start, end)
+    return await schedule_sync.add(_schedule_entry_dict(row))
 
 @router.patch("/scheduler/entries/{id}", response_model=ScheduleEntry, dependencies=[Depends(require_role(["admin", "moderator"]))])
-async def update_schedule_entry(id: str, update: ScheduleEntryCreate):
-    for entry in schedule_entries:
-        if entry.id == id:
-            entry.playlist_id = update.playlist_id
-            entry.start_time = update.start_time
-            entry.end_time = update.end_time
-            entry.description = update.description
-            return entry
-    raise HTTPException(status_code=404, detail="Schedule entry not found")
+async def update_schedule_entry(id: str, update: ScheduleEntryCreate, db: AsyncSession = Depends(get_db)):
+    start, end = _schedule_window(update)
+    await _check_schedule_conflicts(db, update.venue, start, end, exclude_id=id)
+    row = await db.get(PlaylistScheduleEntry, id)
+    if row is None:
+        raise HTTPException(status_code=404, detail="Schedule entry not found")
+    row.venue = update.venue
+    row.playlist_id = update.playlist_id
+    row.start_time = start
+    row.end_time = end
+    row.description = update.description
+    await _commit_schedule_entry(db, update.venue, start, end, exclude_id=id)
+    return await schedule_sync.add(_schedule_entry_dict(row))
 
 @router.delete("/scheduler/entries/{id}", dependencies=[Depends(require_role(["admin"]))])
-async def delete_schedule_entry(id: str):
-    global schedule_entries
-    schedule_entries = [entry for entry in schedule_entries if entry.id != id]
+async def delete_schedule_entry(id: str, db: AsyncSession = Depends(get_db)):
+    await db.execute(sa_delete(PlaylistScheduleEntry).where(PlaylistScheduleEntry.id == id))
+    await db.commit()
+    await schedule_sync.remove(id)
     return {"message": "Schedule entry deleted"}
 
+def _apply_schedule_transition(venue: str, entry: Optional[dict]):
+    if venue == DEFAULT_VENUE:
+        playback_state.active_playlist_id = entry["playlist_id"] if entry else None
+        playback_state.schedule_entry_id = entry["id"] if entry else None
+
+scheduler_runtime.add_listener(_apply_schedule_transition)
+
+@router.get("/scheduler/runtime", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def get_scheduler_runtime():
+    return {**scheduler_runtime.snapshot(), "sync": schedule_sync.snapshot()}
+
 @router.get("/scheduler/history")
 async def get_schedule_history():
     # TODO: Implement undo/redo history (stub)
@@ -583,6 +1058,40 @@ async def get_system_status():
         "version": "1.0.0"
     }
 
+@router.get("/system/cache/stats", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def get_cache_stats():
+    return catalog_cache.snapshot()
+
+@router.get("/system/suggest/stats", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def get_suggest_stats():
+    return {"tracks": len(suggest_index), **suggest_sync.snapshot()}
+
+@router.get("/system/singleflight/stats", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def get_singleflight_stats():
+    return singleflight.snapshot()
+
+@router.get("/system/websocket/stats", dependencies=[Depends(require_role(["admin", "moderator"]))])
+async def get_websocket_stats():
+    """Connections, send queue depth, drops and send latency of this worker's WebSocket clients."""
+    return {**event_handler.manager.snapshot(), "fanout": event_handler.fanout.snapshot(), "player_sync": player_sync.snapshot()}
+
+from backend.infrastructure.database import engine, engine_options, replicas
+from backend.infrastructure.db_metrics import pool_metrics, pool_status, query_metrics
+
+@router.get("/system/db/pool", dependencies=[Depends(require_role(["admin"]))])
+async def get_db_pool_stats():
+    """Pool occupancy, checkout wait percentiles and the slowest query fingerprints of this worker."""
+    return {
+        "settings": engine_options(),
+        "pool": pool_status(engine),
+        "checkout_wait": pool_metrics.snapshot(),
+        "queries": query_metrics.snapshot(),
+        "replicas": [
+            {**status, "pool": pool_status(replica.engine), "checkout_wait": replica.engine.sync_engine.pool.metrics.snapshot()}
+            for status, replica in zip(replicas.snapshot(), replicas.replicas)
+        ],
+    }
+
 @router.get("/system/monitoring", dependencies=[Depends(require_role(["admin", "moderator"]))])
 async def get_system_monitoring():
     # Example: Return system metrics (stub)
@@ -1,6 +1,6 @@
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.infrastructure.database import SessionLocal
+from backend.infrastructure.database import get_db
 from backend.infrastructure.models import User as UserModel
 from backend.schemas import User, UserCreate
 from pydantic import BaseModel
@@ -41,7 +41,7 @@ def create_jwt(user_id: str, role: str):
 @router.post("/register", response_model=User)
 async def register(
     user_data: UserCreate,
-    db: AsyncSession = Depends(SessionLocal)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         hashed_password = create_hashed_password(user_data.password)
@@ -53,11 +53,11 @@ async def register(
             is_active=user_data.is_active
         )
         db.add(new_user)
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
         return new_user
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username or email already exists"
@@ -66,7 +66,7 @@ async def register(
 @router.post("/login", response_model=TokenResponse)
 async def login(
     credentials: LoginRequest,
-    db: AsyncSession = Depends(SessionLocal)
+    db: AsyncSession = Depends(get_db)
 ):
     try:
         result = await db.execute(
@@ -0,0 +1,190 @@
+import codecs
+import csv
+import json
+import uuid
+from datetime import timedelta
+from typing import AsyncIterator, Callable, List, Optional, Tuple
+
+import asyncpg
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import exc, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+BATCH_SIZE = 5000
+# Per-row errors beyond this are counted but not echoed back
+MAX_REPORTED_ERRORS = 1000
+
+INGEST_COLUMNS = ["title", "artist", "album", "duration", "bpm", "genre", "storage_url", "artwork_url", "uploaded_by", "is_public"]
+
+# The staging table copies its column types from the live tracks table, so it
+# always matches the migrated schema (UUID uploaded_by, Interval duration)
+# rather than the ORM model, which still declares the pre-migration types.
+_STAGING_DDL = (
+    "CREATE TEMP TABLE IF NOT EXISTS track_ingest ON COMMIT DELETE ROWS AS "
+    f"SELECT 0 AS row_no, {', '.join(INGEST_COLUMNS)} FROM tracks WITH NO DATA"
+)
+# Python values asyncpg's binary COPY accepts for those types; durations
+# arrive as seconds.
+_COPY_CONVERTERS = {
+    "title": str, "artist": str, "album": str, "genre": str, "storage_url": str, "artwork_url": str,
+    "duration": lambda seconds: timedelta(seconds=float(seconds)),
+    "bpm": int,
+    "uploaded_by": lambda value: value if isinstance(value, uuid.UUID) else uuid.UUID(str(value)),
+    "is_public": bool,
+}
+# Rows repeating a storage_url within the batch keep the first occurrence;
+# rows whose storage_url is already in the catalog are skipped by the unique index.
+_MERGE = text(
+    "INSERT INTO tracks (title, artist, album, duration, bpm, genre, storage_url, artwork_url, uploaded_by, is_public, created_at, updated_at) "
+    "SELECT DISTINCT ON (storage_url) title, artist, album, duration, bpm, genre, storage_url, artwork_url, uploaded_by, is_public, now(), now() "
+    "FROM track_ingest ORDER BY storage_url, row_no "
+    "ON CONFLICT (storage_url) DO NOTHING "
+    "RETURNING id, title, artist, storage_url"
+)
+
+# What the database raises for a bad value or a violated constraint (the COPY
+# goes through asyncpg directly, the merge through SQLAlchemy); anything else
+# (a lost connection, say) fails the whole batch rather than being retried row
+# by row
+_ROW_ERRORS = (exc.DataError, exc.IntegrityError, asyncpg.DataError, asyncpg.IntegrityConstraintViolationError)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """Split a streamed UTF-8 request body into lines without buffering the whole body."""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending.rstrip("\r")
+
+
+async def iter_records(lines: AsyncIterator[str], fmt: str) -> AsyncIterator[Tuple[int, Optional[dict], Optional[str]]]:
+    """
+    Yield ``(row_no, record, error)`` for each non-blank input line. CSV input
+    needs a header row; quoted fields may not contain newlines.
+    """
+    header = None
+    row_no = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if fmt == "csv" and header is None:
+            header = [name.strip() for name in next(csv.reader([line]))]
+            continue
+        row_no += 1
+        try:
+            if fmt == "csv":
+                values = next(csv.reader([line]))
+                record = {name: (value if value != "" else None) for name, value in zip(header, values)}
+            else:
+                record = json.loads(line)
+                if not isinstance(record, dict):
+                    raise ValueError("expected a JSON object")
+        except (ValueError, csv.Error) as e:
+            yield row_no, None, f"Malformed row: {e}"
+            continue
+        yield row_no, record, None
+
+
+def to_copy_record(row_no: int, record: dict, schema: type[BaseModel]) -> tuple:
+    """Validate one input record and convert it to a tuple matching the staging table."""
+    fields = list(schema.__annotations__)
+    payload = schema(**{name: record.get(name) for name in fields}).dict()
+    values = [row_no]
+    for name in INGEST_COLUMNS:
+        value = payload.get(name)
+        values.append(None if value is None else _COPY_CONVERTERS[name](value))
+    return tuple(values)
+
+
+class BulkIngestReport:
+    def __init__(self):
+        self.rows = 0
+        self.inserted = 0
+        self.duplicates = 0
+        self.error_count = 0
+        self.errors: List[dict] = []
+
+    def error(self, row_no: int, message: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"row": row_no, "error": message})
+
+    def as_dict(self) -> dict:
+        return {
+            "rows": self.rows,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+async def _load_batch(db: AsyncSession, batch: List[tuple], report: BulkIngestReport, on_inserted):
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await conn.exec_driver_sql(_STAGING_DDL)
+    await raw.driver_connection.copy_records_to_table("track_ingest", records=batch, columns=["row_no"] + INGEST_COLUMNS)
+    inserted = (await conn.execute(_MERGE)).all()
+    await db.commit()
+    report.inserted += len(inserted)
+    report.duplicates += len(batch) - len(inserted)
+    if on_inserted:
+        await on_inserted(inserted)
+
+
+async def ingest_tracks(db: AsyncSession, chunks: AsyncIterator[bytes], fmt: str, schema: type[BaseModel], on_inserted: Optional[Callable] = None) -> BulkIngestReport:
+    """
+    Stream NDJSON or CSV track rows into the catalog through asyncpg COPY.
+
+    Rows are validated one by one; invalid rows are reported and skipped.
+    Valid rows are copied into a temp staging table ``BATCH_SIZE`` at a time
+    and merged into ``tracks``, deduplicated on storage_url. Every batch
+    commits on its own; a batch the database rejects for its data is split
+    in half and retried, down to single rows, so only the offending rows are
+    reported and the rest are committed.
+    ``on_inserted`` is awaited with the ``(id, title, artist, storage_url)``
+    rows each committed batch added.
+    """
+    report = BulkIngestReport()
+    batch: List[tuple] = []
+    async for row_no, record, error in iter_records(iter_lines(chunks), fmt):
+        report.rows += 1
+        if error:
+            report.error(row_no, error)
+            continue
+        try:
+            batch.append(to_copy_record(row_no, record, schema))
+        except (ValidationError, ValueError, TypeError) as e:
+            report.error(row_no, str(e))
+            continue
+        if len(batch) >= BATCH_SIZE:
+            await _flush(db, batch, report, on_inserted)
+            batch = []
+    if batch:
+        await _flush(db, batch, report, on_inserted)
+    return report
+
+
+async def _flush(db: AsyncSession, batch: List[tuple], report: BulkIngestReport, on_inserted):
+    try:
+        await _load_batch(db, batch, report, on_inserted)
+    except _ROW_ERRORS as e:
+        await db.rollback()
+        if len(batch) == 1:
+            report.error(batch[0][0], f"Rejected by the database: {e}")
+            return
+        # Halves keep row order, so the first of two rows repeating a
+        # storage_url is still the one inserted
+        middle = len(batch) // 2
+        await _flush(db, batch[:middle], report, on_inserted)
+        await _flush(db, batch[middle:], report, on_inserted)
+    except Exception as e:
+        await db.rollback()
+        for record in batch:
+            report.error(record[0], f"Batch failed: {e}")
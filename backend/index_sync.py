@@ -0,0 +1,130 @@
+"""
+Keeps an in-process index in step across workers.
+
+A worker applies its own writes to its index straight away, then bumps a
+generation counter in Redis and publishes the change, stamped with the new
+generation, on a channel. Every worker, the writer included, applies
+published changes to its index, so all workers serve the same data. Changes
+are idempotent.
+
+A worker tracks the generation its index reflects. A change that does not
+follow on from it (one was missed or two writers raced) makes it reload the
+index from the database, as does resubscribing after losing Redis with the
+counter having moved on. Writes commit to Postgres before the counter moves,
+so a reload that reads the counter first includes every change up to it.
+
+Subclasses (``backend.schedule_sync``, ``backend.suggest_sync``) add the
+write methods and ``_apply``.
+"""
+import asyncio
+import logging
+from typing import Optional
+
+from redis.exceptions import RedisError
+
+from backend.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+RECONNECT_DELAY = 1.0
+
+
+class IndexSync:
+    """Applies writes to a local index and relays them to the other workers."""
+
+    # Named in log messages
+    name = "index"
+
+    def __init__(self, index, redis, session_factory, generation_key: str, channel: str):
+        self.index = index
+        self.redis = redis
+        self.session_factory = session_factory
+        self.generation_key = generation_key
+        self.channel = channel
+        # Generation the index reflects; None when unknown (Redis was down at load)
+        self.generation: Optional[int] = None
+        self.subscribed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"published": 0, "applied": 0, "reloads": 0, "publish_errors": 0, "resubscribes": 0}
+
+    async def _current_generation(self) -> Optional[int]:
+        try:
+            return int(await self.redis.get(self.generation_key) or 0)
+        except RedisError:
+            logger.warning("Could not read the %s generation", self.name, exc_info=True)
+            return None
+
+    async def reload(self):
+        """Rebuild the index from the table, remembering the generation it reflects."""
+        generation = await self._current_generation()
+        await self.index.load(self.session_factory)
+        self.generation = generation
+        self.stats["reloads"] += 1
+
+    async def _publish(self, change: dict):
+        try:
+            generation = await self.redis.incr(self.generation_key)
+            await self.redis.publish(self.channel, dumps({"generation": generation, **change}))
+            self.stats["published"] += 1
+        except RedisError:
+            # Other workers catch up when they next reload
+            self.stats["publish_errors"] += 1
+            logger.warning("Could not publish %s change; other workers will reload", self.name, exc_info=True)
+
+    def _apply(self, change: dict):
+        raise NotImplementedError
+
+    async def deliver(self, data):
+        """Apply one published change, or reload when it does not follow on from the index."""
+        change = loads(data)
+        generation = change["generation"]
+        if self.generation is not None and generation <= self.generation:
+            return
+        if self.generation is None or generation != self.generation + 1:
+            await self.reload()
+            return
+        self._apply(change)
+        self.generation = generation
+        self.stats["applied"] += 1
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                self.subscribed.set()
+                # Changes published while unsubscribed are lost
+                generation = await self._current_generation()
+                if generation is not None and generation != self.generation:
+                    await self.reload()
+                async for item in pubsub.listen():
+                    if item["type"] == "message":
+                        await self.deliver(item["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("%s change subscription lost; resubscribing", self.name.capitalize(), exc_info=True)
+            finally:
+                self.subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            self.stats["resubscribes"] += 1
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "generation": self.generation, "subscribed": self.subscribed.is_set()}
@@ -0,0 +1,166 @@
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from backend.infrastructure.database import redis_client
+from backend.infrastructure.replicas import use_primary
+from backend.serialization import dumps, loads
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = "cache"
+# Catalog reads change a few times a day; writes invalidate explicitly, so
+# the TTL only bounds how long an orphaned generation lingers in Redis.
+DEFAULT_TTL = 300
+# The in-process tier is not invalidated by other workers' writes, so its
+# TTL is the worst-case cross-worker staleness.
+LOCAL_TTL = 1.0
+LOCAL_MAX_ENTRIES = 1024
+
+# Reads the scope generation and the value stored under it in one round trip.
+# Keys look like cache:<scope>:<generation>:<suffix>; bumping the generation
+# orphans every key of the scope at once. A value that also depends on other
+# scopes gets their generations appended (<gen>.<gen>...), so bumping any of
+# them orphans it too.
+_GET = """
+local generations = {}
+for i, generation_key in ipairs(KEYS) do
+    generations[i] = redis.call('GET', generation_key) or '0'
+end
+local generation = table.concat(generations, '.')
+local key = ARGV[1] .. ':' .. generation .. ':' .. ARGV[2]
+return {generation, key, redis.call('GET', key)}
+"""
+
+
+class ReadThroughCache:
+    """
+    Two-tier read-through cache for catalog reads.
+
+    Values are grouped into scopes ("tracks", "track:42", "playlist:<id>"),
+    each with a generation counter in Redis. ``invalidate`` bumps the
+    generations of the scopes a write touched, so every cached variant of
+    them (pages, field projections, include flags) is dropped precisely and
+    in O(1), without scanning keys. A small LRU in front of Redis serves the
+    hottest keys without a network round trip.
+
+    Loaders read from the primary (``use_primary``), so a value cached
+    right after a write includes it. Redis being unavailable degrades to
+    calling the loader; it never fails a read.
+    """
+
+    def __init__(self, redis=redis_client, prefix: str = CACHE_PREFIX, ttl: int = DEFAULT_TTL,
+                 local_ttl: float = LOCAL_TTL, local_max_entries: int = LOCAL_MAX_ENTRIES):
+        self.redis = redis
+        self.prefix = prefix
+        self.ttl = ttl
+        self.local_ttl = local_ttl
+        self.local_max_entries = local_max_entries
+        self._get = redis.register_script(_GET)
+        self._local: OrderedDict = OrderedDict()
+        # Bumped by this worker's invalidations, so a read that raced one
+        # does not reach the local tier
+        self._epochs: dict = {}
+        self.stats = {"local_hits": 0, "redis_hits": 0, "misses": 0, "invalidations": 0, "errors": 0}
+
+    def _generation_key(self, scope: str) -> str:
+        return f"{self.prefix}:gen:{scope}"
+
+    def _local_get(self, local_key):
+        entry = self._local.get(local_key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[local_key]
+            return None
+        self._local.move_to_end(local_key)
+        return entry
+
+    def _epoch(self, scopes) -> tuple:
+        return tuple(self._epochs.get(scope, 0) for scope in scopes)
+
+    def _local_set(self, local_key, value, epoch: tuple):
+        # local_key is (scope, suffix, *depends_on)
+        if self._epoch((local_key[0], *local_key[2:])) != epoch:
+            return
+        self._local[local_key] = (time.monotonic() + self.local_ttl, value)
+        self._local.move_to_end(local_key)
+        while len(self._local) > self.local_max_entries:
+            self._local.popitem(last=False)
+
+    async def get_or_load(self, scope: str, suffix: str, loader: Callable[[], Awaitable[Any]], ttl: Optional[int] = None,
+                          depends_on: Tuple[str, ...] = ()) -> Any:
+        """
+        Return the cached value for ``scope``/``suffix``, calling ``loader`` on a miss. Values must be JSON-serializable.
+        Invalidating ``scope`` or any of ``depends_on`` drops the value.
+        """
+        local_key = (scope, suffix, *depends_on)
+        entry = self._local_get(local_key)
+        if entry is not None:
+            self.stats["local_hits"] += 1
+            return entry[1]
+
+        key = None
+        epoch = self._epoch((scope, *depends_on))
+        generation_keys = [self._generation_key(s) for s in (scope, *depends_on)]
+        try:
+            _, key, raw = await self._get(keys=generation_keys, args=[f"{self.prefix}:{scope}", suffix])
+        except RedisError:
+            self.stats["errors"] += 1
+            logger.warning("Cache read failed for %s:%s", scope, suffix, exc_info=True)
+            raw = None
+        if raw is not None:
+            self.stats["redis_hits"] += 1
+            value = loads(raw)
+            self._local_set(local_key, value, epoch)
+            return value
+
+        self.stats["misses"] += 1
+        # A replica may not have the write that just bumped the generation
+        # yet, and whatever is stored now is served until the next bump
+        with use_primary():
+            value = await loader()
+        if key is not None:
+            try:
+                await self.redis.set(key, dumps(value), ex=ttl or self.ttl)
+            except RedisError:
+                self.stats["errors"] += 1
+                logger.warning("Cache write failed for %s", key, exc_info=True)
+            # A load that raced an invalidation lands under the old generation,
+            # which no reader resolves to any more, and stays out of the local
+            # tier, which has no generations
+            self._local_set(local_key, value, epoch)
+        return value
+
+    async def invalidate(self, *scopes: str):
+        """Drop every cached value of ``scopes``. Call after the write has committed."""
+        scopes = set(scopes)
+        for scope in scopes:
+            self._epochs[scope] = self._epochs.get(scope, 0) + 1
+        for local_key in [k for k in self._local if k[0] in scopes or scopes.intersection(k[2:])]:
+            del self._local[local_key]
+        self.stats["invalidations"] += len(scopes)
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                for scope in scopes:
+                    pipe.incr(self._generation_key(scope))
+                await pipe.execute()
+        except RedisError:
+            self.stats["errors"] += 1
+            logger.exception("Cache invalidation failed for %s", sorted(scopes))
+
+    def snapshot(self) -> dict:
+        lookups = self.stats["local_hits"] + self.stats["redis_hits"] + self.stats["misses"]
+        hits = lookups - self.stats["misses"]
+        return {
+            **self.stats,
+            "hit_ratio": round(hits / lookups, 4) if lookups else None,
+            "local_entries": len(self._local),
+        }
+
+
+catalog_cache = ReadThroughCache()
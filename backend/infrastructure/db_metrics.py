@@ -0,0 +1,306 @@
+"""
+Database instrumentation: per-request query counts and DB time, a slow-query
+log keyed by statement fingerprint, connection pool checkout waits and
+connection leak detection.
+
+``instrument(engine)`` hooks the cursor and pool events of an engine built by
+``backend.infrastructure.database.create_engine``; ``DBMetricsMiddleware``
+scopes the counters to one HTTP request, reports them in the
+``X-DB-Queries`` / ``X-DB-Time-Ms`` response headers, and flags requests that
+finish while still holding a pooled connection. With ``DB_DETECT_NPLUSONE``
+set (dev mode) it also warns when one statement fingerprint repeats more
+than ``DB_NPLUSONE_THRESHOLD`` times in a request, the signature of an N+1.
+"""
+import hashlib
+import logging
+import os
+import re
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
+
+from sqlalchemy import event, exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger("backend.db.slow")
+
+SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))
+# Distinct slow fingerprints kept for the admin endpoint
+MAX_SLOW_FINGERPRINTS = 200
+# Recent checkout waits kept for percentiles
+WAIT_SAMPLES = 2048
+RECENT_LEAKS = 20
+DETECT_NPLUSONE = os.getenv("DB_DETECT_NPLUSONE", "").strip().lower() in ("1", "true", "yes", "on")
+NPLUSONE_THRESHOLD = int(os.getenv("DB_NPLUSONE_THRESHOLD", "5"))
+
+_request_stats: ContextVar[Optional[dict]] = ContextVar("db_request_stats", default=None)
+# Called with (scope, stats) when a request completes; the test suite's query
+# budget plugin listens here
+_request_observers: List[Callable] = []
+
+_STRING_RE = re.compile(r"'(?:[^']|'')*'")
+_NUMBER_RE = re.compile(r"\b\d+(?:\.\d+)?\b")
+_PARAM_RE = re.compile(r"\$\d+|%\(\w+\)s|:\w+|\?")
+_IN_LIST_RE = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SPACE_RE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def fingerprint(statement: str) -> str:
+    """Normalize a statement so every execution of the same query shape maps to one string."""
+    normalized = _STRING_RE.sub("?", statement)
+    normalized = _PARAM_RE.sub("?", normalized)
+    normalized = _NUMBER_RE.sub("?", normalized)
+    normalized = _IN_LIST_RE.sub("(?...)", normalized)
+    return _SPACE_RE.sub(" ", normalized).strip()
+
+
+def fingerprint_id(normalized: str) -> str:
+    return hashlib.sha1(normalized.encode()).hexdigest()[:12]
+
+
+def new_request_stats() -> dict:
+    # held: connections checked out by this request and not yet returned
+    return {"queries": 0, "db_time": 0.0, "fingerprints": {}, "held": {}}
+
+
+def current_request_stats() -> Optional[dict]:
+    return _request_stats.get()
+
+
+@contextmanager
+def track_queries():
+    """Count the queries issued in the current context (outside any HTTP request), e.g. in a test or a job."""
+    stats = new_request_stats()
+    token = _request_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _request_stats.reset(token)
+
+
+def repeated_fingerprints(stats: dict, threshold: int) -> List[Tuple[str, int]]:
+    """Fingerprints executed more than ``threshold`` times, most repeated first."""
+    repeats = [(normalized, count) for normalized, count in stats["fingerprints"].items() if count > threshold]
+    return sorted(repeats, key=lambda item: item[1], reverse=True)
+
+
+def add_request_observer(observer: Callable):
+    _request_observers.append(observer)
+
+
+def remove_request_observer(observer: Callable):
+    _request_observers.remove(observer)
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self._waits = deque(maxlen=WAIT_SAMPLES)
+        self.leaks = 0
+        self.recent_leaks = deque(maxlen=RECENT_LEAKS)
+
+    def record_wait(self, seconds: float):
+        self.checkouts += 1
+        self.wait_total += seconds
+        self.wait_max = max(self.wait_max, seconds)
+        self._waits.append(seconds)
+
+    def record_leak(self, method: str, path: str, held: dict):
+        now = time.perf_counter()
+        self.leaks += len(held)
+        self.recent_leaks.append({
+            "method": method,
+            "path": path,
+            "connections": len(held),
+            "held_ms": round(max(now - started for started in held.values()) * 1000, 3),
+        })
+
+    def snapshot(self) -> dict:
+        waits = sorted(self._waits)
+
+        def percentile(p):
+            return round(waits[min(len(waits) - 1, int(p * len(waits)))] * 1000, 3) if waits else None
+
+        return {
+            "checkouts": self.checkouts,
+            "timeouts": self.timeouts,
+            "wait_ms_mean": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else None,
+            "wait_ms_p50": percentile(0.50),
+            "wait_ms_p95": percentile(0.95),
+            "wait_ms_p99": percentile(0.99),
+            "wait_ms_max": round(self.wait_max * 1000, 3),
+            "leaked_connections": self.leaks,
+            "recent_leaks": list(self.recent_leaks),
+        }
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that times how long each checkout waits for a connection (including connecting a new one)."""
+
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.timeouts += 1
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.record_wait(time.perf_counter() - started)
+
+    def recreate(self):
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class QueryMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        self.slow_queries = 0
+        self._slow: OrderedDict = OrderedDict()
+
+    def record(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.db_time += elapsed
+        stats = _request_stats.get()
+        normalized = None
+        if stats is not None:
+            stats["queries"] += 1
+            stats["db_time"] += elapsed
+            normalized = fingerprint(statement)
+            stats["fingerprints"][normalized] = stats["fingerprints"].get(normalized, 0) + 1
+        if elapsed * 1000 >= SLOW_QUERY_MS:
+            normalized = normalized or fingerprint(statement)
+            self._record_slow(normalized, elapsed)
+
+    def _record_slow(self, normalized: str, elapsed: float):
+        self.slow_queries += 1
+        key = fingerprint_id(normalized)
+        slow_query_logger.warning("slow query %s %.1f ms: %s", key, elapsed * 1000, normalized[:1000])
+        entry = self._slow.pop(key, None) or {"fingerprint": key, "statement": normalized[:1000], "count": 0, "total_ms": 0.0, "max_ms": 0.0}
+        entry["count"] += 1
+        entry["total_ms"] += elapsed * 1000
+        entry["max_ms"] = max(entry["max_ms"], elapsed * 1000)
+        self._slow[key] = entry
+        while len(self._slow) > MAX_SLOW_FINGERPRINTS:
+            self._slow.popitem(last=False)
+
+    def snapshot(self) -> dict:
+        slowest = sorted(self._slow.values(), key=lambda entry: entry["total_ms"], reverse=True)
+        return {
+            "queries": self.queries,
+            "db_time_ms": round(self.db_time * 1000, 3),
+            "slow_query_ms": SLOW_QUERY_MS,
+            "slow_queries": self.slow_queries,
+            "slowest": [{**entry, "total_ms": round(entry["total_ms"], 3), "max_ms": round(entry["max_ms"], 3)} for entry in slowest[:50]],
+        }
+
+
+query_metrics = QueryMetrics()
+pool_metrics = PoolMetrics()
+
+
+def instrument(engine, pool: PoolMetrics = pool_metrics, queries: QueryMetrics = query_metrics):
+    """Attach query timing and pool wait metrics to an (async) engine."""
+    sync_engine = getattr(engine, "sync_engine", engine)
+    if isinstance(sync_engine.pool, InstrumentedQueuePool):
+        sync_engine.pool.metrics = pool
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        queries.record(statement, time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "checkout")
+    def checkout(dbapi_connection, connection_record, connection_proxy):
+        stats = _request_stats.get()
+        if stats is not None:
+            stats["held"][id(connection_record)] = time.perf_counter()
+            connection_record.info["request_stats"] = stats
+
+    @event.listens_for(sync_engine, "checkin")
+    def checkin(dbapi_connection, connection_record):
+        # May run outside the request's context, hence the back-reference
+        stats = connection_record.info.pop("request_stats", None)
+        if stats is not None:
+            stats["held"].pop(id(connection_record), None)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(context):
+        # Failed statements never reach after_cursor_execute
+        started = context.connection.info.get("query_started") if context.connection is not None else None
+        if started:
+            started.pop()
+
+    return engine
+
+
+def pool_status(engine) -> dict:
+    pool = getattr(engine, "sync_engine", engine).pool
+    status = {"class": type(pool).__name__}
+    for name in ("size", "checkedin", "checkedout", "overflow"):
+        if hasattr(pool, name):
+            status[name] = getattr(pool, name)()
+    if hasattr(pool, "timeout"):
+        status["timeout"] = pool.timeout()
+    return status
+
+
+class DBMetricsMiddleware:
+    """
+    Pure ASGI middleware scoping query counters to each HTTP request and
+    reporting them as headers. Connections the request checked out and never
+    returned by the time it completes (after dependency teardown) are logged
+    as leaks.
+    """
+
+    def __init__(self, app, pool: PoolMetrics = pool_metrics, detect_nplusone: bool = DETECT_NPLUSONE, nplusone_threshold: int = NPLUSONE_THRESHOLD):
+        self.app = app
+        self.pool = pool
+        self.detect_nplusone = detect_nplusone
+        self.nplusone_threshold = nplusone_threshold
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        stats = new_request_stats()
+        token = _request_stats.set(stats)
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((b"x-db-queries", str(stats["queries"]).encode()))
+                headers.append((b"x-db-time-ms", f"{stats['db_time'] * 1000:.2f}".encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_headers)
+        finally:
+            _request_stats.reset(token)
+            if stats["held"]:
+                self.pool.record_leak(scope.get("method", ""), scope.get("path", ""), stats["held"])
+                logger.warning("%s %s finished holding %d DB connection(s)", scope.get("method"), scope.get("path"), len(stats["held"]))
+            if self.detect_nplusone:
+                for normalized, count in repeated_fingerprints(stats, self.nplusone_threshold):
+                    logger.warning("Possible N+1 in %s %s: %d x %s", scope.get("method"), scope.get("path"), count, normalized[:500])
+            for observer in list(_request_observers):
+                observer(scope, stats)
@@ -1,4 +1,5 @@
-from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Boolean, DateTime, ForeignKey, Float, Index, Computed, CheckConstraint, DDL, event
+from sqlalchemy.dialects.postgresql import TSVECTOR, TSTZRANGE, ExcludeConstraint
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from datetime import datetime
@@ -24,11 +25,13 @@ class Playlist(Base):
     id = Column(String, primary_key=True, default=generate_uuid)
     name = Column(String, index=True)
     description = Column(String, nullable=True)
-    owner_id = Column(Integer, ForeignKey('users.id'), nullable=True)
+    owner_id = Column(Integer, ForeignKey('users.id'), nullable=True, index=True)
     is_public = Column(Boolean, default=True)
     artwork_url = Column(String, nullable=True)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every change to the playlist or its track list; feeds the ETag
+    version = Column(Integer, nullable=False, default=1, server_default='1')
     
     tracks = relationship("PlaylistTrack", back_populates="playlist")
     owner = relationship("User")
@@ -38,13 +41,19 @@ class PlaylistTrack(Base):
     
     id = Column(Integer, primary_key=True, index=True)
     playlist_id = Column(String, ForeignKey('playlists.id'))
-    track_id = Column(Integer, ForeignKey('tracks.id'))
-    position = Column(Integer)
+    track_id = Column(Integer, ForeignKey('tracks.id'), index=True)
+    position = Column(Integer, nullable=True)  # superseded by rank
+    # Fractional order key (backend.ordering); compared byte-wise
+    rank = Column(String(collation="C"), nullable=False)
     created_at = Column(DateTime, default=datetime.utcnow)
     
     playlist = relationship("Playlist", back_populates="tracks")
     track = relationship("Track")
 
+    __table_args__ = (
+        Index('ix_playlist_tracks_playlist_id_rank', 'playlist_id', 'rank'),
+    )
+
 class Track(Base):
     __tablename__ = "tracks"
     
@@ -53,30 +62,94 @@ class Track(Base):
     artist = Column(String)
     album = Column(String)
     duration = Column(Float)
+    bpm = Column(Integer, nullable=True)
+    genre = Column(String, nullable=True)
+    storage_url = Column(String)
+    artwork_url = Column(String, nullable=True)
+    uploaded_by = Column(Integer, ForeignKey('users.id'), nullable=True)
+    is_public = Column(Boolean, default=True)
     filepath = Column(String)
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
+    # Weighted full-text document maintained by Postgres (see migration 8b2d6f0c4e19)
+    search_vector = Column(TSVECTOR, Computed(
+        "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+        "setweight(to_tsvector('simple', coalesce(artist, '')), 'B') || "
+        "setweight(to_tsvector('simple', coalesce(album, '')), 'C') || "
+        "setweight(to_tsvector('simple', coalesce(genre, '')), 'D')",
+        persisted=True,
+    ))
+
+    __table_args__ = (
+        Index('ix_tracks_created_at_id', 'created_at', 'id'),
+        Index('ix_tracks_search_vector', 'search_vector', postgresql_using='gin'),
+        Index('ix_tracks_title_trgm', 'title', postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'}),
+        Index('ix_tracks_artist_trgm', 'artist', postgresql_using='gin', postgresql_ops={'artist': 'gin_trgm_ops'}),
+        Index('ix_tracks_genre_bpm', 'genre', 'bpm'),
+        Index('ix_tracks_storage_url', 'storage_url', unique=True),
+    )
+
 class DigitalSignageContent(Base):
-    __tablename__ = "digital_signage_contents"
+    __tablename__ = "digital_signage_content"
     
-    id = Column(Integer, primary_key=True, index=True)
-    name = Column(String, index=True)
-    content_type = Column(String)  # video, image, html
-    content_url = Column(String)
-    duration = Column(Integer)  # duration in seconds
-    created_at = Column(DateTime, default=datetime.utcnow)
-    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    id = Column(String, primary_key=True, default=generate_uuid)
+    filename = Column(String(255), nullable=False)
+    content_type = Column(String(32), nullable=False)  # video, image, html
+    url = Column(String, nullable=False)
+    checksum = Column(String(64), nullable=True)  # sha256 hex of the file, for display-side caches
+    duration = Column(Integer, nullable=True)  # seconds on screen; NULL: the display's default
+    uploaded_by = Column(Integer, ForeignKey('users.id'), nullable=True)
+    uploaded_at = Column(DateTime, default=datetime.utcnow)
+    is_active = Column(Boolean, default=True)
 
 class DigitalSignageSchedule(Base):
-    __tablename__ = "digital_signage_schedules"
+    __tablename__ = "digital_signage_schedule"
     
-    id = Column(Integer, primary_key=True, index=True)
-    content_id = Column(Integer, ForeignKey('digital_signage_contents.id'))
-    start_time = Column(DateTime)
-    end_time = Column(DateTime)
-    is_active = Column(Boolean, default=True)
+    id = Column(String, primary_key=True, default=generate_uuid)
+    content_id = Column(String, ForeignKey('digital_signage_content.id'), nullable=False, index=True)
+    # NULL: shown on every display
+    display_id = Column(String(64), nullable=True, index=True)
+    start_time = Column(DateTime, nullable=False)
+    end_time = Column(DateTime, nullable=False)
+    repeat_pattern = Column(String(32), nullable=True)  # daily, weekdays, weekends, weekly
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
     
     content = relationship("DigitalSignageContent")
+
+    __table_args__ = (
+        Index('ix_digital_signage_schedule_start_time_end_time', 'start_time', 'end_time'),
+    )
+
+class PlaylistScheduleEntry(Base):
+    __tablename__ = "schedule_entries"
+
+    id = Column(String, primary_key=True, default=generate_uuid)
+    venue = Column(String, nullable=False, default='default', server_default='default')
+    playlist_id = Column(String, ForeignKey('playlists.id', ondelete='CASCADE'), nullable=False)
+    start_time = Column(DateTime(timezone=True), nullable=False)
+    end_time = Column(DateTime(timezone=True), nullable=False)
+    description = Column(String, nullable=True)
+    # [start_time, end_time) as a range so Postgres can refuse overlapping entries
+    during = Column(TSTZRANGE, Computed("tstzrange(start_time, end_time, '[)')", persisted=True))
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    playlist = relationship("Playlist")
+
+    __table_args__ = (
+        CheckConstraint('end_time > start_time', name='ck_schedule_entries_end_after_start'),
+        ExcludeConstraint(('venue', '='), ('during', '&&'), name='ex_schedule_entries_venue_during', using='gist'),
+    )
+
+# The exclusion constraint compares venue (text) with = inside a GiST index
+event.listen(PlaylistScheduleEntry.__table__, "before_create", DDL("CREATE EXTENSION IF NOT EXISTS btree_gist"))
+
+class TrackVote(Base):
+    __tablename__ = "track_votes"
+
+    # Queue track ids as the request queue sees them; flushed in batches by backend.vote_engine
+    track_id = Column(String, primary_key=True)
+    votes = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
@@ -0,0 +1,199 @@
+"""
+Read-replica routing.
+
+GET/HEAD requests run with ``read_only`` set, and sessions created from
+``SessionLocal`` send their statements to a healthy replica while it is set.
+Everything else (writes, flushes, background jobs, requests made shortly
+after the same client wrote) uses the primary, and so does anything run under
+``use_primary()``: values loaded into a shared cache outlive the request that
+loaded them, so they must not be read from a lagging replica. A background
+task checks every replica and takes lagging or unreachable ones out of
+rotation; with no healthy replica, reads fall back to the primary.
+"""
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+from itertools import count
+from typing import List, Optional
+
+from sqlalchemy import event, text
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+HEALTH_CHECK_INTERVAL = float(os.getenv("DB_REPLICA_CHECK_INTERVAL", "5"))
+HEALTH_CHECK_TIMEOUT = 2.0
+MAX_REPLICA_LAG = float(os.getenv("DB_REPLICA_MAX_LAG", "5"))
+# After a write, the same client reads from the primary for this long
+READ_YOUR_WRITES_SECONDS = int(os.getenv("DB_READ_YOUR_WRITES_SECONDS", "5"))
+STICKY_COOKIE = "db_primary_until"
+# Only these pin a client to the primary; OPTIONS preflights and rejected writes do not
+WRITE_METHODS = ("POST", "PUT", "PATCH", "DELETE")
+
+_read_only: ContextVar[bool] = ContextVar("db_read_only", default=False)
+
+# Replay lag in seconds; 0 on a primary, or on a standby that has replayed
+# everything it received (an idle primary would otherwise look like lag)
+_LAG_QUERY = text(
+    "SELECT CASE WHEN pg_is_in_recovery() AND pg_last_wal_receive_lsn() <> pg_last_wal_replay_lsn() "
+    "THEN EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) ELSE 0 END"
+)
+
+
+class Replica:
+    def __init__(self, engine):
+        self.engine = engine
+        self.healthy = True
+        self.lag: Optional[float] = None
+        self.last_error: Optional[str] = None
+
+        @event.listens_for(engine.sync_engine, "handle_error")
+        def mark_down(context):
+            if context.is_disconnect or isinstance(context.original_exception, OSError):
+                self.healthy = False
+                self.last_error = str(context.original_exception)
+
+
+class ReplicaSet:
+    """Round-robin over the healthy replicas, re-checked every ``HEALTH_CHECK_INTERVAL`` seconds."""
+
+    def __init__(self, engines=()):
+        self.replicas: List[Replica] = [Replica(engine) for engine in engines]
+        self._next = count()
+        self._task: Optional[asyncio.Task] = None
+
+    def __bool__(self):
+        return bool(self.replicas)
+
+    def choose(self):
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)].engine
+
+    async def check(self):
+        for replica in self.replicas:
+            try:
+                async def probe():
+                    async with replica.engine.connect() as conn:
+                        return float(await conn.scalar(_LAG_QUERY) or 0)
+                replica.lag = await asyncio.wait_for(probe(), HEALTH_CHECK_TIMEOUT)
+                healthy = replica.lag <= MAX_REPLICA_LAG
+                replica.last_error = None if healthy else f"replication lag {replica.lag:.1f}s"
+            except Exception as e:
+                healthy = False
+                replica.last_error = str(e) or type(e).__name__
+            if healthy != replica.healthy:
+                logger.warning("Replica %s is now %s (%s)", replica.engine.url.host, "up" if healthy else "down", replica.last_error)
+            replica.healthy = healthy
+
+    async def _run(self):
+        while True:
+            await self.check()
+            await asyncio.sleep(HEALTH_CHECK_INTERVAL)
+
+    def start(self):
+        if self.replicas and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def snapshot(self) -> list:
+        return [
+            {"host": replica.engine.url.host, "healthy": replica.healthy, "lag": replica.lag, "error": replica.last_error}
+            for replica in self.replicas
+        ]
+
+
+class RoutingSession(Session):
+    """Sync session behind ``AsyncSession`` that binds reads to a replica while ``read_only`` is set."""
+
+    def __init__(self, *args, replicas: Optional[ReplicaSet] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.replicas = replicas
+        self._wrote = False
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        if clause is not None and getattr(clause, "is_dml", False):
+            self._wrote = True
+        if self.replicas and _read_only.get() and not self._wrote and not self._flushing:
+            engine = self.replicas.choose()
+            if engine is not None:
+                return engine.sync_engine
+        return super().get_bind(mapper, clause=clause, **kwargs)
+
+
+def read_only_requested() -> bool:
+    return _read_only.get()
+
+
+@contextmanager
+def use_primary():
+    """Send the reads made inside the block to the primary, even during a GET."""
+    token = _read_only.set(False)
+    try:
+        yield
+    finally:
+        _read_only.reset(token)
+
+
+class ReadRoutingMiddleware:
+    """
+    Pure ASGI middleware marking GET/HEAD requests read-only. A successful
+    (2xx) POST, PUT, PATCH or DELETE sets a short-lived cookie so that client's next reads go to the
+    primary and see their own writes despite replication lag.
+    """
+
+    def __init__(self, app, window: int = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.window = window
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        method = scope["method"]
+        if method in WRITE_METHODS:
+            await self.app(scope, receive, self._sticky(send))
+            return
+        if method not in ("GET", "HEAD"):
+            await self.app(scope, receive, send)
+            return
+        token = _read_only.set(not self._recently_wrote(scope))
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _read_only.reset(token)
+
+    def _recently_wrote(self, scope) -> bool:
+        for name, value in scope.get("headers", []):
+            if name == b"cookie":
+                morsel = SimpleCookie(value.decode("latin-1")).get(STICKY_COOKIE)
+                if morsel is not None:
+                    try:
+                        return float(morsel.value) > time.time()
+                    except ValueError:
+                        return False
+        return False
+
+    def _sticky(self, send):
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and 200 <= message["status"] < 300:
+                until = int(time.time()) + self.window
+                cookie = f"{STICKY_COOKIE}={until}; Max-Age={self.window}; Path=/; HttpOnly; SameSite=Lax"
+                message = {**message, "headers": list(message.get("headers", [])) + [(b"set-cookie", cookie.encode())]}
+            await send(message)
+        return send_with_cookie
@@ -1,11 +1,22 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
+import logging
 import os
 
 from backend.auth import router as auth_router
 from backend.api import router as api_router
 from backend.media_api import router as media_router
+from backend.infrastructure.database import replicas
+from backend.infrastructure.db_metrics import DBMetricsMiddleware
+from backend.infrastructure.replicas import ReadRoutingMiddleware
+from backend.schedule_sync import schedule_sync
+from backend.scheduler_runtime import scheduler_runtime
+from backend.suggest_sync import suggest_sync
+from backend.vote_engine import vote_aggregator
+from backend.websocket_manager import event_handler
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI()
 
@@ -27,7 +38,63 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-DB-Queries", "X-DB-Time-Ms"],
 )
+app.add_middleware(ReadRoutingMiddleware)
+app.add_middleware(DBMetricsMiddleware)
+
+@app.on_event("startup")
+async def build_suggest_index():
+    try:
+        await suggest_sync.reload()
+    except Exception:
+        # Autocomplete starts empty rather than keeping the API down
+        logger.exception("Could not build suggest index at startup")
+    suggest_sync.start()
+
+@app.on_event("shutdown")
+async def stop_suggest_sync():
+    await suggest_sync.stop()
+
+@app.on_event("startup")
+async def start_scheduler():
+    try:
+        await schedule_sync.reload()
+    except Exception:
+        logger.exception("Could not load schedule entries at startup")
+    # Resumes every venue on the entry covering "now"
+    scheduler_runtime.start()
+    schedule_sync.start()
+
+@app.on_event("shutdown")
+async def stop_scheduler_runtime():
+    await schedule_sync.stop()
+    await scheduler_runtime.stop()
+
+@app.on_event("startup")
+async def start_vote_aggregator():
+    vote_aggregator.start()
+
+@app.on_event("shutdown")
+async def stop_vote_aggregator():
+    await vote_aggregator.stop()
+
+@app.on_event("startup")
+async def start_replica_health_checks():
+    replicas.start()
+
+@app.on_event("shutdown")
+async def stop_replica_health_checks():
+    await replicas.stop()
+
+@app.on_event("startup")
+async def start_websocket_fanout():
+    event_handler.fanout.start()
+
+@app.on_event("shutdown")
+async def stop_websocket_writers():
+    await event_handler.fanout.stop()
+    await event_handler.manager.close()
 
 @app.get("/health")
 def health_check():
@@ -2,20 +2,13 @@ from fastapi import APIRouter, Depends, UploadFile, WebSocket, HTTPException
 from typing import List
 from .media_manager import MediaManager
 from .schemas import ChunkedUploadInit, ChunkedUploadStatus, MediaFile
-from ..infrastructure.database import SessionLocal
+from ..infrastructure.database import get_db
 from ..infrastructure.models import MediaTrack
 from sqlalchemy.ext.asyncio import AsyncSession
 
 router = APIRouter()
 media_manager = MediaManager(upload_dir="uploads")
 
-async def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        await db.close()
-
 @router.post("/media/upload/init")
 async def initialize_upload(
     upload_init: ChunkedUploadInit,
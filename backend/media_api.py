@@ -2,7 +2,7 @@ from fastapi import APIRouter, HTTPException, Depends
 from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
 from sqlalchemy.ext.asyncio import AsyncSession
-from backend.infrastructure.database import SessionLocal
+from backend.infrastructure.database import get_db
 from backend.infrastructure.security import get_current_user
 import json
 import httpx
@@ -36,14 +36,6 @@ class SearchQuery(BaseModel):
 # Router
 router = APIRouter(prefix="/api", tags=["media"])
 
-# Get database session
-async def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        await db.close()
-
 # Spotify API client
 async def spotify_client(access_token: str):
     headers = {"Authorization": f"Bearer {access_token}"}
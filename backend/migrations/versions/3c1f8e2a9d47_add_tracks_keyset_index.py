@@ -0,0 +1,28 @@
+"""add tracks (created_at, id) keyset index
+
+Revision ID: 3c1f8e2a9d47
+Revises: 57ec4205b7f5
+Create Date: 2026-10-18 09:12:40.218533
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3c1f8e2a9d47'
+down_revision: Union[str, Sequence[str], None] = '57ec4205b7f5'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_tracks_created_at_id', 'tracks', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tracks_created_at_id', table_name='tracks')
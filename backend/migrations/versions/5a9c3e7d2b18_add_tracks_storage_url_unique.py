@@ -0,0 +1,81 @@
+"""add unique index on tracks.storage_url for bulk ingest dedupe
+
+Revision ID: 5a9c3e7d2b18
+Revises: d4e7a1b93f25
+Create Date: 2026-10-18 13:20:47.331902
+
+"""
+import logging
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a9c3e7d2b18'
+down_revision: Union[str, Sequence[str], None] = 'd4e7a1b93f25'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+logger = logging.getLogger('alembic.runtime.migration')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # For any storage_url uploaded twice, keep the oldest row and merge the
+    # others into it: everything that refers to a duplicate is repointed to
+    # the kept track before the duplicate goes
+    op.execute(
+        "CREATE TEMP TABLE track_duplicates AS "
+        "SELECT id AS duplicate_id, storage_url, first_value(id) OVER ("
+        "PARTITION BY storage_url ORDER BY created_at, id::text) AS kept_id "
+        "FROM tracks WHERE storage_url IS NOT NULL"
+    )
+    op.execute("DELETE FROM track_duplicates WHERE duplicate_id = kept_id")
+    bind = op.get_bind()
+    for storage_url, kept_id, duplicates in bind.execute(sa.text(
+        "SELECT storage_url, kept_id, count(*) FROM track_duplicates GROUP BY storage_url, kept_id ORDER BY storage_url"
+    )):
+        logger.warning("Merging %d duplicate track(s) of %s into %s", duplicates, storage_url, kept_id)
+
+    op.execute(
+        "UPDATE playback_history h SET track_id = m.kept_id "
+        "FROM track_duplicates m WHERE h.track_id = m.duplicate_id"
+    )
+    op.execute(
+        "UPDATE sessions s SET current_track_id = m.kept_id "
+        "FROM track_duplicates m WHERE s.current_track_id = m.duplicate_id"
+    )
+    # (playlist_id, track_id) is the key: where a playlist holds the kept
+    # track, or several of its duplicates, only one entry survives (the kept
+    # track's own, else the duplicate with the lowest id)
+    op.execute(
+        "DELETE FROM playlist_tracks p USING track_duplicates m "
+        "WHERE p.track_id = m.duplicate_id AND EXISTS ("
+        "SELECT 1 FROM playlist_tracks o LEFT JOIN track_duplicates om ON om.duplicate_id = o.track_id "
+        "WHERE o.playlist_id = p.playlist_id AND coalesce(om.kept_id, o.track_id) = m.kept_id "
+        "AND (o.track_id = m.kept_id OR o.track_id::text < p.track_id::text))"
+    )
+    op.execute(
+        "UPDATE playlist_tracks p SET track_id = m.kept_id "
+        "FROM track_duplicates m WHERE p.track_id = m.duplicate_id"
+    )
+    # Vote tallies are keyed by the track id as text and have no foreign key
+    op.execute(
+        "INSERT INTO track_votes (track_id, votes, updated_at) "
+        "SELECT m.kept_id::text, sum(v.votes), max(v.updated_at) "
+        "FROM track_votes v JOIN track_duplicates m ON v.track_id = m.duplicate_id::text GROUP BY m.kept_id "
+        "ON CONFLICT (track_id) DO UPDATE SET votes = track_votes.votes + excluded.votes, "
+        "updated_at = greatest(track_votes.updated_at, excluded.updated_at)"
+    )
+    op.execute("DELETE FROM track_votes v USING track_duplicates m WHERE v.track_id = m.duplicate_id::text")
+
+    op.execute("DELETE FROM tracks t USING track_duplicates m WHERE t.id = m.duplicate_id")
+    op.execute("DROP TABLE track_duplicates")
+    op.create_index('ix_tracks_storage_url', 'tracks', ['storage_url'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tracks_storage_url', table_name='tracks')
@@ -0,0 +1,45 @@
+"""add schedule_entries with non-overlap exclusion constraint
+
+Revision ID: 7c3d9a1f5e62
+Revises: f2c4b7a91d35
+Create Date: 2026-10-18 17:40:12.583046
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c3d9a1f5e62'
+down_revision: Union[str, Sequence[str], None] = 'f2c4b7a91d35'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GiST operator class for the plain "venue WITH =" part of the constraint
+    op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+    op.create_table('schedule_entries',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('venue', sa.String(length=64), server_default='default', nullable=False),
+    sa.Column('playlist_id', sa.UUID(), nullable=False),
+    sa.Column('start_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('end_time', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('during', postgresql.TSTZRANGE(), sa.Computed("tstzrange(start_time, end_time, '[)')", persisted=True), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.CheckConstraint('end_time > start_time', name='ck_schedule_entries_end_after_start'),
+    postgresql.ExcludeConstraint((sa.column('venue'), '='), (sa.column('during'), '&&'), using='gist', name='ex_schedule_entries_venue_during'),
+    sa.ForeignKeyConstraint(['playlist_id'], ['playlists.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('schedule_entries')
@@ -0,0 +1,46 @@
+"""add track full-text search vector and trigram indexes
+
+Revision ID: 8b2d6f0c4e19
+Revises: 3c1f8e2a9d47
+Create Date: 2026-10-18 10:41:03.551207
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2d6f0c4e19'
+down_revision: Union[str, Sequence[str], None] = '3c1f8e2a9d47'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('simple', coalesce(artist, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(album, '')), 'C') || "
+    "setweight(to_tsvector('simple', coalesce(genre, '')), 'D')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.add_column('tracks', sa.Column('search_vector', postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR, persisted=True), nullable=True))
+    op.create_index('ix_tracks_search_vector', 'tracks', ['search_vector'], unique=False, postgresql_using='gin')
+    op.create_index('ix_tracks_title_trgm', 'tracks', ['title'], unique=False, postgresql_using='gin', postgresql_ops={'title': 'gin_trgm_ops'})
+    op.create_index('ix_tracks_artist_trgm', 'tracks', ['artist'], unique=False, postgresql_using='gin', postgresql_ops={'artist': 'gin_trgm_ops'})
+    op.create_index('ix_tracks_genre_bpm', 'tracks', ['genre', 'bpm'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_tracks_genre_bpm', table_name='tracks')
+    op.drop_index('ix_tracks_artist_trgm', table_name='tracks')
+    op.drop_index('ix_tracks_title_trgm', table_name='tracks')
+    op.drop_index('ix_tracks_search_vector', table_name='tracks')
+    op.drop_column('tracks', 'search_vector')
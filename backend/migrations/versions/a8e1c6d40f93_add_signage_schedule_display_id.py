@@ -0,0 +1,31 @@
+"""add display_id to digital_signage_schedule
+
+Revision ID: a8e1c6d40f93
+Revises: 7c3d9a1f5e62
+Create Date: 2026-10-18 18:55:09.317254
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a8e1c6d40f93'
+down_revision: Union[str, Sequence[str], None] = '7c3d9a1f5e62'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # NULL keeps existing schedules on every display
+    op.add_column('digital_signage_schedule', sa.Column('display_id', sa.String(length=64), nullable=True))
+    op.create_index('ix_digital_signage_schedule_display_id', 'digital_signage_schedule', ['display_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_digital_signage_schedule_display_id', table_name='digital_signage_schedule')
+    op.drop_column('digital_signage_schedule', 'display_id')
@@ -0,0 +1,55 @@
+"""playlist_tracks fractional rank ordering
+
+Revision ID: b61f0d8e4a72
+Revises: 5a9c3e7d2b18
+Create Date: 2026-10-18 14:35:09.684120
+
+"""
+from itertools import groupby
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from backend.ordering import keys_between
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b61f0d8e4a72'
+down_revision: Union[str, Sequence[str], None] = '5a9c3e7d2b18'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('playlist_tracks', sa.Column('rank', sa.String(collation='C'), nullable=True))
+
+    # Backfill ranks in the existing position order, one playlist at a time
+    bind = op.get_bind()
+    rows = bind.execute(sa.text(
+        "SELECT playlist_id, track_id FROM playlist_tracks ORDER BY playlist_id, position, track_id"
+    )).all()
+    update = sa.text("UPDATE playlist_tracks SET rank = :rank WHERE playlist_id = :playlist_id AND track_id = :track_id")
+    for playlist_id, group in groupby(rows, key=lambda row: row.playlist_id):
+        group = list(group)
+        bind.execute(update, [
+            {"rank": rank, "playlist_id": playlist_id, "track_id": row.track_id}
+            for rank, row in zip(keys_between(None, None, len(group)), group)
+        ])
+
+    op.alter_column('playlist_tracks', 'rank', nullable=False)
+    op.alter_column('playlist_tracks', 'position', existing_type=sa.Integer(), nullable=True)
+    op.create_index('ix_playlist_tracks_playlist_id_rank', 'playlist_tracks', ['playlist_id', 'rank'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_playlist_tracks_playlist_id_rank', table_name='playlist_tracks')
+    op.execute(
+        "UPDATE playlist_tracks p SET position = o.n FROM ("
+        "SELECT playlist_id, track_id, row_number() OVER (PARTITION BY playlist_id ORDER BY rank) AS n FROM playlist_tracks"
+        ") o WHERE p.playlist_id = o.playlist_id AND p.track_id = o.track_id"
+    )
+    op.alter_column('playlist_tracks', 'position', existing_type=sa.Integer(), nullable=False)
+    op.drop_column('playlist_tracks', 'rank')
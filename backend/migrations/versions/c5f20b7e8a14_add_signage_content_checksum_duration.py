@@ -0,0 +1,30 @@
+"""add checksum and duration to digital_signage_content
+
+Revision ID: c5f20b7e8a14
+Revises: a8e1c6d40f93
+Create Date: 2026-10-18 19:31:46.902118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5f20b7e8a14'
+down_revision: Union[str, Sequence[str], None] = 'a8e1c6d40f93'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('digital_signage_content', sa.Column('checksum', sa.String(length=64), nullable=True))
+    op.add_column('digital_signage_content', sa.Column('duration', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('digital_signage_content', 'duration')
+    op.drop_column('digital_signage_content', 'checksum')
@@ -0,0 +1,33 @@
+"""add track_votes table
+
+Revision ID: d4e7a1b93f25
+Revises: 8b2d6f0c4e19
+Create Date: 2026-10-18 11:58:21.009317
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e7a1b93f25'
+down_revision: Union[str, Sequence[str], None] = '8b2d6f0c4e19'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('track_votes',
+    sa.Column('track_id', sa.String(), nullable=False),
+    sa.Column('votes', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('track_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('track_votes')
@@ -0,0 +1,28 @@
+"""add playlists.version
+
+Revision ID: e3a8c5f17b60
+Revises: b61f0d8e4a72
+Create Date: 2026-10-18 15:20:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a8c5f17b60'
+down_revision: Union[str, Sequence[str], None] = 'b61f0d8e4a72'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('playlists', sa.Column('version', sa.Integer(), server_default='1', nullable=False))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('playlists', 'version')
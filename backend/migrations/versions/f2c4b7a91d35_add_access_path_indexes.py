@@ -0,0 +1,53 @@
+"""add secondary indexes for hot access paths
+
+Revision ID: f2c4b7a91d35
+Revises: e3a8c5f17b60
+Create Date: 2026-10-18 16:52:37.204718
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2c4b7a91d35'
+down_revision: Union[str, Sequence[str], None] = 'e3a8c5f17b60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+# (name, table, columns, extra create_index kwargs). playlist_tracks ordering
+# is served by ix_playlist_tracks_playlist_id_rank (b61f0d8e4a72) and genre/BPM
+# filters by ix_tracks_genre_bpm (8b2d6f0c4e19).
+INDEXES = [
+    # "recently played" per track and per user, newest first
+    ('ix_playback_history_track_id_played_at', 'playback_history', ['track_id', 'played_at'], {}),
+    ('ix_playback_history_user_id_played_at', 'playback_history', ['user_id', 'played_at'], {}),
+    # upcoming/active signage windows, and schedules of a content item
+    ('ix_digital_signage_schedule_start_time_end_time', 'digital_signage_schedule', ['start_time', 'end_time'], {}),
+    ('ix_digital_signage_schedule_content_id', 'digital_signage_schedule', ['content_id'], {}),
+    # a user's live sessions
+    ('ix_sessions_user_id_is_active', 'sessions', ['user_id', 'is_active'], {}),
+    # foreign keys that are looked up or cascaded from the parent side
+    ('ix_playlist_tracks_track_id', 'playlist_tracks', ['track_id'], {}),
+    ('ix_playlists_owner_id', 'playlists', ['owner_id'], {}),
+    ('ix_oauth_tokens_user_id_provider', 'oauth_tokens', ['user_id', 'provider'], {}),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY keeps playback_history and friends writable during the build;
+    # it cannot run inside the migration transaction
+    with op.get_context().autocommit_block():
+        for name, table, columns, kwargs in INDEXES:
+            op.create_index(name, table, columns, unique=False, postgresql_concurrently=True, if_not_exists=True, **kwargs)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,50 @@
+import base64
+import json
+from datetime import datetime
+from typing import Iterable, List, Optional, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import tuple_
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def encode_cursor(created_at: Optional[datetime], id) -> str:
+    """Encode the keyset position of the last row on a page as an opaque token."""
+    payload = json.dumps([created_at.isoformat() if created_at else None, id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[datetime], object]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return (datetime.fromisoformat(created_at) if created_at else None), id
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+def keyset_after(created_col, id_col, cursor: Optional[str]):
+    """
+    WHERE clause selecting rows strictly after ``cursor`` in (created_at, id) order.
+    Postgres evaluates the row comparison directly against the composite index,
+    so every page costs the same no matter how deep into the table it is.
+    """
+    if not cursor:
+        return None
+    created_at, id = decode_cursor(cursor)
+    return tuple_(created_col, id_col) > tuple_(created_at, id)
+
+
+def parse_fields(fields: Optional[str], allowed: Iterable[str]) -> Optional[List[str]]:
+    """Validate a comma separated ``fields=`` projection; ``None`` means every column."""
+    if not fields:
+        return None
+    allowed = list(allowed)
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in allowed]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # Keep the caller's order but drop duplicates
+    return list(dict.fromkeys(requested))
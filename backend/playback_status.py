@@ -0,0 +1,139 @@
+"""
+Playback status for the player control service (``backend/player-control-service``).
+
+``StatusMonitor`` emits a ``PlaybackStatus`` when playback changes state
+(play, pause, resume, seek, end, error) instead of on a timer. Each status
+carries ``(position, monotonic, rate)``, so clients advance the position
+locally from the time they received it: position + elapsed * rate. While a
+track is monitored, one background task re-sends the status, re-anchored to
+the current position, every ``heartbeat_interval`` seconds to correct drift;
+it ends when monitoring stops.
+
+The monitor does not depend on the transport: the service passes its
+Socket.IO ``emit``, ``start_background_task`` and ``sleep``.
+"""
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Optional
+
+# Seconds between status re-broadcasts while playing; clients extrapolate
+# the position in between, the heartbeat only corrects drift
+HEARTBEAT_INTERVAL = 5.0
+
+
+@dataclass
+class PlaybackStatus:
+    track_id: int
+    state: str  # playing, paused, stopped, ended, error
+    position: float  # seconds into the track at `monotonic`
+    monotonic: float  # time.monotonic() on the player host when `position` was taken
+    rate: float  # 1.0 while playing, 0.0 otherwise
+    timestamp: datetime
+    error: Optional[str] = None
+
+    def position_at(self, monotonic_now: float) -> float:
+        """Where playback is at ``monotonic_now``, extrapolated from this status."""
+        return self.position + max(0.0, monotonic_now - self.monotonic) * self.rate
+
+    def to_dict(self) -> dict:
+        return {**self.__dict__, "timestamp": self.timestamp.isoformat()}
+
+
+def _start_thread(fn: Callable):
+    thread = threading.Thread(target=fn, daemon=True)
+    thread.start()
+    return thread
+
+
+class StatusMonitor:
+    """Tracks the playing track's status and emits it on every transition."""
+
+    def __init__(self, emit: Callable[[dict], None], heartbeat_interval: float = HEARTBEAT_INTERVAL,
+                 start_task: Callable = _start_thread, sleep: Callable[[float], None] = time.sleep):
+        self.current_status: Optional[PlaybackStatus] = None
+        self.heartbeat_interval = heartbeat_interval
+        self._emit_status = emit
+        self._start_task = start_task
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self.heartbeat_running = False
+        # Bumped on every new track so a watcher of an old process stays quiet
+        self.generation = 0
+
+    def _emit(self):
+        status = self.current_status
+        if status:
+            self._emit_status(status.to_dict())
+
+    def _transition(self, state: str, position: Optional[float] = None, error: Optional[str] = None) -> Optional[PlaybackStatus]:
+        with self._lock:
+            status = self.current_status
+            if status is None:
+                return None
+            now = time.monotonic()
+            status.position = status.position_at(now) if position is None else position
+            status.monotonic = now
+            status.timestamp = datetime.now()
+            status.state = state
+            status.rate = 1.0 if state == "playing" else 0.0
+            status.error = error
+        self._emit()
+        return status
+
+    def start_monitoring(self, track_id, position: float = 0.0, state: str = "playing") -> int:
+        """Start reporting ``track_id`` in ``state`` (``paused`` for a seek while paused)."""
+        with self._lock:
+            self.generation += 1
+            self.current_status = PlaybackStatus(
+                track_id=track_id,
+                state=state,
+                position=position,
+                monotonic=time.monotonic(),
+                rate=1.0 if state == "playing" else 0.0,
+                timestamp=datetime.now(),
+            )
+            start_heartbeat = not self.heartbeat_running
+            self.heartbeat_running = True
+            generation = self.generation
+        self._emit()
+        if start_heartbeat:
+            self._start_task(self._heartbeat_loop)
+        return generation
+
+    def pause(self):
+        return self._transition("paused")
+
+    def resume(self):
+        return self._transition("playing")
+
+    def seek(self, position: float):
+        status = self.current_status
+        return self._transition(status.state if status else "playing", position=position)
+
+    def ended(self, generation: int, error: Optional[str] = None):
+        """Called when the player process of ``generation`` exits."""
+        if generation == self.generation:
+            self._transition("error" if error else "ended", error=error)
+
+    def stop_monitoring(self):
+        """Emit ``stopped`` and forget the track; the heartbeat ends at its next wake-up."""
+        self._transition("stopped")
+        with self._lock:
+            self.generation += 1
+            self.current_status = None
+
+    def _heartbeat_loop(self):
+        while True:
+            self._sleep(self.heartbeat_interval)
+            with self._lock:
+                status = self.current_status
+                if status is None:
+                    # Cleared under the lock, so a track started from here on
+                    # starts a new heartbeat
+                    self.heartbeat_running = False
+                    return
+            if status.state == "playing":
+                # Re-anchored to now: clients take the position as of receipt
+                self._transition("playing")
@@ -7,11 +7,10 @@ import os
 import signal
 import time
 import logging
-import threading
-from dataclasses import dataclass
 from datetime import datetime
 from backend.infrastructure.database import db
 from backend.models import Media
+from backend.playback_status import StatusMonitor
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -22,50 +21,16 @@ app.config['SECRET_KEY'] = 'your-secret-key-here'
 CORS(app, resources={r"/socket.io/*": {"origins": "*"}})
 socketio = SocketIO(app, cors_allowed_origins="*")
 
-@dataclass
-class PlaybackStatus:
-    track_id: int
-    state: str
-    position: float
-    timestamp: datetime
-    error: str = None
-
-class StatusMonitor:
-    def __init__(self):
-        self.current_status = None
-        self._monitor_thread = None
-        self._should_run = False
-        
-    def start_monitoring(self, track_id):
-        self.stop_monitoring()  # Stop any existing monitoring
-        self.current_status = PlaybackStatus(
-            track_id=track_id,
-            state='playing',
-            position=0,
-            timestamp=datetime.now()
-        )
-        self._should_run = True
-        self._monitor_thread = threading.Thread(target=self._monitor_loop)
-        self._monitor_thread.daemon = True  # Thread will exit when main thread exits
-        self._monitor_thread.start()
-        
-    def stop_monitoring(self):
-        self._should_run = False
-        if self._monitor_thread and self._monitor_thread.is_alive():
-            self._monitor_thread.join(timeout=1.0)
-        self.current_status = None
-        
-    def _monitor_loop(self):
-        while self._should_run:
-            if self.current_status:
-                # Update position based on elapsed time
-                elapsed = (datetime.now() - self.current_status.timestamp).total_seconds()
-                self.current_status.position = elapsed
-                socketio.emit('playback_status', self.current_status.__dict__)
-            time.sleep(0.5)
+# Seconds between status re-broadcasts while playing (see backend.playback_status)
+HEARTBEAT_INTERVAL = float(os.getenv('PLAYER_STATUS_HEARTBEAT', '5'))
 
 # Initialize the status monitor
-status_monitor = StatusMonitor()
+status_monitor = StatusMonitor(
+    emit=lambda status: socketio.emit('playback_status', status),
+    heartbeat_interval=HEARTBEAT_INTERVAL,
+    start_task=socketio.start_background_task,
+    sleep=socketio.sleep
+)
 
 # Global variables to track playback state
 current_processes = {
@@ -77,14 +42,15 @@ current_track = None
 def cleanup_processes():
     """Safely cleanup running processes."""
     global current_processes
-    for process_name, process in current_processes.items():
+    # Detach first so the exit watchers know these were stopped on purpose
+    processes, current_processes = current_processes, {'ffmpeg': None, 'mpg123': None}
+    for process_name, process in processes.items():
         if process and process.poll() is None:
             try:
                 process.terminate()
                 process.wait(timeout=5)
             except subprocess.TimeoutExpired:
                 process.kill()
-    current_processes = {'ffmpeg': None, 'mpg123': None}
 
 def get_process_status(process):
     """Get the status of the current media playback process."""
@@ -95,11 +61,53 @@ def get_process_status(process):
         }
     return {'status': 'stopped', 'pid': None}
 
+def start_pipeline(track_path, position=0.0, paused=False):
+    """
+    Start FFmpeg decoding `track_path` from `position` seconds, piped into mpg123.
+
+    When `paused`, each process is stopped as soon as it is spawned: FFmpeg
+    before mpg123 exists to play anything it writes, so nothing is heard.
+    """
+    global current_processes
+    ffmpeg_process = subprocess.Popen(
+        ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-ss', str(position), '-i', track_path, '-f', 'wav', '-'],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE
+    )
+    if paused:
+        os.kill(ffmpeg_process.pid, signal.SIGSTOP)
+    mpg_process = subprocess.Popen(
+        ['mpg123', '-'],
+        stdin=ffmpeg_process.stdout
+    )
+    if paused:
+        os.kill(mpg_process.pid, signal.SIGSTOP)
+    current_processes = {
+        'ffmpeg': ffmpeg_process,
+        'mpg123': mpg_process
+    }
+    return mpg_process
+
+def watch_process(process, generation):
+    """Block until the player process exits and report the end of the track (no polling)."""
+    returncode = process.wait()
+    if current_processes['mpg123'] is process:
+        status_monitor.ended(generation, error=f"mpg123 exited with status {returncode}" if returncode else None)
+
+def start_playback(track_path, position=0.0, paused=False):
+    track_id = current_track['id']
+    # The pipeline is in its initial state before the first status goes out
+    mpg_process = start_pipeline(track_path, position, paused=paused)
+    generation = status_monitor.start_monitoring(track_id, position=position, state='paused' if paused else 'playing')
+    socketio.start_background_task(watch_process, mpg_process, generation)
+
 @socketio.on('connect')
 def on_connect():
     """Handle client connection event."""
     print('Client connected')
     emit('status_update', {'status': 'ready'})
+    if status_monitor.current_status:
+        emit('playback_status', status_monitor.current_status.to_dict())
 
 @socketio.on('play')
 def play_command(data):
@@ -109,72 +117,48 @@ def play_command(data):
         cleanup_processes()  # Ensure no zombie processes
         if 'track_id' not in data:
             raise ValueError("track_id is required")
-        
-        # Start monitoring before playback
-        status_monitor.start_monitoring(data['track_id'])
-                
-            # Get the track from the database
-            track = Media.query.get(data['track_id'])
-            if not track:
-                raise ValueError("Track not found")
-                
-            # Set up the track path
-            track_path = os.path.join('uploads', track.file_path)
-            
-            # Start FFmpeg process to pipe audio to mpg123
-            ffmpeg_process = subprocess.Popen(
-                ['ffmpeg', '-hide_banner', '-loglevel', 'error', '-i', track_path, '-f', 'wav', '-'],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE
-            )
-            
-            # Start mpg123 process to play the audio
-            mpg_process = subprocess.Popen(
-                ['mpg123', '-'],
-                stdin=ffmpeg_process.stdout
-            )
-            
-            # Store the processes and current track
-            current_processes = {
-                'ffmpeg': ffmpeg_process,
-                'mpg123': mpg_process
-            }
-            current_track = {
-                'id': track.id,
-                'title': track.title,
-                'artist': track.artist,
-                'duration': track.duration,
-                'file_path': track.file_path
-            }
-            
-            # Emit immediate confirmation
-            emit('command_response', {'status': 'success', 'message': 'Playback started'})
-            
-            # Start background status monitoring
-            def monitor_processes():
-                while True:
-                    ffmpeg_status = get_process_status(current_processes['ffmpeg'])
-                    mpg_status = get_process_status(current_processes['mpg123'])
-                    status = {
-                        'ffmpeg': ffmpeg_status,
-                        'mpg123': mpg_status
-                    }
-                    emit('status_update', status)
-                    if ffmpeg_status['status'] == 'stopped' and mpg_status['status'] == 'stopped':
-                        break
-                    time.sleep(0.5)
-            
-            thread = threading.Thread(target=monitor_processes)
-            thread.start()
-            
-            return jsonify({'status': 'success', 'message': 'Track is now playing', 'track': current_track})
-        else:
-            return jsonify({'status': 'error', 'message': 'Already playing'})
+
+        # Get the track from the database
+        track = Media.query.get(data['track_id'])
+        if not track:
+            raise ValueError("Track not found")
+
+        current_track = {
+            'id': track.id,
+            'title': track.title,
+            'artist': track.artist,
+            'duration': track.duration,
+            'file_path': track.file_path
+        }
+        # Emits the `playing` status and watches for the end of the track
+        start_playback(os.path.join('uploads', track.file_path))
+
+        # Emit immediate confirmation
+        emit('command_response', {'status': 'success', 'message': 'Playback started'})
+        return jsonify({'status': 'success', 'message': 'Track is now playing', 'track': current_track})
     except Exception as e:
         logger.error(f"Error handling play command: {e}")
         emit('command_response', {'status': 'error', 'message': str(e)})
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+@socketio.on('seek')
+def seek_command(data):
+    """Handle seek command from client: restart decoding at the requested position."""
+    global current_track
+    try:
+        if not current_track:
+            return jsonify({'status': 'error', 'message': 'No track is currently playing'})
+        position = max(0.0, float(data['position']))
+        paused = status_monitor.current_status and status_monitor.current_status.state == 'paused'
+        cleanup_processes()
+        start_playback(os.path.join('uploads', current_track['file_path']), position, paused=bool(paused))
+        emit('command_response', {'status': 'success', 'message': f'Seeked to {position}'})
+        return jsonify({'status': 'success', 'message': f'Seeked to {position}'})
+    except Exception as e:
+        logger.error(f"Error handling seek command: {e}")
+        emit('command_response', {'status': 'error', 'message': str(e)})
+        return jsonify({'status': 'error', 'message': str(e)}), 500
+
 @socketio.on('pause')
 def pause_command():
     """Handle pause command from client."""
@@ -185,6 +169,7 @@ def pause_command():
             os.kill(current_processes['ffmpeg'].pid, signal.SIGSTOP)
             if current_processes['mpg123']:
                 os.kill(current_processes['mpg123'].pid, signal.SIGSTOP)
+            status_monitor.pause()
             emit('command_response', {'status': 'success', 'message': 'Playback paused'})
             return jsonify({'status': 'success', 'message': 'Playback paused'})
         else:
@@ -204,6 +189,7 @@ def resume_command():
             os.kill(current_processes['ffmpeg'].pid, signal.SIGCONT)
             if current_processes['mpg123']:
                 os.kill(current_processes['mpg123'].pid, signal.SIGCONT)
+            status_monitor.resume()
             emit('command_response', {'status': 'success', 'message': 'Playback resumed'})
             return jsonify({'status': 'success', 'message': 'Playback resumed'})
         else:
@@ -256,6 +242,7 @@ def skip_command():
                 play_command({'track_id': next_track.id})
                 return jsonify({'status': 'success', 'message': 'Skipped to next track', 'track': next_track})
             else:
+                status_monitor.stop_monitoring()
                 emit('command_response', {'status': 'success', 'message': 'No more tracks in playlist'})
                 return jsonify({'status': 'success', 'message': 'No more tracks in playlist'})
         else:
@@ -280,7 +267,7 @@ def health_check():
         'timestamp': datetime.now().isoformat(),
         'playback': {
             'active': bool(current_track),
-            'status': status_monitor.current_status.__dict__ if status_monitor.current_status else None
+            'status': status_monitor.current_status.to_dict() if status_monitor.current_status else None
         }
     })
 
@@ -295,6 +282,7 @@ def handle_disconnect():
     """Handle client disconnection."""
     logger.info('Client disconnected')
     cleanup_processes()  # Ensure cleanup on disconnect
+    status_monitor.stop_monitoring()
 
 if __name__ == '__main__':
     socketio.run(app, debug=True)
\ No newline at end of file
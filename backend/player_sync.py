@@ -0,0 +1,223 @@
+"""
+State sync for ``/ws/player``: one snapshot, then sequenced deltas.
+
+Every message this worker sends on the ``player`` channel passes through
+``PlayerSync.sequence``, which stamps it with the worker's ``epoch`` and the
+next ``seq`` and keeps it in a bounded replay log. The stamp is spliced onto
+the message's JSON, so broadcasts are still encoded once.
+
+A client connecting without a position gets
+``{"type": "snapshot", "epoch", "seq", "playback", "queue"}`` and then every
+delta after ``seq``. A client reconnecting with ``?epoch=<epoch>&seq=<seq>``
+gets ``{"type": "resumed", "epoch", "seq"}`` followed by just the deltas it
+missed, as long as they are still in the log; otherwise (log overrun, or a
+different worker or restart, i.e. another epoch) it gets a snapshot. A
+client that sees a gap in ``seq`` (its send queue overflowed) sends
+``{"type": "resume", "epoch", "seq"}`` on the open socket, or
+``{"type": "snapshot"}`` to start over. A request answered while the
+previous answer is still queued replaces it (see ``ConnectionManager``).
+
+Deltas carry absolute values, so applying one twice is harmless; see
+``apply_message`` for the client-side rules. Sequence numbers are per worker
+process: playback state is per worker, and queue changes made on other
+workers arrive through the fan-out and are sequenced by each worker as they
+are delivered.
+"""
+import logging
+import os
+import uuid
+from collections import deque
+from itertools import islice
+from typing import Awaitable, Callable, Deque, List, Optional
+
+from fastapi import WebSocket, WebSocketDisconnect
+
+from backend.serialization import loads, unpackb
+from backend.websocket_manager import JSON_ENCODING, Frame, event_handler, negotiate_encoding
+
+logger = logging.getLogger(__name__)
+
+REPLAY_LOG_SIZE = int(os.getenv("PLAYER_SYNC_REPLAY_LOG", "1024"))
+CLIENT_TYPE = "player"
+
+StateLoader = Callable[[], Awaitable[dict]]
+
+
+class PlayerSync:
+    """Sequences the ``player`` channel and greets its sockets with a snapshot or a replay."""
+
+    def __init__(self, manager=None, log_size: int = REPLAY_LOG_SIZE, client_type: str = CLIENT_TYPE):
+        self.manager = manager or event_handler.manager
+        self.client_type = client_type
+        self.epoch = uuid.uuid4().hex[:12]
+        self.seq = 0
+        self._log: Deque[Frame] = deque(maxlen=log_size)
+        self.stats = {"snapshots": 0, "resumes": 0, "resume_misses": 0}
+        self.manager.sequencers[client_type] = self.sequence
+
+    def sequence(self, frame: Frame) -> Frame:
+        """Stamp a broadcast with the next sequence number and log it for replay."""
+        self.seq += 1
+        text = frame.encoded(JSON_ENCODING)
+        stamp = f'{{"epoch":"{self.epoch}","seq":{self.seq}'
+        if text.startswith("{"):
+            text = stamp + ("}" if text == "{}" else "," + text[1:])
+        else:
+            text = f'{stamp},"message":{text}}}'
+        sequenced = Frame.from_json(text)
+        self._log.append(sequenced)
+        return sequenced
+
+    def replay(self, since: int) -> Optional[List[Frame]]:
+        """The logged deltas after ``since``, or None when some of them have left the log."""
+        missing = self.seq - since
+        if missing < 0 or missing > len(self._log):
+            return None
+        return list(islice(self._log, len(self._log) - missing, None))
+
+    def _resume_point(self, epoch, seq) -> Optional[int]:
+        if epoch != self.epoch:
+            return None
+        try:
+            return int(seq)
+        except (TypeError, ValueError):
+            return None
+
+    def _greeting(self, seq: int, state: Optional[dict] = None) -> Optional[List]:
+        """A snapshot of ``state`` as of ``seq`` (or a resume marker) and the deltas after it; None if they left the log."""
+        frames = self.replay(seq)
+        if frames is None:
+            return None
+        if state is not None:
+            head = {"type": "snapshot", "epoch": self.epoch, "seq": seq, **state}
+        else:
+            head = {"type": "resumed", "epoch": self.epoch, "seq": seq}
+        return [head, *frames]
+
+    async def _load(self, load_state: StateLoader) -> tuple:
+        # Deltas logged while the state is read are replayed on top of it;
+        # they carry absolute values, so one it already reflects does no harm
+        seq = self.seq
+        return seq, await load_state()
+
+    async def _snapshot(self, load_state: StateLoader) -> List:
+        while True:
+            frames = self._greeting(*await self._load(load_state))
+            if frames is not None:
+                self.stats["snapshots"] += 1
+                return frames
+
+    async def _resync(self, websocket: WebSocket, since: Optional[int], load_state: StateLoader):
+        frames = self._greeting(since) if since is not None else None
+        if frames is not None:
+            self.stats["resumes"] += 1
+        else:
+            if since is not None:
+                self.stats["resume_misses"] += 1
+            frames = await self._snapshot(load_state)
+        await self.manager.send_all(websocket, frames)
+
+    async def serve(self, websocket: WebSocket, load_state: StateLoader):
+        """Run one ``/ws/player`` connection: greet it with a snapshot or a resume, then answer its requests."""
+        encoding, subprotocol = negotiate_encoding(websocket)
+        since = self._resume_point(websocket.query_params.get("epoch"), websocket.query_params.get("seq"))
+        loaded = None
+        if since is None or self.replay(since) is None:
+            if since is not None:
+                self.stats["resume_misses"] += 1
+            loaded = await self._load(load_state)
+        greeted = None
+
+        def greeting():
+            # Runs right after the handshake and before the socket is
+            # registered, so no delta can fall between the two
+            nonlocal greeted
+            greeted = self._greeting(*loaded) if loaded else self._greeting(since)
+            return greeted or []
+
+        await self.manager.connect(websocket, self.client_type, encoding, subprotocol, greeting=greeting)
+        if greeted is None:
+            # The log overran during the handshake
+            await self.manager.send_all(websocket, await self._snapshot(load_state))
+        else:
+            self.stats["snapshots" if loaded else "resumes"] += 1
+        try:
+            while True:
+                received = await websocket.receive()
+                if received["type"] == "websocket.disconnect":
+                    break
+                request = self._decode(received)
+                if request is None:
+                    continue
+                if request.get("type") == "resume":
+                    await self._resync(websocket, self._resume_point(request.get("epoch"), request.get("seq")), load_state)
+                elif request.get("type") == "snapshot":
+                    await self._resync(websocket, None, load_state)
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self.manager.disconnect(websocket, self.client_type)
+
+    @staticmethod
+    def _decode(received: dict) -> Optional[dict]:
+        try:
+            if received.get("text") is not None:
+                request = loads(received["text"])
+            elif received.get("bytes") is not None and unpackb is not None:
+                request = unpackb(received["bytes"])
+            else:
+                return None
+        except Exception:
+            return None
+        return request if isinstance(request, dict) else None
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "epoch": self.epoch, "seq": self.seq, "logged": len(self._log)}
+
+
+def _apply_queue(queue: List[dict], upserted: List[dict], removed: List[str]) -> List[dict]:
+    previous = {item["track_id"]: item for item in queue}
+    changed = {item["track_id"] for item in upserted} | set(removed)
+    result = [item for item in queue if item["track_id"] not in changed]
+    for item in sorted(upserted, key=lambda item: item["position"]):
+        merged = {**previous.get(item["track_id"], {"votes": 0}), **item}
+        result.insert(min(item["position"] - 1, len(result)), merged)
+    return [{**item, "position": i + 1} for i, item in enumerate(result)]
+
+
+def apply_message(state: dict, message: dict) -> dict:
+    """
+    Reference client: fold one server message into ``state``.
+
+    ``state`` holds ``epoch``, ``seq``, ``playback`` and ``queue``. A delta
+    whose ``seq`` is not the next one is ignored if it is old, and marks the
+    state ``gap`` (time to send ``resume``) if it is ahead. Queue deltas list
+    absolute ``{track_id, votes, position}`` items: every changed or removed
+    track is taken out, then the changed ones are reinserted in position
+    order.
+    """
+    kind = message.get("type")
+    if kind == "snapshot":
+        return {
+            "epoch": message["epoch"], "seq": message["seq"], "gap": False,
+            "playback": dict(message["playback"]), "queue": list(message["queue"]),
+        }
+    if kind == "resumed" or "seq" not in message:
+        return state
+    if message["epoch"] != state.get("epoch") or message["seq"] > state["seq"] + 1:
+        return {**state, "gap": True}
+    if message["seq"] <= state["seq"]:
+        return state
+    state = {**state, "seq": message["seq"]}
+    if kind == "playback":
+        state["playback"] = {**state["playback"], **message["changes"]}
+    elif kind == "queue_update":
+        state["queue"] = _apply_queue(state["queue"], message.get("upserted", []), message.get("removed", []))
+    elif kind == "queue_votes":
+        state["queue"] = _apply_queue(state["queue"], message["changes"], [])
+    elif kind == "schedule_transition" and message.get("venue") == "default":
+        state["playback"] = {**state["playback"], "active_playlist_id": message["playlist_id"], "schedule_entry_id": message["entry_id"]}
+    return state
+
+
+player_sync = PlayerSync()
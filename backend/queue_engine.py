@@ -0,0 +1,192 @@
+from typing import List, Optional
+
+from backend.infrastructure.database import redis_client
+
+# Queue order lives in one sorted set. A member's score is
+#     -votes * VOTE_WEIGHT + enqueue_seq
+# so more votes sort first and ties fall back to first-come-first-served.
+# enqueue_seq comes from INCR, so it is unique and monotonic across workers;
+# 2**32 enqueues per vote step keeps every score exact in a double.
+VOTE_WEIGHT = 2 ** 32
+
+QUEUE_KEY = "queue:items"
+VOTES_KEY = "queue:votes"
+SEQ_KEY = "queue:seq"
+
+# Positions are never stored; they are ranks in the sorted set, so two phones
+# adding at the same moment can never be handed the same position.
+_ADD = """
+if redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return {0, redis.call('ZRANK', KEYS[1], ARGV[1]) + 1}
+end
+local seq = redis.call('INCR', KEYS[3])
+redis.call('ZADD', KEYS[1], seq, ARGV[1])
+redis.call('HSET', KEYS[2], ARGV[1], 0)
+return {1, redis.call('ZRANK', KEYS[1], ARGV[1]) + 1}
+"""
+
+_VOTE = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return false
+end
+local delta = tonumber(ARGV[2])
+redis.call('ZINCRBY', KEYS[1], -delta * tonumber(ARGV[3]), ARGV[1])
+local votes = redis.call('HINCRBY', KEYS[2], ARGV[1], delta)
+return {votes, redis.call('ZRANK', KEYS[1], ARGV[1]) + 1}
+"""
+
+# Applies a batch of (track_id, delta) pairs in one round trip and reports
+# the new votes and position of every track that is still queued.
+_VOTE_MANY = """
+local changes = {}
+for i = 1, #ARGV - 1, 2 do
+    local track_id = ARGV[i]
+    local delta = tonumber(ARGV[i + 1])
+    if redis.call('ZSCORE', KEYS[1], track_id) then
+        redis.call('ZINCRBY', KEYS[1], -delta * tonumber(ARGV[#ARGV]), track_id)
+        redis.call('HINCRBY', KEYS[2], track_id, delta)
+    end
+end
+for i = 1, #ARGV - 1, 2 do
+    local rank = redis.call('ZRANK', KEYS[1], ARGV[i])
+    if rank then
+        table.insert(changes, {ARGV[i], redis.call('HGET', KEYS[2], ARGV[i]), rank + 1})
+    end
+end
+return changes
+"""
+
+_REMOVE = """
+redis.call('HDEL', KEYS[2], ARGV[1])
+return redis.call('ZREM', KEYS[1], ARGV[1])
+"""
+
+_POP = """
+local head = redis.call('ZPOPMIN', KEYS[1])
+if #head == 0 then
+    return false
+end
+local votes = redis.call('HGET', KEYS[2], head[1]) or 0
+redis.call('HDEL', KEYS[2], head[1])
+return {head[1], votes}
+"""
+
+# Moves a track to a 1-based position by giving it a score between its new
+# neighbours. Its vote offset is kept in the score, so later votes still move
+# it relative to where it was placed. Repeated moves between the same two
+# neighbours halve the gap each time; once a midpoint no longer fits between
+# them in a double, the queue is respaced to whole-number scores (each at
+# least one above the last, an O(n) pass that only a collapsed gap triggers).
+_MOVE = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return false
+end
+redis.call('ZREM', KEYS[1], ARGV[1])
+local size = redis.call('ZCARD', KEYS[1])
+local pos = math.max(1, math.min(tonumber(ARGV[2]), size + 1))
+local before = pos > 1 and tonumber(redis.call('ZRANGE', KEYS[1], pos - 2, pos - 2, 'WITHSCORES')[2])
+local after = pos <= size and tonumber(redis.call('ZRANGE', KEYS[1], pos - 1, pos - 1, 'WITHSCORES')[2])
+local score
+if before and after then
+    score = (before + after) / 2
+    if score <= before or score >= after then
+        local members = redis.call('ZRANGE', KEYS[1], 0, -1, 'WITHSCORES')
+        local previous
+        local function place(member, old, moved)
+            local new = math.floor(old)
+            if previous and new <= previous then
+                new = previous + 1
+            end
+            if moved or new ~= old then
+                redis.call('ZADD', KEYS[1], new, member)
+            end
+            previous = new
+        end
+        for i = 1, #members, 2 do
+            if (i + 1) / 2 == pos then
+                place(ARGV[1], before, true)
+            end
+            place(members[i], tonumber(members[i + 1]), false)
+        end
+        return pos
+    end
+elseif before then
+    score = before + 1
+elseif after then
+    score = after - 1
+else
+    score = 0
+end
+redis.call('ZADD', KEYS[1], score, ARGV[1])
+return redis.call('ZRANK', KEYS[1], ARGV[1]) + 1
+"""
+
+
+class RequestQueue:
+    """
+    Vote-ordered jukebox request queue shared by every worker through Redis.
+
+    Add, vote, remove, move and pop are single Lua scripts, so each is atomic
+    and O(log n) in the queue length. Only listing the whole queue is O(n).
+    """
+
+    def __init__(self, redis=redis_client, queue_key: str = QUEUE_KEY, votes_key: str = VOTES_KEY, seq_key: str = SEQ_KEY):
+        self.redis = redis
+        self.keys = [queue_key, votes_key, seq_key]
+        self._add = redis.register_script(_ADD)
+        self._vote = redis.register_script(_VOTE)
+        self._vote_many = redis.register_script(_VOTE_MANY)
+        self._remove = redis.register_script(_REMOVE)
+        self._pop = redis.register_script(_POP)
+        self._move = redis.register_script(_MOVE)
+
+    async def add(self, track_id: str) -> Optional[int]:
+        """Enqueue a track; returns its position, or None if it was already queued."""
+        added, position = await self._add(keys=self.keys, args=[track_id])
+        return int(position) if added else None
+
+    async def vote(self, track_id: str, delta: int = 1) -> Optional[tuple]:
+        """Apply ``delta`` votes; returns ``(votes, position)`` or None if not queued."""
+        result = await self._vote(keys=self.keys, args=[track_id, delta, VOTE_WEIGHT])
+        return (int(result[0]), int(result[1])) if result else None
+
+    async def vote_many(self, deltas: dict) -> List[dict]:
+        """Apply ``{track_id: delta}`` atomically; returns the new votes/position of each queued track."""
+        if not deltas:
+            return []
+        args = [arg for track_id, delta in deltas.items() for arg in (track_id, delta)]
+        changes = await self._vote_many(keys=self.keys, args=args + [VOTE_WEIGHT])
+        return [
+            {"track_id": track_id, "votes": int(votes), "position": int(position)}
+            for track_id, votes, position in changes
+        ]
+
+    async def remove(self, track_id: str) -> bool:
+        return bool(await self._remove(keys=self.keys, args=[track_id]))
+
+    async def move(self, track_id: str, position: int) -> Optional[int]:
+        result = await self._move(keys=self.keys, args=[track_id, position])
+        return int(result) if result else None
+
+    async def pop_next(self) -> Optional[dict]:
+        result = await self._pop(keys=self.keys, args=[])
+        if not result:
+            return None
+        return {"track_id": result[0], "votes": int(result[1])}
+
+    async def position(self, track_id: str) -> Optional[int]:
+        rank = await self.redis.zrank(self.keys[0], track_id)
+        return None if rank is None else rank + 1
+
+    async def items(self) -> List[dict]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zrange(self.keys[0], 0, -1)
+            pipe.hgetall(self.keys[1])
+            track_ids, votes = await pipe.execute()
+        return [
+            {"track_id": track_id, "position": i + 1, "votes": int(votes.get(track_id, 0))}
+            for i, track_id in enumerate(track_ids)
+        ]
+
+
+request_queue = RequestQueue()
@@ -0,0 +1,193 @@
+import logging
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+
+from sqlalchemy.future import select
+
+from backend.infrastructure.models import PlaylistScheduleEntry
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_VENUE = "default"
+ENTRY_FIELDS = ("id", "venue", "playlist_id", "start_time", "end_time", "description")
+
+
+def as_utc(value: datetime) -> datetime:
+    """Schedule times are compared as aware UTC datetimes; naive input is taken to be UTC."""
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def _normalize(entry: dict) -> dict:
+    # The table's ids are UUID columns; the API and the index use strings
+    return {
+        **entry,
+        "id": str(entry["id"]),
+        "playlist_id": str(entry["playlist_id"]),
+        "start_time": as_utc(entry["start_time"]),
+        "end_time": as_utc(entry["end_time"]),
+    }
+
+
+class _Timeline:
+    """One venue's entries, sorted by start, with a parallel list of start times to bisect."""
+
+    __slots__ = ("starts", "entries")
+
+    def __init__(self):
+        self.starts: List[datetime] = []
+        self.entries: List[dict] = []
+
+
+class ScheduleIndex:
+    """
+    In-memory mirror of ``schedule_entries`` answering "what plays at T" and
+    "what overlaps this window" per venue.
+
+    Postgres enforces that a venue's ``[start_time, end_time)`` ranges never
+    overlap (GiST exclusion constraint on the ``during`` tstzrange), so each
+    venue's entries are disjoint intervals and sorting them by start also
+    sorts them by end. That makes a sorted list an interval index: a point or
+    window lookup is one bisect (O(log n)) plus the k matches, and an insert
+    or delete is a bisect and a list splice.
+
+    Each worker loads the table at startup and ``backend.schedule_sync``
+    applies every worker's writes to every index; the exclusion constraint
+    remains the arbiter for writes that race across workers. Listeners are
+    called with a venue name whenever that venue's entries change
+    (``backend.scheduler_runtime`` re-arms its timer there).
+    """
+
+    def __init__(self):
+        self._venues: Dict[str, _Timeline] = {}
+        self._by_id: Dict[str, dict] = {}
+        self._listeners: List[Callable[[str], None]] = []
+
+    def add_listener(self, listener: Callable[[str], None]):
+        self._listeners.append(listener)
+
+    def remove_listener(self, listener: Callable[[str], None]):
+        self._listeners.remove(listener)
+
+    def _changed(self, venue: str):
+        for listener in list(self._listeners):
+            listener(venue)
+
+    def __len__(self):
+        return len(self._by_id)
+
+    def __contains__(self, entry_id):
+        return str(entry_id) in self._by_id
+
+    def _position(self, timeline: _Timeline, entry: dict) -> int:
+        lo = bisect_left(timeline.starts, entry["start_time"])
+        hi = bisect_right(timeline.starts, entry["start_time"], lo)
+        for i in range(lo, hi):
+            if timeline.entries[i]["id"] == entry["id"]:
+                return i
+        return -1
+
+    def build(self, entries):
+        """Replace the index contents from an iterable of entry dicts (see ``ENTRY_FIELDS``)."""
+        previous = set(self._venues)
+        self._venues, self._by_id = {}, {}
+        for entry in sorted(map(_normalize, entries), key=lambda e: e["start_time"]):
+            timeline = self._venues.setdefault(entry["venue"], _Timeline())
+            timeline.starts.append(entry["start_time"])
+            timeline.entries.append(entry)
+            self._by_id[entry["id"]] = entry
+        for venue in sorted(previous | set(self._venues)):
+            self._changed(venue)
+
+    def add(self, entry: dict) -> dict:
+        """Insert an entry, replacing any entry with the same id (an update may move it in time or venue)."""
+        entry = _normalize(entry)
+        self.remove(entry["id"])
+        timeline = self._venues.setdefault(entry["venue"], _Timeline())
+        i = bisect_right(timeline.starts, entry["start_time"])
+        timeline.starts.insert(i, entry["start_time"])
+        timeline.entries.insert(i, entry)
+        self._by_id[entry["id"]] = entry
+        self._changed(entry["venue"])
+        return entry
+
+    def remove(self, entry_id) -> Optional[dict]:
+        entry = self._by_id.pop(str(entry_id), None)
+        if entry is None:
+            return None
+        timeline = self._venues[entry["venue"]]
+        i = self._position(timeline, entry)
+        if i >= 0:
+            del timeline.starts[i]
+            del timeline.entries[i]
+        if not timeline.entries:
+            del self._venues[entry["venue"]]
+        self._changed(entry["venue"])
+        return entry
+
+    def remove_playlist(self, playlist_id) -> List[dict]:
+        """Drop every entry of a deleted playlist (the rows were removed by the FK cascade)."""
+        playlist_id = str(playlist_id)
+        return [self.remove(entry["id"]) for entry in list(self._by_id.values()) if entry["playlist_id"] == playlist_id]
+
+    def get(self, entry_id) -> Optional[dict]:
+        return self._by_id.get(str(entry_id))
+
+    def venues(self) -> List[str]:
+        return sorted(self._venues)
+
+    def entries(self, venue: Optional[str] = None) -> List[dict]:
+        """All entries of a venue (or of every venue) in start order."""
+        if venue is not None:
+            timeline = self._venues.get(venue)
+            return list(timeline.entries) if timeline else []
+        return sorted(self._by_id.values(), key=lambda e: (e["start_time"], e["venue"]))
+
+    def at(self, venue: str, when: datetime) -> Optional[dict]:
+        """The entry playing at ``when``, if any."""
+        timeline = self._venues.get(venue)
+        if timeline is None:
+            return None
+        when = as_utc(when)
+        i = bisect_right(timeline.starts, when) - 1
+        if i >= 0 and timeline.entries[i]["end_time"] > when:
+            return timeline.entries[i]
+        return None
+
+    def overlapping(self, venue: str, start: datetime, end: datetime) -> List[dict]:
+        """Entries whose ``[start_time, end_time)`` intersects ``[start, end)``, in start order."""
+        timeline = self._venues.get(venue)
+        if timeline is None:
+            return []
+        start, end = as_utc(start), as_utc(end)
+        # Only the last entry starting at or before ``start`` can reach into the window
+        i = bisect_right(timeline.starts, start) - 1
+        if i < 0 or timeline.entries[i]["end_time"] <= start:
+            i += 1
+        j = bisect_left(timeline.starts, end, i)
+        return timeline.entries[i:j]
+
+    def conflicts(self, venue: str, start: datetime, end: datetime, exclude_id=None) -> List[dict]:
+        return [entry for entry in self.overlapping(venue, start, end) if entry["id"] != exclude_id]
+
+    def next_after(self, venue: str, when: datetime) -> Optional[dict]:
+        """The first entry of a venue starting after ``when``."""
+        timeline = self._venues.get(venue)
+        if timeline is None:
+            return None
+        i = bisect_right(timeline.starts, as_utc(when))
+        return timeline.entries[i] if i < len(timeline.entries) else None
+
+    async def load(self, session_factory):
+        """Build the index from the schedule_entries table."""
+        columns = [getattr(PlaylistScheduleEntry, name) for name in ENTRY_FIELDS]
+        async with session_factory() as db:
+            result = await db.execute(select(*columns))
+            rows = [dict(row._mapping) for row in result]
+        self.build(rows)
+        logger.info("Schedule index built with %d entries", len(self))
+
+
+schedule_index = ScheduleIndex()
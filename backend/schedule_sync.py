@@ -0,0 +1,61 @@
+"""
+Keeps every worker's ``schedule_index`` in step with the schedule_entries table.
+
+Schedule writes go through ``schedule_sync``, which applies them to this
+worker's index and relays them to the others over ``schedule:changes``
+(see ``backend.index_sync``). Applying a change re-arms the worker's
+``scheduler_runtime`` timers, so all workers serve the same entries and fire
+the same transitions. Changes carry whole entries.
+"""
+from datetime import datetime
+
+from backend.index_sync import IndexSync
+from backend.infrastructure.database import SessionLocal, redis_client
+from backend.schedule_index import schedule_index
+
+GENERATION_KEY = "schedule:generation"
+CHANGES_CHANNEL = "schedule:changes"
+
+UPSERT, REMOVE, REMOVE_PLAYLIST = "upsert", "remove", "remove_playlist"
+
+
+class ScheduleSync(IndexSync):
+    """Applies schedule writes to the local index and relays them to the other workers."""
+
+    name = "schedule"
+
+    def __init__(self, index=schedule_index, redis=redis_client, session_factory=SessionLocal,
+                 generation_key: str = GENERATION_KEY, channel: str = CHANGES_CHANNEL):
+        super().__init__(index, redis, session_factory, generation_key, channel)
+
+    async def add(self, entry: dict) -> dict:
+        entry = self.index.add(entry)
+        await self._publish({"op": UPSERT, "entry": entry})
+        return entry
+
+    async def remove(self, entry_id):
+        entry = self.index.remove(entry_id)
+        await self._publish({"op": REMOVE, "id": str(entry_id)})
+        return entry
+
+    async def remove_playlist(self, playlist_id):
+        entries = self.index.remove_playlist(playlist_id)
+        await self._publish({"op": REMOVE_PLAYLIST, "playlist_id": str(playlist_id)})
+        return entries
+
+    def _apply(self, change: dict):
+        op = change["op"]
+        if op == UPSERT:
+            entry = change["entry"]
+            self.index.add({
+                **entry,
+                "start_time": datetime.fromisoformat(entry["start_time"]),
+                "end_time": datetime.fromisoformat(entry["end_time"]),
+            })
+        elif op == REMOVE:
+            self.index.remove(change["id"])
+        elif op == REMOVE_PLAYLIST:
+            self.index.remove_playlist(change["playlist_id"])
+
+
+schedule_sync = ScheduleSync()
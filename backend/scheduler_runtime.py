@@ -0,0 +1,223 @@
+import asyncio
+import heapq
+import logging
+from datetime import datetime, timezone
+from itertools import count
+from typing import Callable, Dict, List, Optional
+
+from backend.schedule_index import schedule_index
+from backend.websocket_manager import event_handler
+
+logger = logging.getLogger(__name__)
+
+# Longest single sleep; bounds how late a timer can be if the wall clock is
+# stepped while waiting
+MAX_SLEEP = 30.0
+DRIFT_SAMPLES = 1024
+
+# Why a venue's active entry changed
+SCHEDULED, EDITED, RESUMED = "scheduled", "edited", "resumed"
+
+
+def _utcnow() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+class SchedulerRuntime:
+    """
+    Switches each venue's active playlist as its schedule entries start and end.
+
+    Only the next boundary of each venue matters (the end of the entry playing
+    now, or the start of the next one), so the runtime keeps one timer per
+    venue in a heap ordered by wall-clock due time, whatever the number of
+    entries. When the schedule index reports a change to a venue, that
+    venue's boundary is recomputed with two bisects and a new timer pushed;
+    the superseded one is skipped when it surfaces (lazy deletion). One task
+    sleeps until the earliest timer, or until an earlier one is armed.
+
+    Nothing is persisted: the active entry of a venue is a function of the
+    schedule and the clock, so after a restart every venue resumes on
+    whatever entry covers "now" (announced with reason ``resumed``).
+
+    Every worker runs its own runtime over its own index, which
+    ``backend.schedule_sync`` keeps in step with the table, so each worker
+    switches its playback state and tells its own ``player`` sockets.
+    Transitions are broadcast to the ``player`` WebSocket channel as
+    ``schedule_transition`` messages and passed to listeners as
+    ``(venue, entry or None)``.
+    """
+
+    def __init__(self, index=schedule_index, manager=None, clock: Callable[[], datetime] = _utcnow):
+        self.index = index
+        # backend.schedule_sync applies every write to every worker's index, so
+        # every worker runs the same timers; transitions go to this worker's
+        # sockets only
+        self.manager = manager or event_handler.manager
+        self.clock = clock
+        self._heap: list = []
+        self._seq = count()
+        # venue -> seq of its live timer; heap items with another seq are stale
+        self._timers: Dict[str, int] = {}
+        self._active: Dict[str, Optional[dict]] = {}
+        self._listeners: List[Callable] = []
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._drift_ms: List[float] = []
+        self.stats = {"transitions": 0, "timers_armed": 0, "stale_timers": 0, "max_drift_ms": 0.0}
+
+    def add_listener(self, listener: Callable):
+        self._listeners.append(listener)
+
+    def active(self, venue: str) -> Optional[dict]:
+        return self._active.get(venue)
+
+    @staticmethod
+    def _identity(entry: Optional[dict]):
+        return (entry["id"], entry["playlist_id"]) if entry else None
+
+    def reschedule(self, venue: str, resumed: bool = False):
+        """Re-arm a venue's timer; called by the schedule index on every change to the venue."""
+        now = self.clock()
+        current = self.index.at(venue, now)
+        if venue not in self._active:
+            if current is None:
+                # Never seen active and nothing playing: only the next start matters
+                due, reason = None, SCHEDULED
+            else:
+                due, reason = now, RESUMED if resumed else EDITED
+        elif self._identity(self._active[venue]) != self._identity(current):
+            due, reason = now, EDITED
+        else:
+            due, reason = None, SCHEDULED
+        if due is None:
+            upcoming = self.index.next_after(venue, now)
+            candidates = [entry_time for entry_time in (
+                current["end_time"] if current else None,
+                upcoming["start_time"] if upcoming else None,
+            ) if entry_time is not None]
+            due = min(candidates) if candidates else None
+        if due is None:
+            self._timers.pop(venue, None)
+            return
+        seq = next(self._seq)
+        self._timers[venue] = seq
+        heapq.heappush(self._heap, (due, seq, venue, reason))
+        self.stats["timers_armed"] += 1
+        # Wake the loop in case this timer is now the earliest
+        self._wakeup.set()
+
+    def _next_due(self) -> Optional[datetime]:
+        while self._heap:
+            due, seq, venue, _ = self._heap[0]
+            if self._timers.get(venue) == seq:
+                return due
+            heapq.heappop(self._heap)
+            self.stats["stale_timers"] += 1
+        return None
+
+    async def fire_due(self):
+        """Fire every timer that is due, broadcasting one message per venue transition."""
+        now = self.clock()
+        while True:
+            due = self._next_due()
+            if due is None or due > now:
+                return
+            _, seq, venue, reason = heapq.heappop(self._heap)
+            del self._timers[venue]
+            await self._transition(venue, due, reason)
+            self.reschedule(venue)
+
+    async def _transition(self, venue: str, due: datetime, reason: str):
+        now = self.clock()
+        entry = self.index.at(venue, now)
+        previous = self._active.get(venue)
+        self._active[venue] = entry
+        if self._identity(previous) == self._identity(entry):
+            return
+        drift_ms = max(0.0, (now - due).total_seconds() * 1000)
+        if reason == SCHEDULED:
+            self._record_drift(drift_ms)
+        self.stats["transitions"] += 1
+        for listener in list(self._listeners):
+            try:
+                listener(venue, entry)
+            except Exception:
+                logger.exception("Schedule transition listener failed")
+        message = {
+            "type": "schedule_transition",
+            "venue": venue,
+            "reason": reason,
+            "entry_id": entry["id"] if entry else None,
+            "playlist_id": entry["playlist_id"] if entry else None,
+            "previous_playlist_id": previous["playlist_id"] if previous else None,
+            "ends_at": entry["end_time"].isoformat() if entry else None,
+            "scheduled_for": due.isoformat(),
+            "at": now.isoformat(),
+            "drift_ms": round(drift_ms, 3),
+        }
+        try:
+            await self.manager.broadcast_to_type(message, "player")
+        except Exception:
+            logger.exception("Could not broadcast schedule transition for %s", venue)
+
+    def _record_drift(self, drift_ms: float):
+        self._drift_ms.append(drift_ms)
+        if len(self._drift_ms) > DRIFT_SAMPLES:
+            del self._drift_ms[0]
+        self.stats["max_drift_ms"] = max(self.stats["max_drift_ms"], round(drift_ms, 3))
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            due = self._next_due()
+            delay = MAX_SLEEP if due is None else (due - self.clock()).total_seconds()
+            if delay > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), min(delay, MAX_SLEEP))
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            try:
+                await self.fire_due()
+            except Exception:
+                logger.exception("Scheduler runtime tick failed")
+
+    def start(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+            self.index.add_listener(self.reschedule)
+            for venue in self.index.venues():
+                self.reschedule(venue, resumed=True)
+
+    async def stop(self):
+        if self._task is not None:
+            self.index.remove_listener(self.reschedule)
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        drifts = sorted(self._drift_ms)
+
+        def percentile(p):
+            return round(drifts[min(len(drifts) - 1, int(p * len(drifts)))], 3) if drifts else None
+
+        return {
+            **self.stats,
+            "running": self._task is not None,
+            "venues": len(self._timers),
+            "pending_timers": len(self._heap),
+            "drift_ms_p50": percentile(0.50),
+            "drift_ms_p99": percentile(0.99),
+            "active": {
+                venue: {"entry_id": entry["id"], "playlist_id": entry["playlist_id"], "ends_at": entry["end_time"]}
+                for venue, entry in self._active.items() if entry
+            },
+        }
+
+
+scheduler_runtime = SchedulerRuntime()
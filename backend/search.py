@@ -0,0 +1,135 @@
+import re
+from typing import Optional
+
+from sqlalchemy import and_, desc, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from backend.infrastructure.models import Track
+
+# Text search configuration used by tracks.search_vector. 'simple' skips
+# stemming and stop words, which suits band names and partially typed words.
+TS_CONFIG = "simple"
+BPM_BUCKET_SIZE = 10
+# Facets are counted over at most this many matches so a one-letter query
+# against a large catalog stays cheap; responses say when counts were capped.
+FACET_SAMPLE_LIMIT = 5000
+# Queries whose words are all this short match most of a large catalog, and
+# ranking every match costs a ts_rank_cd per row; their matches are listed
+# newest first instead, which the (created_at, id) index serves without
+# reading the rest of them.
+SHORT_PREFIX_LENGTH = 2
+
+SEARCH_COLUMNS = [Track.id, Track.title, Track.artist, Track.album, Track.genre, Track.bpm, Track.artwork_url, Track.storage_url]
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def to_prefix_tsquery(query: str) -> Optional[str]:
+    """
+    Turn free text into a ``to_tsquery`` expression where every word is a
+    prefix match, so "daft pu" matches "Daft Punk". Only word characters
+    survive, which keeps tsquery operators typed by patrons out of the query.
+    """
+    tokens = _TOKEN_RE.findall(query.lower())
+    if not tokens:
+        return None
+    return " & ".join(f"{token}:*" for token in tokens)
+
+
+def _filters(genre: Optional[str], bpm_min: Optional[int], bpm_max: Optional[int]) -> dict:
+    filters = {}
+    if genre:
+        filters["genre"] = Track.genre == genre
+    if bpm_min is not None:
+        filters["bpm_min"] = Track.bpm >= bpm_min
+    if bpm_max is not None:
+        filters["bpm_max"] = Track.bpm <= bpm_max
+    return filters
+
+
+def ranked_query(match, rank, filters: dict, limit: int):
+    # Every match is ranked before the limit applies, so broad prefixes still
+    # return the best matches; the GIN index does the filtering and Postgres
+    # keeps only the top ``limit`` rows while sorting (top-N heapsort).
+    # Without a rank the newest matches come first.
+    if rank is None:
+        order = (desc(Track.created_at), desc(Track.id))
+        rank = literal_column("0")
+    else:
+        order = (desc(literal_column("rank")), Track.id)
+    return select(*SEARCH_COLUMNS, rank.label("rank")).where(match, *filters.values()).order_by(*order).limit(limit)
+
+
+async def _ranked(db: AsyncSession, match, rank, filters: dict, limit: int):
+    return (await db.execute(ranked_query(match, rank, filters, limit))).mappings().all()
+
+
+async def _facets(db: AsyncSession, match, filters: dict) -> dict:
+    # Each facet ignores its own filter so the touch screen can show the
+    # alternatives the patron could switch to.
+    genre_where = and_(match, *[f for key, f in filters.items() if key != "genre"])
+    bpm_where = and_(match, *[f for key, f in filters.items() if key not in ("bpm_min", "bpm_max")])
+
+    genre_sample = select(Track.genre).where(genre_where, Track.genre.isnot(None)).limit(FACET_SAMPLE_LIMIT).subquery()
+    genre_rows = (await db.execute(
+        select(genre_sample.c.genre, func.count()).group_by(genre_sample.c.genre).order_by(desc(func.count()))
+    )).all()
+
+    bucket = (Track.bpm // BPM_BUCKET_SIZE * BPM_BUCKET_SIZE).label("bucket")
+    bpm_sample = select(bucket).where(bpm_where, Track.bpm.isnot(None)).limit(FACET_SAMPLE_LIMIT).subquery()
+    bpm_rows = (await db.execute(
+        select(bpm_sample.c.bucket, func.count()).group_by(bpm_sample.c.bucket).order_by(bpm_sample.c.bucket)
+    )).all()
+
+    return {
+        "genre": {genre: count for genre, count in genre_rows},
+        "bpm": {f"{start}-{start + BPM_BUCKET_SIZE - 1}": count for start, count in bpm_rows},
+        "truncated": sum(count for _, count in genre_rows) >= FACET_SAMPLE_LIMIT
+        or sum(count for _, count in bpm_rows) >= FACET_SAMPLE_LIMIT,
+    }
+
+
+async def search_tracks(
+    db: AsyncSession,
+    query: str = "",
+    genre: Optional[str] = None,
+    bpm_min: Optional[int] = None,
+    bpm_max: Optional[int] = None,
+    limit: int = 20,
+) -> dict:
+    """
+    Ranked track search with genre/BPM facets.
+
+    Words are matched as prefixes against the weighted ``search_vector``
+    (title > artist > album > genre) through its GIN index; a query whose
+    words are all one or two letters lists its matches newest first instead
+    of ranking them (``SHORT_PREFIX_LENGTH``). When that finds nothing,
+    typically a typo, the query falls back to trigram similarity on title
+    and artist. Genre and BPM filters use the (genre, bpm) btree index.
+    """
+    filters = _filters(genre, bpm_min, bpm_max)
+    tsquery = to_prefix_tsquery(query)
+
+    if tsquery is None:
+        match = literal_column("true")
+        rank = literal_column("0")
+    else:
+        ts = func.to_tsquery(literal_column(f"'{TS_CONFIG}'::regconfig"), tsquery)
+        match = Track.search_vector.op("@@")(ts)
+        if all(len(token) <= SHORT_PREFIX_LENGTH for token in _TOKEN_RE.findall(query.lower())):
+            rank = None
+        else:
+            rank = func.ts_rank_cd(Track.search_vector, ts)
+
+    rows = await _ranked(db, match, rank, filters, limit)
+
+    if not rows and tsquery is not None:
+        match = Track.title.op("%")(query) | Track.artist.op("%")(query)
+        rank = func.greatest(func.similarity(Track.title, query), func.similarity(Track.artist, query))
+        rows = await _ranked(db, match, rank, filters, limit)
+
+    return {
+        "query": query,
+        "results": [dict(row) for row in rows],
+        "facets": await _facets(db, match, filters),
+    }
@@ -0,0 +1,71 @@
+"""
+Serialization fast path for trusted database rows.
+
+Rows selected with SQLAlchemy Core are already typed by their columns, so
+list endpoints turn them into plain dicts and encode them straight to bytes,
+skipping per-row Pydantic validation and ``jsonable_encoder``. orjson is used
+when installed; the stdlib encoder is the fallback. ``packb`` encodes the
+same values as MessagePack for clients that negotiate a binary encoding; it
+is None when msgpack is not installed.
+"""
+import json
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Iterable, List, Sequence
+
+from fastapi import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is in requirements.txt
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - msgpack is in requirements.txt
+    msgpack = None
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    return str(value)
+
+
+if orjson is not None:
+    def dumps(obj: Any) -> bytes:
+        return orjson.dumps(obj, default=_default)
+
+    loads = orjson.loads
+else:  # pragma: no cover
+    def dumps(obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(",", ":")).encode()
+
+    loads = json.loads
+
+if msgpack is not None:
+    def packb(obj: Any) -> bytes:
+        # Same value mapping as ``dumps``: datetimes as ISO strings, decimals as floats
+        return msgpack.packb(obj, default=_default, use_bin_type=True)
+
+    unpackb = msgpack.unpackb
+else:  # pragma: no cover
+    packb = unpackb = None
+
+
+def row_dicts(rows: Iterable, fields: Sequence[str]) -> List[dict]:
+    """Project Core result mappings onto ``fields`` without building ORM objects."""
+    return [{name: row[name] for name in fields} for row in rows]
+
+
+class FastJSONResponse(Response):
+    """JSON response for already-trusted content; nothing is validated or re-encoded."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
@@ -0,0 +1,132 @@
+"""
+Per-display signage playout manifests.
+
+A manifest is the display's compiled timeline (``backend.signage_timeline``)
+flattened into an ordered list of items: what to play, from where, its
+checksum and duration, and the window it is valid for. Items are keyed by
+the unclipped start of the schedule occurrence they show, so an item keeps
+its key however the horizon cuts it.
+
+A manifest covers ``MANIFEST_HORIZON`` from the start of the current UTC day,
+so it still reaches at least ``HORIZON`` ahead at the end of the day. Its
+version hashes the schedule and content inputs plus that day, not the items:
+it changes when a schedule or content edit reaches the display and once a
+day as the horizon advances, never with the hourly timeline buckets.
+
+Manifests are cached alongside the timelines, so a display polling with
+``If-None-Match`` costs a cache lookup and a 304. Each version's items are
+also kept in Redis for ``SNAPSHOT_TTL`` so a display that sends
+``since=<version>`` gets just the items added, changed or removed since then.
+"""
+import hashlib
+import logging
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+
+from redis.exceptions import RedisError
+
+from backend.infrastructure.database import redis_client
+from backend.schedule_index import as_utc
+from backend.serialization import dumps, loads
+from backend import signage_timeline
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_KEY = "signage:manifest:{}:{}"
+# Displays that have been offline longer than this get a full manifest
+SNAPSHOT_TTL = 24 * 60 * 60
+MANIFEST_HORIZON = signage_timeline.HORIZON + signage_timeline.DAY
+
+
+def _iso(ts: float) -> str:
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def manifest_horizon(now: datetime) -> Tuple[datetime, datetime]:
+    """The window a manifest built at ``now`` covers: ``MANIFEST_HORIZON`` from the start of the UTC day."""
+    day = as_utc(now).replace(hour=0, minute=0, second=0, microsecond=0)
+    return day, day + MANIFEST_HORIZON
+
+
+def item_key(content_id: str, origin: float, start: float, horizon_start: float) -> str:
+    """
+    ``content@<occurrence start>``; a later piece of an occurrence split by a
+    higher-priority one also carries its own start.
+    """
+    key = f"{content_id}@{_iso(origin)}"
+    return key if start <= max(origin, horizon_start) else f"{key}+{_iso(start)}"
+
+
+def build_manifest(timeline: dict) -> dict:
+    items = []
+    for start, end, slot, origin in zip(timeline["starts"], timeline["ends"], timeline["slots"], timeline["origins"]):
+        content = timeline["contents"][slot]
+        items.append({
+            "key": item_key(content["id"], origin, start, timeline["horizon_start"]),
+            "content_id": content["id"],
+            "url": content["url"],
+            "content_type": content["content_type"],
+            "checksum": content.get("checksum"),
+            "duration": content.get("duration"),
+            "valid_from": _iso(start),
+            "valid_until": _iso(end),
+        })
+    version = dumps([timeline["inputs"], timeline["horizon_start"], timeline["horizon_end"]])
+    return {
+        "version": hashlib.sha1(version).hexdigest()[:16],
+        "valid_until": _iso(timeline["horizon_end"]),
+        "items": items,
+    }
+
+
+def diff_items(old: List[dict], new: List[dict]) -> dict:
+    """Items of ``new`` that are absent from or differ in ``old``, and the keys of ``old`` items that are gone."""
+    previous = {item["key"]: item for item in old}
+    current = {item["key"] for item in new}
+    return {
+        "upserted": [item for item in new if previous.get(item["key"]) != item],
+        "removed": [key for key in previous if key not in current],
+    }
+
+
+class ManifestStore:
+    def __init__(self, redis=redis_client, ttl: int = SNAPSHOT_TTL):
+        self.redis = redis
+        self.ttl = ttl
+
+    async def remember(self, display_id: str, manifest: dict):
+        try:
+            await self.redis.set(SNAPSHOT_KEY.format(display_id, manifest["version"]), dumps(manifest["items"]), ex=self.ttl)
+        except RedisError:
+            logger.warning("Could not store signage manifest %s for %s", manifest["version"], display_id, exc_info=True)
+
+    async def recall(self, display_id: str, version: str) -> Optional[List[dict]]:
+        try:
+            raw = await self.redis.get(SNAPSHOT_KEY.format(display_id, version))
+        except RedisError:
+            logger.warning("Could not read signage manifest %s for %s", version, display_id, exc_info=True)
+            return None
+        return loads(raw) if raw is not None else None
+
+
+manifest_store = ManifestStore()
+
+
+async def get_manifest(db, display_id: str, now: datetime = None, store: ManifestStore = manifest_store) -> dict:
+    """The display's current manifest, from the cache when possible."""
+    horizon_start, horizon_end = manifest_horizon(now or datetime.now(timezone.utc))
+
+    async def load_manifest():
+        manifest = build_manifest(await signage_timeline.load_timeline(db, display_id, horizon_start, horizon_end))
+        await store.remember(display_id, manifest)
+        return manifest
+
+    return await signage_timeline.cached(display_id, "manifest", horizon_start, load_manifest)
+
+
+async def get_delta(display_id: str, since: str, manifest: dict, store: ManifestStore = manifest_store) -> Optional[dict]:
+    """Changes from version ``since`` to ``manifest``, or None when that version is no longer known."""
+    old = await store.recall(display_id, since)
+    if old is None:
+        return None
+    return {"version": manifest["version"], "since": since, "valid_until": manifest["valid_until"], **diff_items(old, manifest["items"])}
@@ -0,0 +1,261 @@
+"""
+Signage timeline compiler.
+
+``compile_timeline`` expands a display's schedules (one-off and recurring)
+over a rolling horizon into a sorted array of non-overlapping segments, each
+naming the content to show. A lookup for "what is on at T" is then a single
+bisect. Compiled timelines live in the read-through cache under one scope per
+display plus the shared ``signage`` scope: a schedule aimed at one display
+invalidates just that display, while schedules for every display and content
+deletions invalidate them all. Each timeline is rebuilt lazily by the next
+poll that misses it.
+"""
+import hashlib
+import heapq
+import logging
+from bisect import bisect_right
+from datetime import datetime, timedelta, timezone
+from typing import Iterable, List, Optional
+
+from sqlalchemy import or_
+from sqlalchemy.future import select
+
+from backend.infrastructure.cache import catalog_cache
+from backend.infrastructure.models import DigitalSignageContent, DigitalSignageSchedule
+from backend.schedule_index import as_utc
+from backend.serialization import dumps
+
+logger = logging.getLogger(__name__)
+
+HORIZON = timedelta(days=7)
+# Timelines are compiled from the start of the current hour, so a cached
+# timeline always covers at least HORIZON - 1h ahead
+BUCKET_SECONDS = 3600
+TIMELINE_TTL = 2 * BUCKET_SECONDS
+SIGNAGE_SCOPE = "signage"
+
+DAY = timedelta(days=1)
+# repeat_pattern -> (period, weekday filter on the occurrence start)
+REPEAT_PATTERNS = {
+    "daily": (DAY, None),
+    "weekdays": (DAY, range(0, 5)),
+    "weekends": (DAY, range(5, 7)),
+    "weekly": (7 * DAY, None),
+}
+ONE_OFF_PATTERNS = (None, "", "none", "once")
+
+CONTENT_FIELDS = ("id", "filename", "content_type", "url", "checksum", "duration")
+SCHEDULE_FIELDS = ("id", "content_id", "display_id", "start_time", "end_time", "repeat_pattern", "created_at")
+
+
+def display_scope(display_id: str) -> str:
+    return f"{SIGNAGE_SCOPE}:display:{display_id}"
+
+
+def scopes_for(display_id: Optional[str]) -> tuple:
+    """Cache scopes a schedule change for ``display_id`` (None: every display) invalidates."""
+    return (display_scope(display_id),) if display_id else (SIGNAGE_SCOPE,)
+
+
+def occurrences(start: datetime, end: datetime, repeat_pattern: Optional[str], horizon_start: datetime, horizon_end: datetime):
+    """Yield the ``(start, end)`` windows of one schedule that intersect the horizon."""
+    start, end = as_utc(start), as_utc(end)
+    if end <= start:
+        return
+    pattern = (repeat_pattern or "").strip().lower() or None
+    if pattern in ONE_OFF_PATTERNS:
+        if start < horizon_end and end > horizon_start:
+            yield start, end
+        return
+    if pattern not in REPEAT_PATTERNS:
+        logger.warning("Unknown signage repeat_pattern %r; treating it as one-off", repeat_pattern)
+        yield from occurrences(start, end, None, horizon_start, horizon_end)
+        return
+    period, weekdays = REPEAT_PATTERNS[pattern]
+    # First repetition that has not ended by the horizon start
+    k = max(0, -(-(horizon_start - end) // period))
+    while True:
+        occurrence_start = start + k * period
+        if occurrence_start >= horizon_end:
+            return
+        if weekdays is None or occurrence_start.weekday() in weekdays:
+            yield occurrence_start, end + k * period
+        k += 1
+
+
+def compile_timeline(schedules: Iterable[dict], contents: dict, display_id: Optional[str],
+                     horizon_start: datetime, horizon_end: datetime = None) -> dict:
+    """
+    Flatten schedules into non-overlapping segments over ``[horizon_start, horizon_end)``.
+
+    ``schedules`` are dicts with ``id``, ``content_id``, ``display_id``,
+    ``start_time``, ``end_time``, ``repeat_pattern`` and ``created_at``;
+    ``contents`` maps content ids to their fields. Where windows overlap,
+    a schedule aimed at this display beats one for every display, and then
+    the most recently created schedule wins. Times in the result are epoch
+    seconds.
+
+    ``origins`` holds, per segment, the unclipped start of the occurrence it
+    shows, and ``inputs`` is a hash of the schedules and contents the
+    timeline was compiled from; neither depends on the horizon.
+    """
+    horizon_start = as_utc(horizon_start)
+    horizon_end = as_utc(horizon_end) if horizon_end is not None else horizon_start + HORIZON
+
+    def priority(schedule):
+        created_at = schedule.get("created_at")
+        return (
+            display_id is not None and schedule.get("display_id") == display_id,
+            as_utc(created_at) if created_at else datetime.min.replace(tzinfo=timezone.utc),
+            str(schedule["id"]),
+        )
+
+    ranked = sorted((s for s in schedules if s["content_id"] in contents), key=priority)
+    windows = []
+    for rank, schedule in enumerate(ranked):
+        for start, end in occurrences(schedule["start_time"], schedule["end_time"], schedule.get("repeat_pattern"), horizon_start, horizon_end):
+            windows.append((max(start, horizon_start).timestamp(), min(end, horizon_end).timestamp(), rank, schedule["content_id"], start.timestamp()))
+
+    # Sweep the elementary intervals between window boundaries with the open
+    # windows in a max-heap by rank; a window that has ended is dropped when it
+    # surfaces at the top
+    windows.sort()
+    boundaries = sorted({t for window in windows for t in window[:2]})
+    starts: List[float] = []
+    ends: List[float] = []
+    slots: List[int] = []
+    origins: List[float] = []
+    content_ids: List[str] = []
+    slot_of = {}
+    open_windows: list = []
+    i = 0
+    for left, right in zip(boundaries, boundaries[1:]):
+        while i < len(windows) and windows[i][0] <= left:
+            _, end, rank, content_id, origin = windows[i]
+            heapq.heappush(open_windows, (-rank, end, content_id, origin))
+            i += 1
+        while open_windows and open_windows[0][1] <= left:
+            heapq.heappop(open_windows)
+        if not open_windows:
+            continue
+        _, _, content_id, origin = open_windows[0]
+        if content_id not in slot_of:
+            slot_of[content_id] = len(content_ids)
+            content_ids.append(content_id)
+        slot = slot_of[content_id]
+        if slots and slots[-1] == slot and ends[-1] == left:
+            ends[-1] = right
+        else:
+            starts.append(left)
+            ends.append(right)
+            slots.append(slot)
+            origins.append(origin)
+
+    inputs = [
+        [_input_value(schedule.get(name)) for name in SCHEDULE_FIELDS] for schedule in ranked
+    ] + [
+        [_input_value(contents[content_id].get(name)) for name in CONTENT_FIELDS]
+        for content_id in sorted({schedule["content_id"] for schedule in ranked})
+    ]
+    return {
+        "display_id": display_id,
+        "horizon_start": horizon_start.timestamp(),
+        "horizon_end": horizon_end.timestamp(),
+        "starts": starts,
+        "ends": ends,
+        "slots": slots,
+        "origins": origins,
+        "inputs": hashlib.sha1(dumps([display_id, inputs])).hexdigest(),
+        "contents": [{name: contents[content_id].get(name) for name in CONTENT_FIELDS} for content_id in content_ids],
+    }
+
+
+def _input_value(value):
+    if isinstance(value, datetime):
+        return as_utc(value).isoformat()
+    return value if value is None or isinstance(value, (str, int, float, bool)) else str(value)
+
+
+def segment_at(timeline: dict, when: datetime) -> Optional[dict]:
+    """The segment showing at ``when``: one bisect over the segment starts."""
+    ts = as_utc(when).timestamp()
+    i = bisect_right(timeline["starts"], ts) - 1
+    if i < 0 or timeline["ends"][i] <= ts:
+        return None
+    return _segment(timeline, i)
+
+
+def segments_between(timeline: dict, start: datetime, end: datetime) -> List[dict]:
+    """Segments intersecting ``[start, end)`` in order."""
+    start_ts, end_ts = as_utc(start).timestamp(), as_utc(end).timestamp()
+    i = max(0, bisect_right(timeline["starts"], start_ts) - 1)
+    if i < len(timeline["ends"]) and timeline["ends"][i] <= start_ts:
+        i += 1
+    segments = []
+    while i < len(timeline["starts"]) and timeline["starts"][i] < end_ts:
+        segments.append(_segment(timeline, i))
+        i += 1
+    return segments
+
+
+def _segment(timeline: dict, i: int) -> dict:
+    return {
+        "start_time": datetime.fromtimestamp(timeline["starts"][i], timezone.utc),
+        "end_time": datetime.fromtimestamp(timeline["ends"][i], timezone.utc),
+        "content": timeline["contents"][timeline["slots"][i]],
+    }
+
+
+def horizon_bucket(now: datetime) -> datetime:
+    ts = as_utc(now).timestamp()
+    return datetime.fromtimestamp(ts - ts % BUCKET_SECONDS, timezone.utc)
+
+
+async def load_timeline(db, display_id: Optional[str], horizon_start: datetime, horizon_end: datetime = None) -> dict:
+    """Compile a display's timeline from the database in one query."""
+    columns = [
+        DigitalSignageSchedule.id, DigitalSignageSchedule.content_id, DigitalSignageSchedule.display_id,
+        DigitalSignageSchedule.start_time, DigitalSignageSchedule.end_time, DigitalSignageSchedule.repeat_pattern,
+        DigitalSignageSchedule.created_at,
+        *(getattr(DigitalSignageContent, name).label(f"content_{name}") for name in CONTENT_FIELDS),
+    ]
+    displays = DigitalSignageSchedule.display_id.is_(None)
+    if display_id is not None:
+        displays = or_(displays, DigitalSignageSchedule.display_id == display_id)
+    result = await db.execute(
+        select(*columns)
+        .join(DigitalSignageContent, DigitalSignageContent.id == DigitalSignageSchedule.content_id)
+        .where(displays, DigitalSignageContent.is_active.is_not(False))
+    )
+    schedules, contents = [], {}
+    for row in result:
+        row = row._mapping
+        content_id = str(row["content_id"])
+        schedules.append({
+            "id": str(row["id"]), "content_id": content_id, "display_id": row["display_id"],
+            "start_time": row["start_time"], "end_time": row["end_time"],
+            "repeat_pattern": row["repeat_pattern"], "created_at": row["created_at"],
+        })
+        contents[content_id] = {name: str(row[f"content_{name}"]) if name == "id" else row[f"content_{name}"] for name in CONTENT_FIELDS}
+    return compile_timeline(schedules, contents, display_id, horizon_start, horizon_end)
+
+
+async def cached(display_id: Optional[str], name: str, bucket: datetime, loader):
+    """Cache a value derived from a display's schedules; it is dropped with the display's timeline."""
+    scope = display_scope(display_id) if display_id else SIGNAGE_SCOPE
+    depends_on = (SIGNAGE_SCOPE,) if display_id else ()
+    return await catalog_cache.get_or_load(scope, f"{name}:{int(bucket.timestamp())}", loader, ttl=TIMELINE_TTL, depends_on=depends_on)
+
+
+async def get_timeline(db, display_id: Optional[str], now: datetime = None) -> dict:
+    """A display's compiled timeline covering ``now`` and the horizon after it, from the cache when possible."""
+    bucket = horizon_bucket(now or datetime.now(timezone.utc))
+    return await cached(display_id, "timeline", bucket, lambda: load_timeline(db, display_id, bucket))
+
+
+async def invalidate(*display_ids: Optional[str]):
+    """Drop the compiled timelines a schedule or content change affects (None: every display)."""
+    scopes = set()
+    for display_id in display_ids:
+        scopes.update(scopes_for(display_id))
+    await catalog_cache.invalidate(*scopes)
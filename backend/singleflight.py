@@ -0,0 +1,45 @@
+import asyncio
+from collections import defaultdict
+from typing import Any, Awaitable, Callable
+
+
+class SingleFlight:
+    """
+    Collapses concurrent identical reads within a worker.
+
+    The first caller for a key starts the work as its own task; callers
+    arriving while it is in flight await the same task instead of issuing
+    their own query. The key is forgotten as soon as the task finishes, so
+    this never serves stale data; it only deduplicates overlapping requests.
+    Each caller awaits through ``asyncio.shield``, so one client
+    disconnecting does not cancel the read for everybody else. For the same
+    reason ``fn`` must not borrow anything scoped to the request that starts
+    it, such as its database session; it may outlive that request.
+    """
+
+    def __init__(self):
+        self._inflight: dict = {}
+        self.stats = defaultdict(lambda: {"calls": 0, "executions": 0, "collapsed": 0})
+
+    async def do(self, group: str, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run ``fn()`` once for all concurrent callers of ``(group, key)`` and share its result or exception."""
+        stats = self.stats[group]
+        stats["calls"] += 1
+        task = self._inflight.get((group, key))
+        if task is None:
+            stats["executions"] += 1
+            task = asyncio.ensure_future(fn())
+            self._inflight[(group, key)] = task
+            task.add_done_callback(lambda _, k=(group, key): self._inflight.pop(k, None))
+        else:
+            stats["collapsed"] += 1
+        return await asyncio.shield(task)
+
+    def snapshot(self) -> dict:
+        return {
+            "in_flight": len(self._inflight),
+            "groups": {group: dict(stats) for group, stats in self.stats.items()},
+        }
+
+
+singleflight = SingleFlight()
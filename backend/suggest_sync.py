@@ -0,0 +1,51 @@
+"""
+Keeps every worker's ``suggest_index`` in step with the tracks table.
+
+Track writes go through ``suggest_sync``, which applies them to this worker's
+index and relays them to the others over ``suggest:changes`` (see
+``backend.index_sync``). A bulk import publishes one change per committed
+batch. Track ids travel as strings, and the index is loaded with string ids
+to match.
+"""
+from backend.index_sync import IndexSync
+from backend.infrastructure.database import SessionLocal, redis_client
+from backend.suggest import suggest_index
+
+GENERATION_KEY = "suggest:generation"
+CHANGES_CHANNEL = "suggest:changes"
+
+ADD, REMOVE = "add", "remove"
+
+
+class SuggestSync(IndexSync):
+    """Applies track writes to the local suggest index and relays them to the other workers."""
+
+    name = "suggest"
+
+    def __init__(self, index=suggest_index, redis=redis_client, session_factory=SessionLocal,
+                 generation_key: str = GENERATION_KEY, channel: str = CHANGES_CHANNEL):
+        super().__init__(index, redis, session_factory, generation_key, channel)
+
+    async def add(self, rows):
+        """Index ``(id, title, artist, ...)`` rows, e.g. one bulk import batch."""
+        tracks = [[str(row[0]), row[1], row[2]] for row in rows]
+        if not tracks:
+            return
+        for track in tracks:
+            self.index.add(*track)
+        await self._publish({"op": ADD, "tracks": tracks})
+
+    async def remove(self, track_id):
+        self.index.remove(str(track_id))
+        await self._publish({"op": REMOVE, "id": str(track_id)})
+
+    def _apply(self, change: dict):
+        op = change["op"]
+        if op == ADD:
+            for track in change["tracks"]:
+                self.index.add(*track)
+        elif op == REMOVE:
+            self.index.remove(change["id"])
+
+
+suggest_sync = SuggestSync()
@@ -0,0 +1,196 @@
+import asyncio
+import base64
+import hashlib
+import hmac
+import logging
+import os
+import uuid
+from collections import defaultdict
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy.dialects.postgresql import insert
+
+from backend.infrastructure.database import SessionLocal, redis_client
+from backend.infrastructure.models import TrackVote
+from backend.infrastructure.security import SECRET_KEY
+from backend.queue_engine import request_queue
+from backend.websocket_manager import event_handler
+
+logger = logging.getLogger(__name__)
+
+VOTERS_KEY = "queue:voters:{}"
+# Voter sets outlive a night's queue but not much longer
+VOTERS_TTL = 12 * 60 * 60
+QUEUE_FLUSH_INTERVAL = 0.25
+DB_FLUSH_INTERVAL = 5.0
+
+# Patrons are anonymous: a voter is a random id the server issues to a device
+# and signs, kept in a cookie. A client can mint identities only by asking for
+# new ones, which is capped per address; the cap is generous because a venue's
+# patrons share its NAT address.
+VOTER_COOKIE = "djamms_voter"
+VOTER_COOKIE_MAX_AGE = 30 * 24 * 60 * 60
+VOTER_ISSUE_KEY = "queue:voter_issue:{}"
+VOTER_ISSUE_WINDOW = 60 * 60
+VOTER_ISSUE_LIMIT = int(os.getenv("VOTER_ISSUE_LIMIT", "500"))
+
+# One round trip per vote: refuse votes for tracks that are not queued and
+# dedupe per voter, atomically. Returns -1 (not queued), 0 (duplicate) or 1.
+_RECORD = """
+if not redis.call('ZSCORE', KEYS[1], ARGV[1]) then
+    return -1
+end
+local added = redis.call('SADD', KEYS[2], ARGV[2])
+if added == 1 then
+    redis.call('EXPIRE', KEYS[2], ARGV[3])
+end
+return added
+"""
+
+NOT_QUEUED, DUPLICATE, ACCEPTED = -1, 0, 1
+
+
+def _signature(voter_id: str) -> str:
+    digest = hmac.new(SECRET_KEY.encode(), f"voter:{voter_id}".encode(), hashlib.sha256).digest()
+    return base64.urlsafe_b64encode(digest[:18]).decode()
+
+
+def sign_voter(voter_id: str) -> str:
+    return f"{voter_id}.{_signature(voter_id)}"
+
+
+def voter_from_token(token: Optional[str]) -> Optional[str]:
+    """The voter id in a token issued by ``sign_voter``, or None if it is missing or forged."""
+    if not token:
+        return None
+    voter_id, _, signature = token.rpartition(".")
+    if not voter_id or not hmac.compare_digest(signature, _signature(voter_id)):
+        return None
+    return voter_id
+
+
+class VoteAggregator:
+    """
+    Absorbs vote bursts for the request queue.
+
+    Each vote costs a single Redis script call that dedupes the voter against
+    a per-track set. Accepted votes only bump an in-memory counter. A
+    background task applies the accumulated deltas to the queue in one batched
+    script every ``QUEUE_FLUSH_INTERVAL``, broadcasts the resulting rank
+    changes as one coalesced ``queue_votes`` message, and upserts running
+    totals into ``track_votes`` every ``DB_FLUSH_INTERVAL``. Postgres never
+    sees individual votes.
+    """
+
+    def __init__(self, queue=request_queue, redis=redis_client, session_factory=SessionLocal, manager=None):
+        self.queue = queue
+        self.redis = redis
+        self.session_factory = session_factory
+        # Each worker flushes only the votes it took, so rank changes go to every worker's clients
+        self.manager = manager or event_handler.fanout
+        self._record = redis.register_script(_RECORD)
+        self._pending = defaultdict(int)
+        self._durable = defaultdict(int)
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"accepted": 0, "duplicates": 0, "queue_flushes": 0, "db_flushes": 0}
+
+    async def record(self, track_id: str, voter_id: str, up: bool = True) -> int:
+        outcome = await self._record(
+            keys=[self.queue.keys[0], VOTERS_KEY.format(track_id)],
+            args=[track_id, voter_id, VOTERS_TTL],
+        )
+        if outcome == ACCEPTED:
+            self._pending[track_id] += 1 if up else -1
+            self.stats["accepted"] += 1
+        elif outcome == DUPLICATE:
+            self.stats["duplicates"] += 1
+        return outcome
+
+    async def issue_voter(self, address: str) -> Optional[str]:
+        """A signed token for a new voter id, or None once ``address`` has had its share this hour."""
+        key = VOTER_ISSUE_KEY.format(address)
+        issued = await self.redis.incr(key)
+        if issued == 1:
+            await self.redis.expire(key, VOTER_ISSUE_WINDOW)
+        if issued > VOTER_ISSUE_LIMIT:
+            return None
+        return sign_voter(uuid.uuid4().hex)
+
+    async def forget(self, track_id: str):
+        """Drop the voter set of a track that left the queue."""
+        self._pending.pop(track_id, None)
+        await self.redis.delete(VOTERS_KEY.format(track_id))
+
+    async def flush_queue(self):
+        # Swap before awaiting so votes arriving during the flush land in the next batch
+        pending, self._pending = self._pending, defaultdict(int)
+        deltas = {track_id: delta for track_id, delta in pending.items() if delta}
+        if not deltas:
+            return
+        try:
+            changes = await self.queue.vote_many(deltas)
+        except Exception:
+            self._merge(self._pending, deltas)
+            raise
+        for track_id, delta in deltas.items():
+            self._durable[track_id] += delta
+        self.stats["queue_flushes"] += 1
+        if changes:
+            await self.manager.broadcast_to_type({"type": "queue_votes", "changes": changes}, "player")
+
+    async def flush_db(self):
+        durable, self._durable = self._durable, defaultdict(int)
+        rows = [{"track_id": track_id, "votes": delta, "updated_at": datetime.utcnow()} for track_id, delta in durable.items() if delta]
+        if not rows:
+            return
+        stmt = insert(TrackVote).values(rows)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[TrackVote.track_id],
+            set_={"votes": TrackVote.votes + stmt.excluded.votes, "updated_at": stmt.excluded.updated_at},
+        )
+        try:
+            async with self.session_factory() as db:
+                await db.execute(stmt)
+                await db.commit()
+        except Exception:
+            self._merge(self._durable, durable)
+            raise
+        self.stats["db_flushes"] += 1
+
+    @staticmethod
+    def _merge(target: dict, deltas: dict):
+        # A failed flush puts its batch back so the next one retries it
+        for track_id, delta in deltas.items():
+            target[track_id] += delta
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        next_db_flush = loop.time() + DB_FLUSH_INTERVAL
+        while True:
+            await asyncio.sleep(QUEUE_FLUSH_INTERVAL)
+            try:
+                await self.flush_queue()
+                if loop.time() >= next_db_flush:
+                    next_db_flush = loop.time() + DB_FLUSH_INTERVAL
+                    await self.flush_db()
+            except Exception:
+                logger.exception("Vote flush failed")
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.flush_queue()
+        await self.flush_db()
+
+
+vote_aggregator = VoteAggregator()
@@ -1,46 +1,463 @@
 from fastapi import WebSocket
-from typing import Dict, Set, Any
-import json
+from collections import deque
+from itertools import islice
+from typing import Callable, Deque, Dict, Iterable, Optional, Set, Tuple, Any
 import asyncio
+import logging
+import os
+import time
+
+from redis.exceptions import RedisError
+
+from backend.infrastructure.database import redis_client
+from backend.serialization import dumps, loads, packb
+
+logger = logging.getLogger(__name__)
+
+# What to do when a client's send queue is full
+DROP_OLDEST, COALESCE, DISCONNECT = "drop", "coalesce", "disconnect"
+SLOW_CONSUMER_POLICIES = (DROP_OLDEST, COALESCE, DISCONNECT)
+
+SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+SEND_TIMEOUT = float(os.getenv("WS_SEND_TIMEOUT", "10"))
+SLOW_CONSUMER_POLICY = os.getenv("WS_SLOW_CONSUMER_POLICY", COALESCE).strip().lower()
+LATENCY_SAMPLES = 1024
+# Close code for clients disconnected for falling behind ("Try Again Later")
+SLOW_CONSUMER_CLOSE_CODE = 1013
+
+# "local": broadcasts reach this worker's sockets; "redis": every worker's
+FANOUT = os.getenv("WS_FANOUT", "local").strip().lower()
+FANOUT_CHANNEL_PREFIX = "ws:"
+FANOUT_RECONNECT_DELAY = 1.0
+
+# Wire encodings: JSON text frames (the default) or MessagePack binary frames
+JSON_ENCODING, MSGPACK_ENCODING = "json", "msgpack"
+ENCODERS = {JSON_ENCODING: lambda message: dumps(message).decode()}
+if packb is not None:
+    ENCODERS[MSGPACK_ENCODING] = packb
+
+
+def negotiate_encoding(websocket: WebSocket) -> Tuple[str, Optional[str]]:
+    """
+    The encoding a client asked for, and the subprotocol to accept it with.
+
+    Clients opt into MessagePack with ``?encoding=msgpack`` or by offering
+    the ``msgpack`` subprotocol; everything else gets JSON.
+    """
+    offered = [p.strip() for p in websocket.headers.get("sec-websocket-protocol", "").split(",") if p.strip()]
+    requested = websocket.query_params.get("encoding", JSON_ENCODING)
+    for encoding in (MSGPACK_ENCODING, JSON_ENCODING):
+        if encoding in ENCODERS and (encoding in offered or encoding == requested):
+            return encoding, encoding if encoding in offered else None
+    return JSON_ENCODING, None
+
+
+_UNDECODED = object()
+# Queue key of resync frames; never equal to a broadcast's coalesce key
+_RESYNC = object()
+
+
+class Frame:
+    """A message encoded at most once per wire encoding, however many clients it is sent to."""
+
+    __slots__ = ("message", "_encoded")
+
+    def __init__(self, message: Any):
+        self.message = message
+        self._encoded: Dict[str, Any] = {}
+
+    @classmethod
+    def from_json(cls, text: str) -> "Frame":
+        """A frame for an already JSON-encoded message; it is only decoded if another encoding is needed."""
+        frame = cls(_UNDECODED)
+        frame._encoded[JSON_ENCODING] = text
+        return frame
+
+    def encoded(self, encoding: str):
+        data = self._encoded.get(encoding)
+        if data is None:
+            if self.message is _UNDECODED:
+                self.message = loads(self._encoded[JSON_ENCODING])
+            data = self._encoded[encoding] = ENCODERS[encoding](self.message)
+        return data
+
+
+class _Connection:
+    """One socket's bounded send queue and the task that drains it."""
+
+    __slots__ = ("websocket", "client_type", "encoding", "send", "queue", "ready", "writer", "closed")
+
+    def __init__(self, websocket: WebSocket, client_type: str, encoding: str):
+        self.websocket = websocket
+        self.client_type = client_type
+        self.encoding = encoding
+        self.send = websocket.send_text if encoding == JSON_ENCODING else websocket.send_bytes
+        # (coalesce_key, frame, enqueued_at)
+        self.queue: Deque[tuple] = deque()
+        self.ready = asyncio.Event()
+        self.writer: Optional[asyncio.Task] = None
+        self.closed = False
+
 
 class ConnectionManager:
-    def __init__(self):
+    """
+    Fans messages out to WebSocket clients grouped by client type.
+
+    Broadcasting never awaits a socket: each message is appended to every
+    subscriber's bounded send queue and a dedicated writer task per
+    connection drains it, so one client on a bad network only delays
+    itself. When a queue is full the client type's slow-consumer policy
+    applies: ``drop`` discards the oldest queued message, ``coalesce``
+    replaces a queued message with the same coalesce key (dropping the
+    oldest when there is none), and ``disconnect`` closes the socket with
+    code 1013 so the client reconnects and resynchronises. A send that
+    takes longer than ``send_timeout`` is treated as a dead connection.
+
+    Resyncs (a greeting, or ``send_all``) are queued whatever the bound, but
+    a connection has at most one pending: a new resync takes the place of
+    what is still queued of the last, so a queue never holds more than
+    ``queue_size`` messages plus one resync.
+
+    Each message is wrapped in a ``Frame`` once, so it is encoded once per
+    wire encoding in use rather than once per subscriber. A client type may
+    have a sequencer that every broadcast to it passes through first (see
+    ``backend.player_sync``).
+    """
+
+    def __init__(self, queue_size: int = SEND_QUEUE_SIZE, send_timeout: float = SEND_TIMEOUT,
+                 policy: str = SLOW_CONSUMER_POLICY, policies: Optional[Dict[str, str]] = None):
         self.active_connections: Dict[str, Set[WebSocket]] = {
             'player': set(),
             'signage': set(),
             'system': set(),
             'upload': set()
         }
+        self.queue_size = queue_size
+        self.send_timeout = send_timeout
+        self.policy = policy if policy in SLOW_CONSUMER_POLICIES else COALESCE
+        self.policies = dict(policies or {})
+        self._connections: Dict[WebSocket, _Connection] = {}
+        self.sequencers: Dict[str, Callable[[Frame], Frame]] = {}
+        self._latency_ms: Deque[float] = deque(maxlen=LATENCY_SAMPLES)
+        self.stats = {
+            "enqueued": 0, "sent": 0, "dropped": 0, "coalesced": 0,
+            "slow_disconnects": 0, "send_errors": 0, "send_timeouts": 0, "max_queue_depth": 0,
+            "resyncs_replaced": 0,
+        }
 
-    async def connect(self, websocket: WebSocket, client_type: str):
-        await websocket.accept()
+    async def connect(self, websocket: WebSocket, client_type: str, encoding: str = JSON_ENCODING, subprotocol: Optional[str] = None,
+                      greeting: Optional[Callable[[], Iterable[Any]]] = None):
+        """
+        Accept and register a socket. ``greeting`` is called after the
+        handshake and its messages are queued before the socket can receive
+        any broadcast.
+        """
+        await websocket.accept(subprotocol=subprotocol)
+        connection = _Connection(websocket, client_type, encoding if encoding in ENCODERS else JSON_ENCODING)
+        if greeting is not None:
+            self._prime(connection, greeting())
         if client_type not in self.active_connections:
             self.active_connections[client_type] = set()
         self.active_connections[client_type].add(websocket)
+        connection.writer = asyncio.create_task(self._write(connection))
+        self._connections[websocket] = connection
 
     def disconnect(self, websocket: WebSocket, client_type: str):
-        self.active_connections[client_type].remove(websocket)
+        self.active_connections.get(client_type, set()).discard(websocket)
+        connection = self._connections.pop(websocket, None)
+        if connection is not None:
+            connection.closed = True
+            connection.queue.clear()
+            connection.ready.set()
+            if connection.writer is not None and connection.writer is not asyncio.current_task():
+                connection.writer.cancel()
 
-    async def broadcast_to_type(self, message: Any, client_type: str):
-        if client_type in self.active_connections:
-            dead_connections = set()
-            for connection in self.active_connections[client_type]:
-                try:
-                    await connection.send_json(message)
-                except:
-                    dead_connections.add(connection)
-            
-            # Clean up dead connections
-            for dead in dead_connections:
-                self.active_connections[client_type].remove(dead)
-
-    async def broadcast(self, message: Any):
+    def _enqueue(self, connection: _Connection, frame: Frame, coalesce_key: Optional[str]):
+        if connection.closed:
+            return
+        queue = connection.queue
+        if len(queue) >= self.queue_size:
+            policy = self.policies.get(connection.client_type, self.policy)
+            if policy == DISCONNECT:
+                self._close_slow(connection)
+                return
+            replaced = False
+            if policy == COALESCE and coalesce_key is not None:
+                for i, (key, _, enqueued_at) in enumerate(queue):
+                    if key == coalesce_key:
+                        # Keep the superseded message's place (and age) in the queue
+                        queue[i] = (coalesce_key, frame, enqueued_at)
+                        replaced = True
+                        break
+            if replaced:
+                self.stats["coalesced"] += 1
+                return
+            queue.popleft()
+            self.stats["dropped"] += 1
+        queue.append((coalesce_key, frame, time.perf_counter()))
+        self.stats["enqueued"] += 1
+        if len(queue) > self.stats["max_queue_depth"]:
+            self.stats["max_queue_depth"] = len(queue)
+        connection.ready.set()
+
+    def _prime(self, connection: _Connection, messages: Iterable[Any]):
+        # Resync messages bypass the queue bound: they are what a client
+        # that fell behind needs to catch up
+        now = time.perf_counter()
+        frames = [(_RESYNC, message if isinstance(message, Frame) else Frame(message), now) for message in messages]
+        queue = connection.queue
+        first = next((i for i, (key, _, _) in enumerate(queue) if key is _RESYNC), None)
+        if first is None:
+            queue.extend(frames)
+        else:
+            # The new resync brings the client at least as far as the
+            # pending one, so it goes in its place; messages queued since
+            # stay behind it
+            later = [entry for entry in islice(queue, first, None) if entry[0] is not _RESYNC]
+            for _ in range(len(queue) - first):
+                queue.pop()
+            queue.extend(frames)
+            queue.extend(later)
+            self.stats["resyncs_replaced"] += 1
+        self.stats["enqueued"] += len(frames)
+        connection.ready.set()
+
+    def _close_slow(self, connection: _Connection):
+        self.stats["slow_disconnects"] += 1
+        logger.info("Disconnecting slow %s WebSocket client (%d messages queued)", connection.client_type, len(connection.queue))
+        self.disconnect(connection.websocket, connection.client_type)
+        asyncio.create_task(self._close(connection.websocket, SLOW_CONSUMER_CLOSE_CODE))
+
+    async def _close(self, websocket: WebSocket, code: int):
+        try:
+            await asyncio.wait_for(websocket.close(code=code), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _write(self, connection: _Connection):
+        queue = connection.queue
+        while True:
+            while not queue:
+                if connection.closed:
+                    return
+                connection.ready.clear()
+                await connection.ready.wait()
+            _, frame, enqueued_at = queue.popleft()
+            try:
+                # asyncio.timeout rather than wait_for: no extra task per send
+                async with asyncio.timeout(self.send_timeout):
+                    await connection.send(frame.encoded(connection.encoding))
+            except asyncio.TimeoutError:
+                self.stats["send_timeouts"] += 1
+                self.disconnect(connection.websocket, connection.client_type)
+                await self._close(connection.websocket, SLOW_CONSUMER_CLOSE_CODE)
+                return
+            except Exception:
+                self.stats["send_errors"] += 1
+                self.disconnect(connection.websocket, connection.client_type)
+                return
+            self.stats["sent"] += 1
+            self._latency_ms.append((time.perf_counter() - enqueued_at) * 1000)
+
+    async def send(self, websocket: WebSocket, message: Any, coalesce_key: Optional[str] = None):
+        """Queue a message for one client, behind whatever was broadcast to it before."""
+        connection = self._connections.get(websocket)
+        if connection is not None:
+            self._enqueue(connection, message if isinstance(message, Frame) else Frame(message), coalesce_key)
+
+    async def send_all(self, websocket: WebSocket, messages: Iterable[Any]):
+        """Queue a resync (snapshot or replayed messages) for one client, whatever its queue bound."""
+        connection = self._connections.get(websocket)
+        if connection is not None and not connection.closed:
+            self._prime(connection, messages)
+
+    async def broadcast_to_type(self, message: Any, client_type: str, coalesce_key: Optional[str] = None):
+        """Queue a message for every client of a type; returns without waiting for any socket."""
+        frame = message if isinstance(message, Frame) else Frame(message)
+        sequencer = self.sequencers.get(client_type)
+        if sequencer is not None:
+            frame = sequencer(frame)
+        for websocket in list(self.active_connections.get(client_type, ())):
+            connection = self._connections.get(websocket)
+            if connection is not None:
+                self._enqueue(connection, frame, coalesce_key)
+
+    async def broadcast(self, message: Any, coalesce_key: Optional[str] = None):
+        frame = Frame(message)
         for client_type in self.active_connections:
-            await self.broadcast_to_type(message, client_type)
+            await self.broadcast_to_type(frame, client_type, coalesce_key)
+
+    async def close(self):
+        """Stop every writer task (on shutdown)."""
+        writers = [connection.writer for connection in self._connections.values() if connection.writer is not None]
+        for connection in list(self._connections.values()):
+            self.disconnect(connection.websocket, connection.client_type)
+        await asyncio.gather(*writers, return_exceptions=True)
+
+    def snapshot(self) -> dict:
+        latencies = sorted(self._latency_ms)
+
+        def percentile(p):
+            return round(latencies[min(len(latencies) - 1, int(p * len(latencies)))], 3) if latencies else None
+
+        depths = [len(connection.queue) for connection in self._connections.values()]
+        encodings: Dict[str, int] = {}
+        for connection in self._connections.values():
+            encodings[connection.encoding] = encodings.get(connection.encoding, 0) + 1
+        return {
+            **self.stats,
+            "connections": {client_type: len(sockets) for client_type, sockets in self.active_connections.items()},
+            "encodings": encodings,
+            "queued": sum(depths),
+            "deepest_queue": max(depths, default=0),
+            "queue_size": self.queue_size,
+            "policy": {client_type: self.policies.get(client_type, self.policy) for client_type in self.active_connections},
+            "send_latency_ms_p50": percentile(0.50),
+            "send_latency_ms_p99": percentile(0.99),
+        }
+
+class LocalFanout:
+    """Delivers broadcasts to this worker's sockets only (a single worker process)."""
+
+    def __init__(self, manager: ConnectionManager):
+        self.manager = manager
+
+    async def broadcast_to_type(self, message: Any, client_type: str, coalesce_key: Optional[str] = None):
+        await self.manager.broadcast_to_type(message, client_type, coalesce_key)
+
+    async def broadcast(self, message: Any, coalesce_key: Optional[str] = None):
+        await self.manager.broadcast(message, coalesce_key)
+
+    def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def snapshot(self) -> dict:
+        return {"backend": "local"}
+
+
+def pack_envelope(message: Any, coalesce_key: Optional[str] = None) -> str:
+    """``<coalesce_key>\\n<message as JSON>``: the JSON part is sent to clients as is."""
+    return f"{coalesce_key or ''}\n{dumps(message).decode()}"
+
+
+def unpack_envelope(data) -> Tuple[Optional[str], str]:
+    if isinstance(data, bytes):
+        data = data.decode()
+    coalesce_key, _, text = data.partition("\n")
+    return coalesce_key or None, text
+
+
+class RedisFanout:
+    """
+    Fans broadcasts out to the sockets of every worker through Redis pub/sub.
+
+    A broadcast is encoded to JSON once and published on
+    ``ws:<client_type>``. Each worker, the publisher included, holds one
+    pattern subscription to ``ws:*`` and hands every message to its own
+    ``ConnectionManager`` as a ready-made JSON frame, so receiving workers do
+    not encode it again for JSON clients (MessagePack clients cost one
+    decode and encode per worker). Redis delivers a channel's messages in
+    publish order and the subscriber applies them one at a time, so order
+    per client type is preserved.
+
+    Pub/sub is fire-and-forget: a worker cut off from Redis misses what is
+    published meanwhile and resubscribes after ``FANOUT_RECONNECT_DELAY``.
+    If publishing fails the broadcast is delivered to this worker's sockets
+    only.
+    """
+
+    def __init__(self, manager: ConnectionManager, redis=redis_client, prefix: str = FANOUT_CHANNEL_PREFIX):
+        self.manager = manager
+        self.redis = redis
+        self.prefix = prefix
+        self.subscribed = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self.stats = {"published": 0, "received": 0, "publish_errors": 0, "resubscribes": 0}
+
+    async def _publish(self, client_types, message: Any, coalesce_key: Optional[str]):
+        payload = pack_envelope(message, coalesce_key)
+        try:
+            for client_type in client_types:
+                await self.redis.publish(self.prefix + client_type, payload)
+                self.stats["published"] += 1
+        except RedisError:
+            self.stats["publish_errors"] += 1
+            logger.warning("Could not publish WebSocket broadcast; delivering to this worker only", exc_info=True)
+            frame = Frame.from_json(unpack_envelope(payload)[1])
+            for client_type in client_types:
+                await self.manager.broadcast_to_type(frame, client_type, coalesce_key)
+
+    async def broadcast_to_type(self, message: Any, client_type: str, coalesce_key: Optional[str] = None):
+        await self._publish([client_type], message, coalesce_key)
+
+    async def broadcast(self, message: Any, coalesce_key: Optional[str] = None):
+        await self._publish(list(self.manager.active_connections), message, coalesce_key)
+
+    async def deliver(self, channel, data):
+        """Hand one published message to this worker's sockets."""
+        if isinstance(channel, bytes):
+            channel = channel.decode()
+        coalesce_key, text = unpack_envelope(data)
+        self.stats["received"] += 1
+        await self.manager.broadcast_to_type(Frame.from_json(text), channel[len(self.prefix):], coalesce_key)
+
+    async def _listen(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.psubscribe(self.prefix + "*")
+                self.subscribed.set()
+                async for item in pubsub.listen():
+                    if item["type"] == "pmessage":
+                        await self.deliver(item["channel"], item["data"])
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.warning("WebSocket fan-out subscription lost; resubscribing", exc_info=True)
+            finally:
+                self.subscribed.clear()
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+            self.stats["resubscribes"] += 1
+            await asyncio.sleep(FANOUT_RECONNECT_DELAY)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def snapshot(self) -> dict:
+        return {**self.stats, "backend": "redis", "subscribed": self.subscribed.is_set()}
+
+
+FANOUT_BACKENDS = {"local": LocalFanout, "redis": RedisFanout}
+
 
 class WebSocketEventHandler:
-    def __init__(self):
+    """
+    Routes application events to WebSocket clients.
+
+    Events go out through ``fanout`` (``WS_FANOUT``): ``local`` reaches this
+    worker's sockets, ``redis`` every worker's. Use ``manager`` directly only
+    for messages every worker produces on its own.
+    """
+
+    def __init__(self, fanout: str = FANOUT):
         self.manager = ConnectionManager()
+        self.fanout = FANOUT_BACKENDS.get(fanout, LocalFanout)(self.manager)
         self.event_handlers = {
             'player': self._handle_player_event,
             'signage': self._handle_signage_event,
@@ -51,28 +468,28 @@ class WebSocketEventHandler:
         event_type = event.get('type')
         if event_type == 'play':
             # Handle play event
-            await self.manager.broadcast_to_type({
+            await self.fanout.broadcast_to_type({
                 'type': 'player_status',
                 'status': 'playing',
                 'track': event.get('track')
-            }, 'player')
+            }, 'player', coalesce_key='player_status')
         # Add other player event handlers
 
     async def _handle_signage_event(self, event: dict):
         event_type = event.get('type')
         if event_type == 'content_update':
             # Handle content update
-            await self.manager.broadcast_to_type({
+            await self.fanout.broadcast_to_type({
                 'type': 'signage_update',
                 'content': event.get('content')
-            }, 'signage')
+            }, 'signage', coalesce_key='signage_update')
         # Add other signage event handlers
 
     async def _handle_system_event(self, event: dict):
         event_type = event.get('type')
         if event_type == 'alert':
             # Handle system alert
-            await self.manager.broadcast({
+            await self.fanout.broadcast({
                 'type': 'system_alert',
                 'message': event.get('message'),
                 'level': event.get('level')
@@ -82,3 +499,6 @@ class WebSocketEventHandler:
     async def handle_event(self, event_type: str, event: dict):
         if event_type in self.event_handlers:
             await self.event_handlers[event_type](event)
+
+# Shared by the HTTP routes that push real-time updates to connected clients
+event_handler = WebSocketEventHandler()
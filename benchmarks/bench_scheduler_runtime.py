@@ -0,0 +1,69 @@
+"""
+Drive the scheduler runtime with thousands of short schedule entries spread
+over many venues, in-process and without a database, and report how late
+transitions fire relative to their scheduled boundary.
+
+    python benchmarks/bench_scheduler_runtime.py [venues] [entries_per_venue] [seconds]
+
+Fails (exit 1) if any scheduled transition drifts by 50 ms or more.
+"""
+import asyncio
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend.schedule_index import ScheduleIndex
+from backend.scheduler_runtime import SchedulerRuntime
+
+VENUES = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+PER_VENUE = int(sys.argv[2]) if len(sys.argv) > 2 else 10
+SECONDS = float(sys.argv[3]) if len(sys.argv) > 3 else 5.0
+MAX_DRIFT_MS = 50
+
+
+class CountingManager:
+    def __init__(self):
+        self.messages = 0
+
+    async def broadcast_to_type(self, message, client_type):
+        self.messages += 1
+
+
+async def main():
+    now = datetime.now(timezone.utc) + timedelta(seconds=0.5)
+    slot = SECONDS / PER_VENUE
+    index = ScheduleIndex()
+    index.build(
+        {
+            "id": f"{venue}-{i}", "venue": f"venue-{venue}", "playlist_id": f"playlist-{i}", "description": None,
+            # Back-to-back entries, staggered per venue so boundaries spread out
+            "start_time": now + timedelta(seconds=i * slot + venue * slot / VENUES),
+            "end_time": now + timedelta(seconds=(i + 1) * slot + venue * slot / VENUES),
+        }
+        for venue in range(VENUES) for i in range(PER_VENUE)
+    )
+    manager = CountingManager()
+    runtime = SchedulerRuntime(index=index, manager=manager)
+    started = time.perf_counter()
+    runtime.start()
+    await asyncio.sleep(SECONDS + slot + 1.0)
+    await runtime.stop()
+    elapsed = time.perf_counter() - started
+
+    stats = runtime.snapshot()
+    expected = VENUES * (PER_VENUE + 1)
+    print(f"{VENUES * PER_VENUE:,} entries across {VENUES:,} venues in {elapsed:.1f}s")
+    print(f"transitions {stats['transitions']:,}/{expected:,}  broadcasts {manager.messages:,}  "
+          f"timers armed {stats['timers_armed']:,}  stale {stats['stale_timers']:,}")
+    print(f"drift ms p50={stats['drift_ms_p50']} p99={stats['drift_ms_p99']} max={stats['max_drift_ms']}")
+    if stats["transitions"] != expected or stats["max_drift_ms"] >= MAX_DRIFT_MS:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,129 @@
+"""
+Measure the CPU cost of one WebSocket broadcast to many connections,
+in-process with no-op sockets, comparing:
+
+- per-socket:  the previous fan-out — ``send_json`` (a ``json.dumps``) awaited
+               on each socket in turn
+- json:        ``ConnectionManager.broadcast_to_type`` with every client on
+               JSON text frames (encoded once, written by per-socket tasks)
+- msgpack:     the same with every client on MessagePack binary frames
+
+    python benchmarks/bench_ws_broadcast.py [connections,...] [repeats]
+
+Reports CPU ms per broadcast (best of ``repeats``) and how many times the
+message was encoded. Fails (exit 1) if the manager encodes a broadcast more
+than once per encoding.
+"""
+import asyncio
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from backend import websocket_manager
+from backend.websocket_manager import JSON_ENCODING, MSGPACK_ENCODING, ConnectionManager
+
+SIZES = [int(n) for n in sys.argv[1].split(",")] if len(sys.argv) > 1 else [1000, 5000, 10000]
+REPEATS = int(sys.argv[2]) if len(sys.argv) > 2 else 5
+
+# A busy vote flush: 50 rank changes
+MESSAGE = {"type": "queue_votes", "changes": [[f"track-{i:05d}", 100 - i, i + 1] for i in range(50)]}
+
+
+class Delivery:
+    """Counts frames written and signals when a broadcast reached every socket."""
+
+    def __init__(self):
+        self.remaining = 0
+        self.done = asyncio.Event()
+
+    def expect(self, n):
+        self.remaining = n
+        self.done.clear()
+
+    def delivered(self):
+        self.remaining -= 1
+        if self.remaining == 0:
+            self.done.set()
+
+
+class NullSocket:
+    def __init__(self, delivery):
+        self.delivery = delivery
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.delivery.delivered()
+
+    async def send_bytes(self, data):
+        self.delivery.delivered()
+
+    async def send_json(self, data):
+        # What Starlette's WebSocket.send_json does before sending
+        self.delivery.delivered() if json.dumps(data, separators=(",", ":"), ensure_ascii=False) else None
+
+
+def count_encodes():
+    counts = {name: 0 for name in websocket_manager.ENCODERS}
+    for name, encode in list(websocket_manager.ENCODERS.items()):
+        def counted(message, name=name, encode=encode):
+            counts[name] += 1
+            return encode(message)
+        websocket_manager.ENCODERS[name] = counted
+    return counts
+
+
+async def per_socket(n):
+    delivery = Delivery()
+    sockets = [NullSocket(delivery) for _ in range(n)]
+    best = float("inf")
+    for _ in range(REPEATS):
+        delivery.expect(n)
+        started = time.process_time()
+        for socket in sockets:
+            await socket.send_json(MESSAGE)
+        best = min(best, time.process_time() - started)
+    return best
+
+
+async def managed(n, encoding, counts):
+    delivery = Delivery()
+    manager = ConnectionManager(queue_size=max(64, REPEATS))
+    for _ in range(n):
+        await manager.connect(NullSocket(delivery), "player", encoding)
+    before = counts.get(encoding, 0)
+    best = float("inf")
+    for _ in range(REPEATS):
+        delivery.expect(n)
+        started = time.process_time()
+        await manager.broadcast_to_type(MESSAGE, "player")
+        await delivery.done.wait()
+        best = min(best, time.process_time() - started)
+    await manager.close()
+    return best, counts.get(encoding, 0) - before
+
+
+async def main():
+    counts = count_encodes()
+    encodings = [JSON_ENCODING] + ([MSGPACK_ENCODING] if MSGPACK_ENCODING in websocket_manager.ENCODERS else [])
+    failed = False
+    print(f"message {len(json.dumps(MESSAGE))} bytes as JSON, best of {REPEATS}")
+    for n in SIZES:
+        line = [f"{n:>6,} connections  per-socket {await per_socket(n) * 1000:7.2f} ms"]
+        for encoding in encodings:
+            cpu, encodes = await managed(n, encoding, counts)
+            line.append(f"{encoding} {cpu * 1000:7.2f} ms ({encodes} encodes)")
+            failed |= encodes != REPEATS
+        print("  ".join(line))
+    if failed:
+        print("FAIL")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
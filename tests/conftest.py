@@ -1,3 +1,6 @@
 import sys
 import os
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+# pytest_plugins is only honoured in the rootdir conftest, so the plugin's hooks are imported instead
+from tests.query_budget import pytest_configure, pytest_runtest_call  # noqa: E402,F401
@@ -0,0 +1,62 @@
+"""
+Pytest plugin enforcing per-test SQL budgets; its hooks are imported by
+``tests/conftest.py``.
+
+Every query a test issues, directly or through HTTP requests to the app, is
+counted per request and grouped by statement fingerprint. A test fails when a
+fingerprint repeats more than ``max_repeats`` times within one request (an
+N+1), or when a request exceeds ``max_queries``:
+
+    @pytest.mark.query_budget(2)                  # at most 2 queries per request
+    @pytest.mark.query_budget(max_repeats=10)     # loosen the N+1 threshold
+"""
+import pytest
+
+from backend.infrastructure import db_metrics
+
+DEFAULT_MAX_REPEATS = db_metrics.NPLUSONE_THRESHOLD
+
+
+def pytest_configure(config):
+    config.addinivalue_line(
+        "markers",
+        "query_budget(max_queries=None, max_repeats=5): SQL statements allowed per request, and per fingerprint",
+    )
+
+
+def budget_violations(label: str, stats: dict, max_queries, max_repeats) -> list:
+    problems = []
+    if max_queries is not None and stats["queries"] > max_queries:
+        problems.append(f"{label}: {stats['queries']} queries, budget is {max_queries}")
+    for normalized, count in db_metrics.repeated_fingerprints(stats, max_repeats):
+        problems.append(f"{label}: {count} x {normalized[:300]}")
+    return problems
+
+
+@pytest.hookimpl(wrapper=True)
+def pytest_runtest_call(item):
+    marker = item.get_closest_marker("query_budget")
+    max_queries = None
+    max_repeats = DEFAULT_MAX_REPEATS
+    if marker is not None:
+        max_queries = marker.kwargs.get("max_queries", marker.args[0] if marker.args else None)
+        max_repeats = marker.kwargs.get("max_repeats", DEFAULT_MAX_REPEATS)
+
+    requests = []
+
+    def observe(scope, stats):
+        requests.append((f"{scope.get('method')} {scope.get('path')}", stats))
+
+    db_metrics.add_request_observer(observe)
+    try:
+        with db_metrics.track_queries() as direct:
+            result = yield
+    finally:
+        db_metrics.remove_request_observer(observe)
+
+    problems = []
+    for label, stats in requests + [("test body", direct)]:
+        problems.extend(budget_violations(label, stats, max_queries, max_repeats))
+    if problems:
+        pytest.fail("SQL query budget exceeded:\n  " + "\n  ".join(problems), pytrace=False)
+    return result
@@ -1,9 +1,13 @@
 
+import pytest
 from fastapi.testclient import TestClient
 from backend.main import app
 
 client = TestClient(app)
 
+# Device controls are served from memory
+pytestmark = pytest.mark.query_budget(0)
+
 def test_system_status():
     response = client.get("/system/status")
     assert response.status_code == 200
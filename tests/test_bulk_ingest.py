@@ -0,0 +1,90 @@
+import asyncio
+import uuid
+from datetime import timedelta
+
+import pytest
+from sqlalchemy.exc import IntegrityError
+
+from backend import bulk_ingest
+from backend.api import TrackCreate
+from backend.bulk_ingest import _STAGING_DDL, BulkIngestReport, iter_lines, iter_records, to_copy_record
+
+async def _chunks(*parts):
+    for part in parts:
+        yield part
+
+async def _collect(body_parts, fmt):
+    return [row async for row in iter_records(iter_lines(_chunks(*body_parts)), fmt)]
+
+def test_lines_split_across_chunks():
+    body = ['{"title": "One More Ti', 'me", "storage_url": "r2://a"}\n{"title"', ': "Digital Love", "storage_url": "r2://b"}']
+    rows = asyncio.run(_collect([part.encode() for part in body], "ndjson"))
+    assert [(row_no, record["title"]) for row_no, record, _ in rows] == [(1, "One More Time"), (2, "Digital Love")]
+
+def test_malformed_rows_are_reported_not_fatal():
+    body = b'{"title": "ok", "storage_url": "r2://a"}\nnot json\n[1, 2]\n'
+    rows = asyncio.run(_collect([body], "ndjson"))
+    assert rows[0][2] is None
+    assert rows[1][2].startswith("Malformed row")
+    assert rows[2][2].startswith("Malformed row")
+
+def test_csv_rows_become_copy_records():
+    body = b"title,artist,bpm,storage_url,is_public\r\nAround the World,Daft Punk,121,r2://atw,false\r\n"
+    (row_no, record, error), = asyncio.run(_collect([body], "csv"))
+    assert error is None
+    copy_record = to_copy_record(row_no, record, TrackCreate)
+    assert copy_record[:2] == (1, "Around the World")
+    assert copy_record[5] == 121
+    assert copy_record[-1] is False
+
+def test_copy_records_match_the_migrated_column_types():
+    uploader = "6f1c2d3e-4b5a-4c6d-8e7f-9a0b1c2d3e4f"
+    record = {"title": "Veridis Quo", "duration": 345, "uploaded_by": uploader, "storage_url": "r2://vq"}
+    copy_record = to_copy_record(1, record, TrackCreate)
+    assert copy_record[4] == timedelta(seconds=345)
+    assert copy_record[9] == uuid.UUID(uploader)
+    assert "FROM tracks WITH NO DATA" in _STAGING_DDL
+
+def test_malformed_uploader_is_a_row_error():
+    with pytest.raises(ValueError):
+        to_copy_record(1, {"title": "x", "uploaded_by": "7", "storage_url": "r2://x"}, TrackCreate)
+
+def test_rejected_rows_are_isolated_and_the_rest_committed(monkeypatch):
+    class Session:
+        rollbacks = 0
+
+        async def rollback(self):
+            self.rollbacks += 1
+
+    committed = []
+
+    async def load_batch(db, batch, report, on_inserted):
+        # Rows 5 and 6 reference a user that does not exist
+        if any(record[0] in (5, 6) for record in batch):
+            raise IntegrityError("INSERT INTO tracks", {}, Exception("violates foreign key constraint"))
+        committed.extend(record[0] for record in batch)
+        report.inserted += len(batch)
+
+    monkeypatch.setattr(bulk_ingest, "_load_batch", load_batch)
+    report, db = BulkIngestReport(), Session()
+    asyncio.run(bulk_ingest._flush(db, [(row_no, "title") for row_no in range(1, 17)], report, None))
+    assert committed == [n for n in range(1, 17) if n not in (5, 6)]
+    assert report.inserted == 14
+    assert [error["row"] for error in report.errors] == [5, 6]
+    assert report.errors[0]["error"].startswith("Rejected by the database")
+
+def test_lost_connection_fails_the_batch_without_retrying(monkeypatch):
+    class Session:
+        async def rollback(self):
+            pass
+
+    calls = []
+
+    async def load_batch(db, batch, report, on_inserted):
+        calls.append(len(batch))
+        raise ConnectionResetError("connection lost")
+
+    monkeypatch.setattr(bulk_ingest, "_load_batch", load_batch)
+    report = BulkIngestReport()
+    asyncio.run(bulk_ingest._flush(Session(), [(row_no, "title") for row_no in range(1, 9)], report, None))
+    assert calls == [8] and report.error_count == 8
@@ -0,0 +1,192 @@
+import asyncio
+
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.infrastructure import replicas as routing
+from backend.infrastructure.cache import ReadThroughCache
+from backend.infrastructure.models import Track
+from backend.infrastructure.replicas import ReplicaSet, RoutingSession
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.ops = []
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+    def incr(self, key):
+        self.ops.append(key)
+
+    async def execute(self):
+        for key in self.ops:
+            self.redis.data[key] = str(int(self.redis.data.get(key, "0")) + 1)
+
+
+class FakeRedis:
+    """Just enough of redis.asyncio for the cache, including its read script."""
+
+    def __init__(self):
+        self.data = {}
+        self.down = False
+
+    def register_script(self, script):
+        async def get(keys, args):
+            if self.down:
+                raise RedisConnectionError("redis unavailable")
+            generation = ".".join(self.data.get(key, "0") for key in keys)
+            key = f"{args[0]}:{generation}:{args[1]}"
+            return [generation, key, self.data.get(key)]
+        return get
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+
+class Loader:
+    def __init__(self, value):
+        self.value = value
+        self.calls = 0
+
+    async def __call__(self):
+        self.calls += 1
+        return self.value
+
+
+def test_second_read_is_a_hit_and_invalidation_reloads():
+    cache = ReadThroughCache(redis=FakeRedis())
+    loader = Loader({"id": 1, "title": "Intro"})
+
+    async def scenario():
+        assert await cache.get_or_load("track:1", "detail", loader) == {"id": 1, "title": "Intro"}
+        await cache.get_or_load("track:1", "detail", loader)
+        assert loader.calls == 1
+        await cache.invalidate("track:1")
+        await cache.get_or_load("track:1", "detail", loader)
+        assert loader.calls == 2
+
+    asyncio.run(scenario())
+    assert cache.stats["misses"] == 2
+    assert cache.stats["local_hits"] == 1
+
+def test_redis_tier_serves_other_workers():
+    redis = FakeRedis()
+    writer, reader = ReadThroughCache(redis=redis), ReadThroughCache(redis=redis)
+    loader = Loader([1, 2, 3])
+
+    async def scenario():
+        await writer.get_or_load("tracks", "page", loader)
+        assert await reader.get_or_load("tracks", "page", loader) == [1, 2, 3]
+
+    asyncio.run(scenario())
+    assert loader.calls == 1
+    assert reader.stats["redis_hits"] == 1
+
+def test_load_that_raced_an_invalidation_is_not_kept_locally():
+    cache = ReadThroughCache(redis=FakeRedis())
+    loaded, written = asyncio.Event(), asyncio.Event()
+
+    async def slow_loader():
+        loaded.set()
+        await written.wait()
+        return {"title": "before the write"}
+
+    async def scenario():
+        read = asyncio.create_task(cache.get_or_load("track:1", "detail", slow_loader, depends_on=("tracks",)))
+        await loaded.wait()
+        await cache.invalidate("tracks")
+        written.set()
+        assert await read == {"title": "before the write"}
+        return await cache.get_or_load("track:1", "detail", Loader({"title": "after the write"}), depends_on=("tracks",))
+
+    assert asyncio.run(scenario()) == {"title": "after the write"}
+    assert cache.stats["local_hits"] == 0
+
+def test_invalidation_only_touches_named_scopes():
+    cache = ReadThroughCache(redis=FakeRedis(), local_ttl=0)
+    tracks, playlist = Loader("tracks"), Loader("playlist")
+
+    async def scenario():
+        await cache.get_or_load("tracks", "page", tracks)
+        await cache.get_or_load("playlist:p1", "base", playlist)
+        await cache.invalidate("playlist:p1")
+        await cache.get_or_load("tracks", "page", tracks)
+        await cache.get_or_load("playlist:p1", "base", playlist)
+
+    asyncio.run(scenario())
+    assert tracks.calls == 1
+    assert playlist.calls == 2
+
+def test_dependent_scopes_invalidate_the_value():
+    cache = ReadThroughCache(redis=FakeRedis())
+    display_a, display_b = Loader("a"), Loader("b")
+
+    async def scenario():
+        await cache.get_or_load("signage:display:a", "timeline", display_a, depends_on=("signage",))
+        await cache.get_or_load("signage:display:b", "timeline", display_b, depends_on=("signage",))
+        await cache.invalidate("signage:display:a")
+        await cache.get_or_load("signage:display:a", "timeline", display_a, depends_on=("signage",))
+        await cache.get_or_load("signage:display:b", "timeline", display_b, depends_on=("signage",))
+        await cache.invalidate("signage")
+        await cache.get_or_load("signage:display:a", "timeline", display_a, depends_on=("signage",))
+        await cache.get_or_load("signage:display:b", "timeline", display_b, depends_on=("signage",))
+
+    asyncio.run(scenario())
+    assert display_a.calls == 3
+    assert display_b.calls == 2
+
+def test_local_tier_is_bounded_lru():
+    cache = ReadThroughCache(redis=FakeRedis(), local_max_entries=2)
+
+    async def scenario():
+        for suffix in ("a", "b", "c"):
+            await cache.get_or_load("tracks", suffix, Loader(suffix))
+
+    asyncio.run(scenario())
+    assert list(cache._local) == [("tracks", "b"), ("tracks", "c")]
+
+def test_redis_outage_falls_back_to_loader():
+    redis = FakeRedis()
+    redis.down = True
+    cache = ReadThroughCache(redis=redis)
+    loader = Loader("value")
+
+    assert asyncio.run(cache.get_or_load("tracks", "page", loader)) == "value"
+    assert cache.stats["errors"] == 1
+    assert cache.snapshot()["local_entries"] == 0
+
+def test_loads_after_a_write_are_not_cached_from_a_lagging_replica():
+    # Engines connect lazily; the stand-in replica answers with the row as it was before the write
+    primary = create_async_engine("postgresql+asyncpg://app@primary/djamms")
+    replica = create_async_engine("postgresql+asyncpg://app@replica/djamms")
+    session = sessionmaker(primary, class_=AsyncSession, sync_session_class=RoutingSession, replicas=ReplicaSet([replica]))()
+    rows = {"primary": "Intro", "replica": "Intro"}
+    cache = ReadThroughCache(redis=FakeRedis())
+
+    async def load_track():
+        return {"title": rows[session.sync_session.get_bind(clause=select(Track)).url.host]}
+
+    async def scenario():
+        # Requests from clients that have not written run read-only
+        token = routing._read_only.set(True)
+        try:
+            await cache.get_or_load("track:1", "detail", load_track)
+            rows["primary"] = "Intro (Remastered)"
+            await cache.invalidate("track:1")
+            assert await cache.get_or_load("track:1", "detail", load_track) == {"title": "Intro (Remastered)"}
+            # Reads outside the cache still go to the replica
+            assert session.sync_session.get_bind(clause=select(Track)).url.host == "replica"
+        finally:
+            routing._read_only.reset(token)
+
+    asyncio.run(scenario())
@@ -0,0 +1,76 @@
+import asyncio
+
+from backend.infrastructure import db_metrics
+from backend.infrastructure.database import engine, engine_options
+from backend.infrastructure.db_metrics import DBMetricsMiddleware, InstrumentedQueuePool, PoolMetrics, QueryMetrics, fingerprint
+
+
+def test_fingerprint_ignores_literals_and_parameters():
+    a = fingerprint("SELECT * FROM tracks WHERE id = $1 AND genre = 'house' LIMIT 20")
+    b = fingerprint("SELECT *  FROM tracks\nWHERE id = $7 AND genre = 'disco' LIMIT 50")
+    assert a == b == "SELECT * FROM tracks WHERE id = ? AND genre = ? LIMIT ?"
+    assert fingerprint("SELECT 1 FROM t WHERE id IN ($1, $2, $3)") == fingerprint("SELECT 1 FROM t WHERE id IN ($1, $2)")
+
+def test_engine_options_come_from_environment(monkeypatch):
+    monkeypatch.setenv("DB_POOL_SIZE", "3")
+    monkeypatch.setenv("DB_POOL_PRE_PING", "false")
+    options = engine_options()
+    assert options["pool_size"] == 3
+    assert options["pool_pre_ping"] is False
+    assert options["echo"] is False
+
+def test_default_engine_uses_instrumented_pool():
+    assert isinstance(engine.sync_engine.pool, InstrumentedQueuePool)
+    assert engine.sync_engine.pool.metrics is db_metrics.pool_metrics
+
+def test_pool_wait_percentiles():
+    metrics = PoolMetrics()
+    for ms in range(1, 101):
+        metrics.record_wait(ms / 1000)
+    snapshot = metrics.snapshot()
+    assert snapshot["checkouts"] == 100
+    assert snapshot["wait_ms_p50"] == 51.0
+    assert snapshot["wait_ms_max"] == 100.0
+
+def test_slow_queries_are_grouped_by_fingerprint(monkeypatch):
+    monkeypatch.setattr(db_metrics, "SLOW_QUERY_MS", 10)
+    metrics = QueryMetrics()
+    metrics.record("SELECT * FROM tracks WHERE id = $1", 0.002)
+    metrics.record("SELECT * FROM tracks WHERE genre = 'a'", 0.050)
+    metrics.record("SELECT * FROM tracks WHERE genre = 'b'", 0.030)
+    snapshot = metrics.snapshot()
+    assert snapshot["queries"] == 3
+    assert snapshot["slow_queries"] == 2
+    assert len(snapshot["slowest"]) == 1
+    assert snapshot["slowest"][0]["count"] == 2
+
+def test_middleware_reports_request_query_counts(monkeypatch):
+    metrics = QueryMetrics()
+    monkeypatch.setattr(db_metrics, "query_metrics", metrics)
+
+    async def app(scope, receive, send):
+        metrics.record("SELECT 1", 0.001)
+        metrics.record("SELECT 2", 0.001)
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b""})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    outer = db_metrics.current_request_stats()
+    asyncio.run(DBMetricsMiddleware(app)({"type": "http"}, None, send))
+    headers = dict(sent[0]["headers"])
+    assert headers[b"x-db-queries"] == b"2"
+    assert db_metrics.current_request_stats() is outer
+
+def test_repeated_fingerprints_flag_n_plus_one():
+    with db_metrics.track_queries() as stats:
+        metrics = QueryMetrics()
+        metrics.record("SELECT * FROM playlists WHERE id = $1", 0.001)
+        for track_id in range(12):
+            metrics.record(f"SELECT * FROM tracks WHERE id = {track_id}", 0.001)
+    assert stats["queries"] == 13
+    assert db_metrics.repeated_fingerprints(stats, 5) == [("SELECT * FROM tracks WHERE id = ?", 12)]
+    assert db_metrics.repeated_fingerprints(stats, 20) == []
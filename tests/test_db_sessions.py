@@ -0,0 +1,79 @@
+import asyncio
+
+import pytest
+
+from backend.infrastructure import database
+from backend.infrastructure.db_metrics import DBMetricsMiddleware, PoolMetrics, current_request_stats
+
+
+class FakeSession:
+    def __init__(self):
+        self.calls = []
+
+    async def rollback(self):
+        self.calls.append("rollback")
+
+    async def close(self):
+        self.calls.append("close")
+
+
+def test_get_db_closes_after_success(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(database, "SessionLocal", lambda: session)
+
+    async def scenario():
+        dependency = database.get_db()
+        assert await dependency.__anext__() is session
+        with pytest.raises(StopAsyncIteration):
+            await dependency.__anext__()
+
+    asyncio.run(scenario())
+    assert session.calls == ["close"]
+
+def test_get_db_rolls_back_and_closes_on_error(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(database, "SessionLocal", lambda: session)
+
+    async def scenario():
+        dependency = database.get_db()
+        await dependency.__anext__()
+        with pytest.raises(RuntimeError):
+            await dependency.athrow(RuntimeError("endpoint failed"))
+
+    asyncio.run(scenario())
+    assert session.calls == ["rollback", "close"]
+
+def test_endpoints_no_longer_depend_on_sessionmaker():
+    from backend.main import app
+    for route in app.routes:
+        dependant = getattr(route, "dependant", None)
+        if dependant is None:
+            continue
+        assert all(dep.call is not database.SessionLocal for dep in dependant.dependencies), route.path
+
+def _run_request(app, pool):
+    async def send(message):
+        pass
+    asyncio.run(DBMetricsMiddleware(app, pool=pool)({"type": "http", "method": "GET", "path": "/tracks/1"}, None, send))
+
+def test_request_holding_a_connection_is_flagged():
+    pool = PoolMetrics()
+
+    async def leaky(scope, receive, send):
+        # What the pool checkout listener records for a connection that is never checked in
+        current_request_stats()["held"][1] = 0.0
+
+    _run_request(leaky, pool)
+    assert pool.leaks == 1
+    assert pool.snapshot()["recent_leaks"][0]["path"] == "/tracks/1"
+
+def test_returned_connection_is_not_a_leak():
+    pool = PoolMetrics()
+
+    async def tidy(scope, receive, send):
+        held = current_request_stats()["held"]
+        held[1] = 0.0
+        held.pop(1)
+
+    _run_request(tidy, pool)
+    assert pool.leaks == 0
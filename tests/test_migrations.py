@@ -0,0 +1,67 @@
+"""
+Data migrations run against a scratch Postgres database.
+
+Skipped unless ``TEST_DATABASE_URL`` points at a database that may be wiped
+(see tests/test_query_plans.py).
+"""
+import os
+
+import pytest
+from sqlalchemy import create_engine, make_url, text
+
+TEST_DATABASE_URL = os.getenv("TEST_DATABASE_URL")
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+pytestmark = pytest.mark.skipif(not TEST_DATABASE_URL, reason="TEST_DATABASE_URL not set")
+
+KEPT, LATER, LATEST, OTHER = (f"00000000-0000-0000-0000-00000000000{n}" for n in range(1, 5))
+PLAYLIST_A, PLAYLIST_B = "10000000-0000-0000-0000-000000000001", "10000000-0000-0000-0000-000000000002"
+
+
+@pytest.fixture
+def migrate():
+    from alembic import command
+    from alembic.config import Config
+
+    url = make_url(TEST_DATABASE_URL).set(drivername="postgresql+psycopg2")
+    engine = create_engine(url)
+    with engine.begin() as conn:
+        conn.execute(text("DROP SCHEMA public CASCADE"))
+        conn.execute(text("CREATE SCHEMA public"))
+
+    config = Config(os.path.join(ROOT, "backend", "migrations", "alembic.ini"))
+    config.set_main_option("script_location", os.path.join(ROOT, "backend", "migrations"))
+    config.set_main_option("sqlalchemy.url", url.render_as_string(hide_password=False).replace("%", "%%"))
+    yield engine, lambda revision: command.upgrade(config, revision)
+    engine.dispose()
+
+
+def test_duplicate_tracks_are_merged_into_the_oldest(migrate):
+    engine, upgrade = migrate
+    upgrade("d4e7a1b93f25")
+    with engine.begin() as conn:
+        for track_id, url, age in ((KEPT, "r2://a.mp3", 3), (LATER, "r2://a.mp3", 2), (LATEST, "r2://a.mp3", 1), (OTHER, "r2://b.mp3", 1)):
+            conn.execute(text(
+                "INSERT INTO tracks (id, title, storage_url, created_at) VALUES (:id, 'T', :url, now() - :age * interval '1 day')"
+            ), {"id": track_id, "url": url, "age": age})
+        for playlist_id in (PLAYLIST_A, PLAYLIST_B):
+            conn.execute(text("INSERT INTO playlists (id, name) VALUES (:id, 'P')"), {"id": playlist_id})
+        # A holds the kept track and a duplicate; B holds two duplicates
+        for playlist_id, track_id, position in ((PLAYLIST_A, KEPT, 1), (PLAYLIST_A, LATER, 2), (PLAYLIST_A, OTHER, 3),
+                                                (PLAYLIST_B, LATEST, 1), (PLAYLIST_B, LATER, 2)):
+            conn.execute(text("INSERT INTO playlist_tracks (playlist_id, track_id, position) VALUES (:p, :t, :n)"),
+                         {"p": playlist_id, "t": track_id, "n": position})
+        conn.execute(text("INSERT INTO playback_history (id, track_id) VALUES (gen_random_uuid(), :t)"), {"t": LATEST})
+        conn.execute(text("INSERT INTO sessions (id, current_track_id) VALUES (gen_random_uuid(), :t)"), {"t": LATER})
+        for track_id, votes in ((KEPT, 2), (LATER, 3), (LATEST, 4)):
+            conn.execute(text("INSERT INTO track_votes (track_id, votes) VALUES (:t, :v)"), {"t": track_id, "v": votes})
+
+    upgrade("5a9c3e7d2b18")
+
+    with engine.connect() as conn:
+        assert sorted(str(row.id) for row in conn.execute(text("SELECT id FROM tracks"))) == [KEPT, OTHER]
+        playlists = conn.execute(text("SELECT playlist_id::text, track_id::text FROM playlist_tracks ORDER BY 1, position")).all()
+        assert playlists == [(PLAYLIST_A, KEPT), (PLAYLIST_A, OTHER), (PLAYLIST_B, KEPT)]
+        assert str(conn.scalar(text("SELECT track_id FROM playback_history"))) == KEPT
+        assert str(conn.scalar(text("SELECT current_track_id FROM sessions"))) == KEPT
+        assert conn.execute(text("SELECT track_id, votes FROM track_votes")).all() == [(KEPT, 9)]
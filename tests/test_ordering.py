@@ -0,0 +1,42 @@
+import random
+
+import pytest
+
+from backend.ordering import key_between, keys_between
+
+
+def test_append_prepend_and_insert_between():
+    first = key_between(None, None)
+    second = key_between(first, None)
+    zeroth = key_between(None, first)
+    middle = key_between(first, second)
+    assert zeroth < first < middle < second
+
+def test_rejects_out_of_order_bounds():
+    a = key_between(None, None)
+    b = key_between(a, None)
+    with pytest.raises(ValueError):
+        key_between(b, a)
+
+def test_keys_between_are_sorted_and_short():
+    keys = keys_between(None, None, 5000)
+    assert keys == sorted(keys)
+    assert len(set(keys)) == 5000
+    assert max(len(k) for k in keys) <= 4
+
+def test_random_inserts_keep_order():
+    rng = random.Random(7)
+    keys = [key_between(None, None)]
+    for _ in range(2000):
+        i = rng.randint(0, len(keys))
+        a = keys[i - 1] if i > 0 else None
+        b = keys[i] if i < len(keys) else None
+        keys.insert(i, key_between(a, b))
+    assert keys == sorted(keys)
+    assert len(set(keys)) == len(keys)
+
+def test_repeated_inserts_into_one_gap_grow_slowly():
+    a, b = keys_between(None, None, 2)
+    for _ in range(60):
+        b = key_between(a, b)
+    assert len(b) < 20
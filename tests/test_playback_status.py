@@ -0,0 +1,85 @@
+import threading
+import time
+from datetime import datetime
+
+from backend.playback_status import PlaybackStatus, StatusMonitor
+
+
+class Threads:
+    """``start_task`` that keeps the heartbeat threads so a test can join them."""
+
+    def __init__(self):
+        self.started = []
+
+    def __call__(self, fn):
+        thread = threading.Thread(target=fn, daemon=True)
+        thread.start()
+        self.started.append(thread)
+        return thread
+
+
+def monitor(heartbeat_interval=60.0):
+    emitted, threads = [], Threads()
+    return StatusMonitor(emit=emitted.append, heartbeat_interval=heartbeat_interval, start_task=threads), emitted, threads
+
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_position_is_extrapolated_from_the_last_status():
+    status = PlaybackStatus(track_id=1, state="playing", position=30.0, monotonic=100.0, rate=1.0, timestamp=datetime.now())
+    assert status.position_at(102.5) == 32.5
+    status.rate = 0.0
+    assert status.position_at(200.0) == 30.0
+
+
+def test_status_is_emitted_on_transitions_only():
+    status_monitor, emitted, _ = monitor()
+    generation = status_monitor.start_monitoring(1)
+    time.sleep(0.05)
+    status_monitor.pause()
+    status_monitor.seek(42.0)
+    status_monitor.resume()
+    status_monitor.ended(generation - 1)  # a previous track's process: ignored
+    status_monitor.ended(generation)
+    assert [(s["state"], s["rate"]) for s in emitted] == [
+        ("playing", 1.0), ("paused", 0.0), ("paused", 0.0), ("playing", 1.0), ("ended", 0.0),
+    ]
+    assert emitted[1]["position"] >= 0.05 and emitted[1]["monotonic"] > emitted[0]["monotonic"]
+    assert emitted[2]["position"] == 42.0
+    status_monitor.stop_monitoring()
+    assert emitted[-1]["state"] == "stopped" and status_monitor.current_status is None
+
+
+def test_heartbeat_stops_with_monitoring():
+    status_monitor, emitted, threads = monitor(heartbeat_interval=0.01)
+    status_monitor.start_monitoring(1)
+    status_monitor.start_monitoring(2)  # a new track reuses the running heartbeat
+    wait_for(lambda: len(emitted) >= 5)
+    assert all(s["state"] == "playing" and s["track_id"] == 2 for s in emitted[2:])
+    status_monitor.stop_monitoring()
+    threads.started[0].join(timeout=2.0)
+    assert len(threads.started) == 1 and not threads.started[0].is_alive()
+    assert not status_monitor.heartbeat_running
+
+    status_monitor.start_monitoring(3)
+    assert len(threads.started) == 2 and status_monitor.heartbeat_running
+    status_monitor.stop_monitoring()
+    threads.started[1].join(timeout=2.0)
+    assert not threads.started[1].is_alive()
+
+
+def test_a_track_can_start_paused():
+    # A seek while paused restarts the track without a "playing" blip
+    status_monitor, emitted, threads = monitor(heartbeat_interval=0.01)
+    status_monitor.start_monitoring(1, position=42.0, state="paused")
+    time.sleep(0.05)
+    assert [(s["state"], s["rate"], s["position"]) for s in emitted] == [("paused", 0.0, 42.0)]
+    status_monitor.resume()
+    assert emitted[-1]["state"] == "playing" and emitted[-1]["position"] == 42.0
+    status_monitor.stop_monitoring()
+    threads.started[0].join(timeout=2.0)
@@ -0,0 +1,84 @@
+import asyncio
+import json
+
+from fastapi.testclient import TestClient
+
+from backend import api
+from backend.main import app
+from backend.player_sync import PlayerSync, apply_message, player_sync
+from backend.websocket_manager import ConnectionManager
+
+QUEUE = [{"track_id": "t1", "position": 1, "votes": 0}, {"track_id": "t2", "position": 2, "votes": 0}]
+
+
+def test_broadcasts_are_stamped_and_replayable():
+    async def scenario():
+        manager = ConnectionManager()
+        sync = PlayerSync(manager, log_size=3)
+        for n in range(5):
+            await manager.broadcast_to_type({"type": "playback", "changes": {"position": n}}, "player")
+        await manager.broadcast_to_type({}, "player")
+        return sync
+
+    sync = asyncio.run(scenario())
+    assert sync.seq == 6
+    assert [json.loads(frame.encoded("json")) for frame in sync.replay(4)] == [
+        {"epoch": sync.epoch, "seq": 5, "type": "playback", "changes": {"position": 4}},
+        {"epoch": sync.epoch, "seq": 6},
+    ]
+    assert sync.replay(6) == []
+    assert sync.replay(2) is None  # seq 3 has left the log
+    assert sync.replay(7) is None
+
+
+def test_reference_client_applies_deltas_in_order():
+    state = apply_message({}, {"type": "snapshot", "epoch": "e", "seq": 10, "playback": {"state": "stopped"}, "queue": QUEUE})
+
+    def delta(seq, **message):
+        return {"epoch": "e", "seq": seq, **message}
+
+    state = apply_message(state, delta(11, type="queue_update", upserted=[{"track_id": "t3", "votes": 0, "position": 3}], removed=[]))
+    state = apply_message(state, delta(12, type="queue_votes", changes=[{"track_id": "t3", "votes": 2, "position": 1}]))
+    state = apply_message(state, delta(12, type="playback", changes={"state": "playing"}))  # replayed twice
+    assert [(item["track_id"], item["position"], item["votes"]) for item in state["queue"]] == [("t3", 1, 2), ("t1", 2, 0), ("t2", 3, 0)]
+    assert state["playback"] == {"state": "stopped"} and state["seq"] == 12
+
+    state = apply_message(state, delta(13, type="queue_update", upserted=[{"track_id": "t2", "position": 1}], removed=["t3"]))
+    assert [(item["track_id"], item["votes"]) for item in state["queue"]] == [("t2", 0), ("t1", 0)]
+    assert apply_message(state, delta(15, type="playback", changes={}))["gap"] is True
+
+
+def test_player_socket_snapshot_deltas_and_resume(monkeypatch):
+    async def player_state():
+        return {"playback": api.playback_state.dict(), "queue": QUEUE}
+
+    monkeypatch.setattr(api, "_player_state", player_state)
+    saved = api.playback_state.dict()
+    try:
+        with TestClient(app) as client:
+            with client.websocket_connect("/ws/player") as ws:
+                state = apply_message({}, ws.receive_json())
+                assert state["epoch"] == player_sync.epoch and state["queue"] == QUEUE
+                client.post("/playback/play")
+                client.post("/playback/seek", params={"position": 42})
+                for _ in range(2):
+                    state = apply_message(state, ws.receive_json())
+                assert state["playback"]["state"] == "playing" and state["playback"]["position"] == 42
+                assert not state["gap"]
+
+            # Missed while disconnected; the reconnect replays only this
+            client.post("/playback/pause")
+            with client.websocket_connect(f"/ws/player?epoch={state['epoch']}&seq={state['seq']}") as ws:
+                assert ws.receive_json() == {"type": "resumed", "epoch": state["epoch"], "seq": state["seq"]}
+                state = apply_message(state, ws.receive_json())
+                assert state["playback"]["state"] == "paused"
+
+                ws.send_json({"type": "resume", "epoch": state["epoch"], "seq": state["seq"] - 1})
+                assert ws.receive_json()["type"] == "resumed"
+                assert apply_message(state, ws.receive_json()) == state
+
+            with client.websocket_connect("/ws/player?epoch=restarted&seq=3") as ws:
+                assert ws.receive_json()["type"] == "snapshot"
+    finally:
+        for name, value in saved.items():
+            setattr(api.playback_state, name, value)
@@ -0,0 +1,60 @@
+import asyncio
+
+from sqlalchemy import create_engine, event, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+
+from backend.api import _etag_matches, _playlist_etag, _playlist_tracks_query, _rebalance_playlist
+from backend.infrastructure.models import PlaylistTrack
+from backend.ordering import keys_between
+
+
+def test_playlist_etag_changes_with_version_and_variant():
+    etag = _playlist_etag("p1", 3, "base")
+    assert etag.startswith('"') and etag.endswith('"')
+    assert etag == _playlist_etag("p1", 3, "base")
+    assert etag != _playlist_etag("p1", 4, "base")
+    assert etag != _playlist_etag("p1", 3, "tracks:0:100")
+
+def test_if_none_match_comparison():
+    etag = _playlist_etag("p1", 1, "base")
+    assert _etag_matches(etag, etag)
+    assert _etag_matches(f'"other", W/{etag}', etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches(None, etag)
+    assert not _etag_matches('"other"', etag)
+
+def test_playlist_tracks_load_in_one_joined_query():
+    sql = str(_playlist_tracks_query("p1", 50, 100).compile(dialect=postgresql.dialect()))
+    assert sql.count("SELECT") == 1
+    assert "JOIN tracks" in sql
+    assert "ORDER BY playlist_tracks.rank" in sql
+    assert "search_vector" not in sql
+
+class SyncSession:
+    """The slice of AsyncSession the playlist helpers use, over a synchronous SQLite session."""
+
+    def __init__(self, session):
+        self.session = session
+
+    async def execute(self, *args, **kwargs):
+        return self.session.execute(*args, **kwargs)
+
+    async def connection(self):
+        return self
+
+def test_rebalance_renumbers_ranks_in_order():
+    engine = create_engine("sqlite://")
+    # Postgres "C" collation: byte-wise comparison
+    event.listen(engine, "connect", lambda conn, _: conn.create_collation("C", lambda a, b: (a > b) - (a < b)))
+    PlaylistTrack.__table__.create(engine)
+    long_ranks = ["a0" + "V" * 60 + str(n) for n in range(1, 6)]
+    with Session(engine) as session:
+        session.execute(insert(PlaylistTrack.__table__), [
+            {"id": n, "playlist_id": "p1", "track_id": 10 + n, "rank": rank} for n, rank in enumerate(long_ranks)
+        ] + [{"id": 9, "playlist_id": "p2", "track_id": 99, "rank": "a5"}])
+        asyncio.run(_rebalance_playlist(SyncSession(session), "p1"))
+        rows = session.execute(select(PlaylistTrack.playlist_id, PlaylistTrack.track_id, PlaylistTrack.rank).order_by(PlaylistTrack.playlist_id, PlaylistTrack.rank)).all()
+    assert [(playlist_id, track_id) for playlist_id, track_id, _ in rows] == [("p1", 10 + n) for n in range(5)] + [("p2", 99)]
+    assert [rank for _, _, rank in rows[:5]] == keys_between(None, None, 5)
+    assert rows[5][2] == "a5"
@@ -0,0 +1,17 @@
+from tests.query_budget import budget_violations
+
+
+def _stats(queries, fingerprints):
+    return {"queries": queries, "db_time": 0.0, "fingerprints": fingerprints, "held": {}}
+
+def test_within_budget_passes():
+    assert budget_violations("GET /playlists/1", _stats(2, {"SELECT a": 1, "SELECT b": 1}), 2, 5) == []
+
+def test_over_budget_and_repeats_are_reported():
+    stats = _stats(12, {"SELECT * FROM playlists WHERE id = ?": 1, "SELECT * FROM tracks WHERE id = ?": 11})
+    problems = budget_violations("GET /playlists/1", stats, 3, 5)
+    assert problems[0] == "GET /playlists/1: 12 queries, budget is 3"
+    assert problems[1] == "GET /playlists/1: 11 x SELECT * FROM tracks WHERE id = ?"
+
+def test_unbounded_budget_still_checks_repeats():
+    assert budget_violations("test body", _stats(100, {"SELECT x": 100}), None, 5) == ["test body: 100 x SELECT x"]
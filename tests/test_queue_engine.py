@@ -0,0 +1,122 @@
+import asyncio
+import os
+import uuid
+
+import pytest
+import redis
+import redis.asyncio as aioredis
+
+from backend.queue_engine import VOTE_WEIGHT, RequestQueue
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+
+
+def redis_available():
+    try:
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
+
+
+pytestmark = pytest.mark.skipif(not redis_available(), reason="needs a Redis server at REDIS_URL")
+
+
+def run(scenario):
+    async def wrapper():
+        client = aioredis.from_url(REDIS_URL, decode_responses=True)
+        prefix = f"queue-test-{uuid.uuid4().hex}:"
+        queue = RequestQueue(client, prefix + "items", prefix + "votes", prefix + "seq")
+        try:
+            await scenario(queue)
+        finally:
+            await client.delete(*queue.keys)
+            await client.aclose()
+
+    asyncio.run(wrapper())
+
+
+async def order(queue):
+    return [item["track_id"] for item in await queue.items()]
+
+
+def test_add_is_first_come_first_served():
+    async def scenario(queue):
+        assert [await queue.add(track) for track in "abc"] == [1, 2, 3]
+        assert await queue.add("b") is None
+        assert await order(queue) == ["a", "b", "c"]
+        assert await queue.position("c") == 3 and await queue.position("z") is None
+
+    run(scenario)
+
+
+def test_votes_reorder_and_ties_keep_enqueue_order():
+    async def scenario(queue):
+        for track in "abcd":
+            await queue.add(track)
+        assert await queue.vote("c") == (1, 1)
+        assert await queue.vote("d") == (1, 2)  # tied with c, which was queued first
+        assert await queue.vote("b", 2) == (2, 1)
+        assert await queue.vote("z") is None
+        assert await order(queue) == ["b", "c", "d", "a"]
+
+        changes = await queue.vote_many({"a": 3, "b": -2, "z": 1})
+        assert sorted(changes, key=lambda change: change["track_id"]) == [
+            {"track_id": "a", "votes": 3, "position": 1},
+            {"track_id": "b", "votes": 0, "position": 4},
+        ]
+        assert await order(queue) == ["a", "c", "d", "b"]
+        assert await queue.vote_many({}) == []
+
+    run(scenario)
+
+
+def test_pop_and_remove():
+    async def scenario(queue):
+        for track in "abc":
+            await queue.add(track)
+        await queue.vote("c", 2)
+        assert await queue.pop_next() == {"track_id": "c", "votes": 2}
+        assert await queue.remove("a") is True
+        assert await queue.remove("a") is False
+        assert await queue.items() == [{"track_id": "b", "position": 1, "votes": 0}]
+        assert await queue.pop_next() == {"track_id": "b", "votes": 0}
+        assert await queue.pop_next() is None
+        # Popped tracks leave no votes behind
+        assert await queue.redis.hlen(queue.keys[1]) == 0
+
+    run(scenario)
+
+
+def test_move_places_between_neighbours_and_keeps_votes_relative():
+    async def scenario(queue):
+        for track in "abcd":
+            await queue.add(track)
+        assert await queue.move("d", 2) == 2
+        assert await order(queue) == ["a", "d", "b", "c"]
+        assert await queue.move("a", 99) == 4
+        assert await queue.move("c", 0) == 1
+        assert await order(queue) == ["c", "d", "b", "a"]
+        assert await queue.move("z", 1) is None
+        # A vote lifts a moved track exactly one vote step above its placement
+        await queue.vote("b")
+        assert await order(queue) == ["b", "c", "d", "a"]
+
+    run(scenario)
+
+
+def test_repeated_moves_between_the_same_neighbours_stay_ordered():
+    async def scenario(queue):
+        expected = [f"t{n}" for n in range(6)]
+        for track in expected:
+            await queue.add(track)
+        await queue.vote("t0", 5)
+        # Always into the gap right after t0, which halves every time
+        for _ in range(200):
+            track = expected.pop()
+            expected.insert(1, track)
+            assert await queue.move(track, 2) == 2
+            assert await order(queue) == expected
+        scores = [score for _, score in await queue.redis.zrange(queue.keys[0], 0, -1, withscores=True)]
+        assert scores == sorted(set(scores)) and scores[0] == -5 * VOTE_WEIGHT + 1
+
+    run(scenario)
@@ -0,0 +1,90 @@
+import asyncio
+import time
+
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+
+from backend.infrastructure import replicas as routing
+from backend.infrastructure.models import Track
+from backend.infrastructure.replicas import STICKY_COOKIE, ReadRoutingMiddleware, ReplicaSet, RoutingSession
+
+# Engines connect lazily, so these never need a server
+primary = create_async_engine("postgresql+asyncpg://app@primary/djamms")
+replica_a = create_async_engine("postgresql+asyncpg://app@replica-a/djamms")
+replica_b = create_async_engine("postgresql+asyncpg://app@replica-b/djamms")
+
+
+def make_session(replica_set):
+    return sessionmaker(primary, class_=AsyncSession, sync_session_class=RoutingSession, replicas=replica_set)()
+
+def bind_host(session, statement):
+    return session.sync_session.get_bind(clause=statement).url.host
+
+def test_reads_go_to_replicas_round_robin_only_when_read_only():
+    session = make_session(ReplicaSet([replica_a, replica_b]))
+    assert bind_host(session, select(Track)) == "primary"
+    token = routing._read_only.set(True)
+    try:
+        hosts = {bind_host(session, select(Track)) for _ in range(4)}
+    finally:
+        routing._read_only.reset(token)
+    assert hosts == {"replica-a", "replica-b"}
+
+def test_session_sticks_to_primary_after_a_write():
+    session = make_session(ReplicaSet([replica_a]))
+    token = routing._read_only.set(True)
+    try:
+        assert bind_host(session, insert(Track).values(title="x")) == "primary"
+        assert bind_host(session, select(Track)) == "primary"
+    finally:
+        routing._read_only.reset(token)
+
+def test_unhealthy_replicas_fall_back_to_primary():
+    replica_set = ReplicaSet([replica_a])
+    replica_set.replicas[0].healthy = False
+    session = make_session(replica_set)
+    token = routing._read_only.set(True)
+    try:
+        assert bind_host(session, select(Track)) == "primary"
+    finally:
+        routing._read_only.reset(token)
+
+def test_health_check_marks_unreachable_replica_down():
+    replica_set = ReplicaSet([create_async_engine("postgresql+asyncpg://app@127.0.0.1:1/djamms")])
+    asyncio.run(replica_set.check())
+    assert replica_set.choose() is None
+    assert replica_set.snapshot()[0]["healthy"] is False
+
+
+def _call(middleware, method, cookie=None, status=200):
+    seen = {}
+
+    async def app(scope, receive, send):
+        seen["read_only"] = routing.read_only_requested()
+        await send({"type": "http.response.start", "status": status, "headers": []})
+
+    sent = []
+
+    async def send(message):
+        sent.append(message)
+
+    headers = [(b"cookie", cookie.encode())] if cookie else []
+    asyncio.run(middleware(app)({"type": "http", "method": method, "headers": headers}, None, send))
+    return seen["read_only"], dict(sent[0]["headers"])
+
+def test_writes_set_read_your_writes_cookie():
+    read_only, headers = _call(ReadRoutingMiddleware, "POST")
+    assert read_only is False
+    assert headers[b"set-cookie"].startswith(f"{STICKY_COOKIE}=".encode())
+
+def test_preflights_and_rejected_writes_do_not_pin_to_primary():
+    assert b"set-cookie" not in _call(ReadRoutingMiddleware, "OPTIONS")[1]
+    assert b"set-cookie" not in _call(ReadRoutingMiddleware, "POST", status=302)[1]
+    assert b"set-cookie" not in _call(ReadRoutingMiddleware, "DELETE", status=409)[1]
+    assert b"set-cookie" in _call(ReadRoutingMiddleware, "PATCH", status=204)[1]
+
+def test_gets_are_read_only_unless_client_recently_wrote():
+    assert _call(ReadRoutingMiddleware, "GET")[0] is True
+    assert _call(ReadRoutingMiddleware, "GET", f"{STICKY_COOKIE}={int(time.time()) + 5}")[0] is False
+    assert _call(ReadRoutingMiddleware, "GET", f"{STICKY_COOKIE}={int(time.time()) - 5}")[0] is True
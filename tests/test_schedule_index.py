@@ -0,0 +1,127 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from backend.api import _check_schedule_conflicts
+from backend.infrastructure.database import get_db
+from backend.main import app
+from backend.schedule_index import ScheduleIndex, schedule_index
+
+client = TestClient(app)
+
+T0 = datetime(2026, 11, 1, 18, 0, tzinfo=timezone.utc)
+
+
+def entry(entry_id, start_hours, end_hours, venue="default", playlist_id="p1"):
+    return {
+        "id": entry_id, "venue": venue, "playlist_id": playlist_id, "description": None,
+        "start_time": T0 + timedelta(hours=start_hours), "end_time": T0 + timedelta(hours=end_hours),
+    }
+
+
+@pytest.fixture
+def index():
+    index = ScheduleIndex()
+    index.build([entry("b", 2, 4), entry("a", 0, 1), entry("c", 5, 6), entry("x", 0, 24, venue="lobby")])
+    return index
+
+
+def test_point_lookup_uses_half_open_windows(index):
+    assert index.at("default", T0)["id"] == "a"
+    assert index.at("default", T0 + timedelta(minutes=59))["id"] == "a"
+    assert index.at("default", T0 + timedelta(hours=1)) is None
+    assert index.at("default", T0 + timedelta(hours=3))["id"] == "b"
+    assert index.at("default", T0 - timedelta(seconds=1)) is None
+    assert index.at("lobby", T0 + timedelta(hours=3))["id"] == "x"
+    assert index.at("nowhere", T0) is None
+
+
+def test_overlap_queries(index):
+    def ids(start, end):
+        return [e["id"] for e in index.overlapping("default", T0 + timedelta(hours=start), T0 + timedelta(hours=end))]
+
+    assert ids(0.5, 2.5) == ["a", "b"]
+    assert ids(1, 2) == []
+    assert ids(3, 10) == ["b", "c"]
+    assert ids(-5, 0) == []
+    assert ids(-5, 100) == ["a", "b", "c"]
+    assert [e["id"] for e in index.conflicts("default", T0 + timedelta(hours=3), T0 + timedelta(hours=5.5), exclude_id="b")] == ["c"]
+
+
+def test_naive_times_are_utc(index):
+    assert index.at("default", T0.replace(tzinfo=None) + timedelta(hours=3))["id"] == "b"
+
+
+def test_updates_move_entries(index):
+    index.add(entry("a", 10, 11))
+    assert index.at("default", T0) is None
+    assert [e["id"] for e in index.entries("default")] == ["b", "c", "a"]
+    index.add(entry("a", 10, 11, venue="lobby"))
+    assert [e["id"] for e in index.entries("default")] == ["b", "c"]
+    assert index.next_after("default", T0 + timedelta(hours=2))["id"] == "c"
+    index.remove("c")
+    assert index.next_after("default", T0 + timedelta(hours=2)) is None
+    assert len(index) == 3
+
+
+def test_remove_playlist(index):
+    index.add(entry("d", 7, 8, playlist_id="p2"))
+    assert sorted(e["id"] for e in index.remove_playlist("p1")) == ["a", "b", "c", "x"]
+    assert [e["id"] for e in index.entries()] == ["d"]
+    assert index.venues() == ["default"]
+
+
+@pytest.mark.query_budget(0)
+class Row:
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+
+class StoredEntries:
+    """Stands in for the request session; ``execute`` returns the stored overlapping rows."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    async def execute(self, stmt):
+        return [Row(row) for row in self.rows]
+
+
+def test_scheduler_endpoints_answer_from_the_index():
+    schedule_index.add(entry("sched-test", 0, 1, venue="test-venue"))
+    app.dependency_overrides[get_db] = lambda: StoredEntries([entry("sched-test", 0, 1, venue="test-venue")])
+    try:
+        response = client.get("/scheduler/now", params={"venue": "test-venue", "at": (T0 + timedelta(minutes=30)).isoformat()})
+        assert response.status_code == 200
+        assert response.json()["entry"]["id"] == "sched-test"
+
+        response = client.get("/scheduler/entries", params={
+            "venue": "test-venue", "start": T0.isoformat(), "end": (T0 + timedelta(hours=2)).isoformat(),
+        })
+        assert [e["id"] for e in response.json()] == ["sched-test"]
+
+        response = client.post("/scheduler/entries", json={
+            "venue": "test-venue", "playlist_id": "p1",
+            "start_time": (T0 + timedelta(minutes=30)).isoformat(), "end_time": (T0 + timedelta(hours=2)).isoformat(),
+        })
+        assert response.status_code == 409
+        assert [c["id"] for c in response.json()["detail"]["conflicts"]] == ["sched-test"]
+
+        response = client.post("/scheduler/entries", json={
+            "venue": "test-venue", "playlist_id": "p1", "start_time": T0.isoformat(), "end_time": T0.isoformat(),
+        })
+        assert response.status_code == 422
+    finally:
+        del app.dependency_overrides[get_db]
+        schedule_index.remove("sched-test")
+
+
+def test_conflicts_missing_from_the_table_are_dropped_not_refused():
+    # Deleted on another worker; this worker's index still has it
+    schedule_index.add(entry("stale", 0, 1, venue="stale-venue"))
+    try:
+        asyncio.run(_check_schedule_conflicts(StoredEntries([]), "stale-venue", T0, T0 + timedelta(hours=2)))
+        assert "stale" not in schedule_index
+    finally:
+        schedule_index.remove("stale")
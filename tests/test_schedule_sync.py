@@ -0,0 +1,128 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from backend.schedule_index import ScheduleIndex
+from backend.schedule_sync import ScheduleSync
+
+T0 = datetime(2026, 11, 1, 18, 0, tzinfo=timezone.utc)
+
+
+def entry(entry_id, start_hours, end_hours, playlist_id="p1"):
+    return {
+        "id": entry_id, "venue": "default", "playlist_id": playlist_id, "description": None,
+        "start_time": T0 + timedelta(hours=start_hours), "end_time": T0 + timedelta(hours=end_hours),
+    }
+
+
+class SharedRedis:
+    """Counter and channel shared by the workers; published changes queue up until delivered."""
+
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    async def publish(self, channel, data):
+        self.published.append(data)
+
+
+class Row:
+    def __init__(self, mapping):
+        self._mapping = mapping
+
+
+class Table:
+    """The schedule_entries table as a session factory for ``ScheduleIndex.load``."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def execute(self, stmt):
+        return [Row(row) for row in self.rows.values()]
+
+
+def workers(n=2):
+    redis, table = SharedRedis(), Table()
+    syncs = [ScheduleSync(index=ScheduleIndex(), redis=redis, session_factory=table) for _ in range(n)]
+    for sync in syncs:
+        asyncio.run(sync.reload())
+    return redis, table, syncs
+
+
+def deliver_all(redis, syncs):
+    async def pump():
+        for data in redis.published:
+            for sync in syncs:
+                await sync.deliver(data)
+        redis.published.clear()
+
+    asyncio.run(pump())
+
+
+def test_writes_on_one_worker_reach_the_others():
+    redis, table, (a, b) = workers()
+    table.rows["e1"] = entry("e1", 0, 1)
+    asyncio.run(a.add(entry("e1", 0, 1)))
+    assert "e1" in a.index and "e1" not in b.index
+    deliver_all(redis, [a, b])
+    assert b.index.at("default", T0 + timedelta(minutes=30))["id"] == "e1"
+
+    # Moved on b, then deleted on a: b's conflict check and a's reads both follow
+    table.rows["e1"] = entry("e1", 2, 3)
+    asyncio.run(b.add(entry("e1", 2, 3)))
+    deliver_all(redis, [a, b])
+    assert a.index.conflicts("default", T0, T0 + timedelta(hours=1)) == []
+    del table.rows["e1"]
+    asyncio.run(a.remove("e1"))
+    deliver_all(redis, [a, b])
+    assert len(a.index) == len(b.index) == 0
+    assert a.generation == b.generation == 3
+    assert b.stats["reloads"] == 1  # only the initial load
+
+
+def test_playlist_deletes_propagate():
+    redis, table, (a, b) = workers()
+    for entry_id, start in (("e1", 0), ("e2", 1)):
+        asyncio.run(a.add(entry(entry_id, start, start + 1, playlist_id="gone")))
+    asyncio.run(a.add(entry("e3", 2, 3, playlist_id="kept")))
+    asyncio.run(a.remove_playlist("gone"))
+    deliver_all(redis, [a, b])
+    assert [e["id"] for e in b.index.entries()] == ["e3"]
+
+
+def test_a_missed_change_triggers_a_reload():
+    redis, table, (a, b) = workers()
+    table.rows["e1"] = entry("e1", 0, 1)
+    asyncio.run(a.add(entry("e1", 0, 1)))
+    redis.published.clear()  # lost on the way to b
+    table.rows["e2"] = entry("e2", 1, 2)
+    asyncio.run(a.add(entry("e2", 1, 2)))
+    deliver_all(redis, [b])
+    assert [e["id"] for e in b.index.entries()] == ["e1", "e2"]
+    assert b.generation == 2 and b.stats["reloads"] == 2
+
+
+def test_stale_and_own_changes_are_harmless():
+    redis, table, (a,) = workers(1)
+    asyncio.run(a.add(entry("e1", 0, 1)))
+    stale = redis.published[0]
+    deliver_all(redis, [a])
+    asyncio.run(a.remove("e1"))
+    deliver_all(redis, [a])
+    asyncio.run(a.deliver(stale))
+    assert len(a.index) == 0 and a.generation == 2
@@ -0,0 +1,166 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+from backend.schedule_index import ScheduleIndex
+from backend.schedule_sync import ScheduleSync
+from backend.scheduler_runtime import SchedulerRuntime
+
+T0 = datetime(2026, 11, 1, 18, 0, tzinfo=timezone.utc)
+
+
+class RecordingManager:
+    def __init__(self):
+        self.messages = []
+
+    async def broadcast_to_type(self, message, client_type):
+        self.messages.append((client_type, message))
+
+
+class FakeClock:
+    def __init__(self, now):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+def entry(entry_id, start, end, venue="default", playlist_id=None):
+    return {
+        "id": entry_id, "venue": venue, "playlist_id": playlist_id or f"playlist-{entry_id}", "description": None,
+        "start_time": start, "end_time": end,
+    }
+
+
+def make_runtime(clock, entries=()):
+    index = ScheduleIndex()
+    index.build(entries)
+    manager = RecordingManager()
+    runtime = SchedulerRuntime(index=index, manager=manager, clock=clock)
+    index.add_listener(runtime.reschedule)
+    return index, manager, runtime
+
+
+def test_transitions_fire_at_boundaries():
+    clock = FakeClock(T0)
+    _, manager, runtime = make_runtime(clock, [
+        entry("a", T0 + timedelta(minutes=10), T0 + timedelta(minutes=20)),
+        entry("b", T0 + timedelta(minutes=20), T0 + timedelta(minutes=30)),
+    ])
+    changes = []
+    runtime.add_listener(lambda venue, e: changes.append((venue, e["id"] if e else None)))
+
+    async def scenario():
+        runtime.reschedule("default")
+        await runtime.fire_due()
+        assert manager.messages == []
+        for minutes in (10, 20, 30):
+            clock.now = T0 + timedelta(minutes=minutes)
+            await runtime.fire_due()
+
+    asyncio.run(scenario())
+    assert changes == [("default", "a"), ("default", "b"), ("default", None)]
+    messages = [message for channel, message in manager.messages if channel == "player"]
+    assert [m["playlist_id"] for m in messages] == ["playlist-a", "playlist-b", None]
+    assert messages[1]["previous_playlist_id"] == "playlist-a"
+    assert {m["reason"] for m in messages} == {"scheduled"}
+
+
+def test_edits_recompute_only_the_changed_venue():
+    clock = FakeClock(T0)
+    index, manager, runtime = make_runtime(clock, [
+        entry("a", T0 + timedelta(minutes=10), T0 + timedelta(minutes=20)),
+        entry("lobby", T0 + timedelta(minutes=5), T0 + timedelta(minutes=50), venue="lobby"),
+    ])
+
+    async def scenario():
+        for venue in index.venues():
+            runtime.reschedule(venue)
+        armed = runtime.stats["timers_armed"]
+        # Pull entry a forward so it covers now: switches immediately
+        index.add(entry("a", T0 - timedelta(minutes=1), T0 + timedelta(minutes=20)))
+        assert runtime.stats["timers_armed"] > armed
+        await runtime.fire_due()
+
+    asyncio.run(scenario())
+    assert [(m["venue"], m["entry_id"], m["reason"]) for _, m in manager.messages] == [("default", "a", "edited")]
+    # Only the lobby timer and the re-armed default timer remain live
+    assert len(runtime._timers) == 2
+
+
+def test_resume_after_restart_picks_up_the_current_entry():
+    clock = FakeClock(T0 + timedelta(minutes=15))
+    _, manager, runtime = make_runtime(clock, [entry("a", T0 + timedelta(minutes=10), T0 + timedelta(minutes=20))])
+
+    async def scenario():
+        runtime.start()
+        try:
+            await runtime.fire_due()
+        finally:
+            await runtime.stop()
+
+    asyncio.run(scenario())
+    [(_, message)] = manager.messages
+    assert (message["entry_id"], message["reason"]) == ("a", "resumed")
+    assert runtime.active("default")["id"] == "a"
+
+
+def test_many_venues_fire_within_drift_budget():
+    async def scenario():
+        now = datetime.now(timezone.utc)
+        entries = [
+            entry(f"{venue}-{i}", now + timedelta(milliseconds=100 + 40 * i + venue), now + timedelta(milliseconds=120 + 40 * i + venue), venue=f"venue-{venue}")
+            for venue in range(50) for i in range(5)
+        ]
+        _, manager, runtime = make_runtime(lambda: datetime.now(timezone.utc), entries)
+        runtime.start()
+        await asyncio.sleep(0.6)
+        await runtime.stop()
+        return manager, runtime
+
+    manager, runtime = asyncio.run(scenario())
+    # Each entry starts and ends once
+    assert runtime.stats["transitions"] == 2 * 250
+    assert runtime.stats["max_drift_ms"] < 50
+    assert runtime.snapshot()["drift_ms_p99"] is not None
+
+
+class SharedRedis:
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    async def publish(self, channel, data):
+        self.published.append(data)
+
+
+def test_every_worker_fires_a_transition_written_on_one_of_them():
+    clock = FakeClock(T0)
+    redis = SharedRedis()
+    workers = []
+    for _ in range(3):
+        index, manager, runtime = make_runtime(clock)
+        sync = ScheduleSync(index=index, redis=redis)
+        sync.generation = 0
+        workers.append((sync, manager, runtime))
+
+    async def scenario():
+        # Written on the first worker only
+        await workers[0][0].add(entry("a", T0 + timedelta(minutes=10), T0 + timedelta(minutes=20)))
+        for data in redis.published:
+            for sync, _, _ in workers:
+                await sync.deliver(data)
+        clock.now = T0 + timedelta(minutes=10)
+        for _, _, runtime in workers:
+            await runtime.fire_due()
+
+    asyncio.run(scenario())
+    for _, manager, runtime in workers:
+        assert [(m["entry_id"], m["playlist_id"], m["reason"]) for _, m in manager.messages] == [("a", "playlist-a", "scheduled")]
+        assert runtime.active("default")["id"] == "a"
@@ -0,0 +1,46 @@
+import asyncio
+
+from sqlalchemy import func, literal_column
+from sqlalchemy.dialects import postgresql
+
+from backend import search
+from backend.infrastructure.models import Track
+from backend.search import ranked_query, to_prefix_tsquery
+
+def test_prefix_tsquery_matches_each_word_as_prefix():
+    assert to_prefix_tsquery("Daft Pu") == "daft:* & pu:*"
+
+def test_prefix_tsquery_strips_operators():
+    assert to_prefix_tsquery("rock & !roll | (x)") == "rock:* & roll:* & x:*"
+    assert to_prefix_tsquery(" !& ") is None
+
+def test_matches_are_ranked_before_the_limit():
+    ts = func.to_tsquery(literal_column("'simple'::regconfig"), "a:*")
+    stmt = ranked_query(Track.search_vector.op("@@")(ts), func.ts_rank_cd(Track.search_vector, ts), {}, 20)
+    sql = str(stmt.compile(dialect=postgresql.dialect())).upper()
+    # One LIMIT, after the ORDER BY: no arbitrary subset is cut before ranking
+    assert sql.count("LIMIT") == 1
+    assert sql.index("ORDER BY RANK DESC") < sql.index("LIMIT")
+
+def test_short_prefixes_are_listed_newest_first_without_ranking():
+    ts = func.to_tsquery(literal_column("'simple'::regconfig"), "d:*")
+    stmt = ranked_query(Track.search_vector.op("@@")(ts), None, {}, 20)
+    sql = str(stmt.compile(dialect=postgresql.dialect())).upper()
+    assert "TS_RANK_CD" not in sql
+    assert sql.index("ORDER BY TRACKS.CREATED_AT DESC, TRACKS.ID DESC") < sql.index("LIMIT")
+
+def test_search_ranks_only_queries_with_a_longer_word(monkeypatch):
+    seen = []
+
+    async def ranked(db, match, rank, filters, limit):
+        seen.append(rank is not None)
+        return [{"id": 1}]
+
+    async def facets(db, match, filters):
+        return {}
+
+    monkeypatch.setattr(search, "_ranked", ranked)
+    monkeypatch.setattr(search, "_facets", facets)
+    for query in ("d", "da", "d p", "daf", "da punk"):
+        asyncio.run(search.search_tracks(None, query=query))
+    assert seen == [False, False, False, True, True]
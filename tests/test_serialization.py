@@ -0,0 +1,20 @@
+from datetime import datetime
+
+from backend.serialization import FastJSONResponse, dumps, loads, row_dicts
+
+
+def test_dumps_encodes_db_types_to_bytes():
+    body = dumps({"id": 1, "created_at": datetime(2026, 1, 2, 3, 4, 5), "genre": None})
+    assert isinstance(body, bytes)
+    assert loads(body) == {"id": 1, "created_at": "2026-01-02T03:04:05", "genre": None}
+
+def test_row_dicts_projects_fields_in_order():
+    rows = [{"id": 1, "title": "A", "bpm": 120}, {"id": 2, "title": "B", "bpm": 98}]
+    assert row_dicts(rows, ["title", "id"]) == [{"title": "A", "id": 1}, {"title": "B", "id": 2}]
+
+def test_fast_json_response_passes_bytes_through():
+    assert FastJSONResponse(b'[{"id":1}]').body == b'[{"id":1}]'
+    response = FastJSONResponse([{"id": 1}], headers={"X-Next-Cursor": "abc"})
+    assert loads(response.body) == [{"id": 1}]
+    assert response.headers["content-type"] == "application/json"
+    assert response.headers["x-next-cursor"] == "abc"
@@ -1,13 +1,16 @@
 
+import pytest
 from fastapi.testclient import TestClient
 from backend.main import app
 
 client = TestClient(app)
 
+@pytest.mark.query_budget(1)
 def test_signage_content_list():
     response = client.get("/signage/content")
     assert response.status_code in (200, 403)  # RBAC may block non-admin
 
+@pytest.mark.query_budget(1)
 def test_signage_preview():
     response = client.get("/signage/preview")
     assert response.status_code in (200, 403)
@@ -0,0 +1,113 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.testclient import TestClient
+from backend import signage_manifest
+from backend.main import app
+from backend.signage_manifest import ManifestStore, build_manifest, diff_items, manifest_horizon
+from backend.signage_timeline import compile_timeline
+
+client = TestClient(app)
+
+T0 = datetime(2026, 11, 2, 0, 0, tzinfo=timezone.utc)
+CONTENTS = {
+    "menu": {"id": "menu", "filename": "menu.png", "content_type": "image", "url": "r2://signage/menu.png", "checksum": "ab12", "duration": 15},
+    "promo": {"id": "promo", "filename": "promo.mp4", "content_type": "video", "url": "r2://signage/promo.mp4", "checksum": "cd34", "duration": 30},
+}
+
+
+def schedules(promo_end_hours=13):
+    return [
+        {"id": "s1", "content_id": "menu", "display_id": None, "repeat_pattern": "daily", "created_at": None,
+         "start_time": T0 + timedelta(hours=9), "end_time": T0 + timedelta(hours=17)},
+        {"id": "s2", "content_id": "promo", "display_id": "bar", "repeat_pattern": None, "created_at": None,
+         "start_time": T0 + timedelta(hours=12), "end_time": T0 + timedelta(hours=promo_end_hours)},
+    ]
+
+
+class FakeRedis:
+    def __init__(self):
+        self.data = {}
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+    async def get(self, key):
+        return self.data.get(key)
+
+
+def test_manifest_items_and_stable_version():
+    manifest = build_manifest(compile_timeline(schedules(), CONTENTS, "bar", T0))
+    first_day = manifest["items"][:3]
+    assert [(i["content_id"], i["valid_from"][11:16], i["valid_until"][11:16]) for i in first_day] == [
+        ("menu", "09:00", "12:00"), ("promo", "12:00", "13:00"), ("menu", "13:00", "17:00"),
+    ]
+    assert first_day[1]["checksum"] == "cd34" and first_day[1]["duration"] == 30
+    assert build_manifest(compile_timeline(schedules(), CONTENTS, "bar", T0))["version"] == manifest["version"]
+    assert build_manifest(compile_timeline(schedules(14), CONTENTS, "bar", T0))["version"] != manifest["version"]
+
+
+def test_version_and_keys_do_not_move_with_the_clock():
+    def manifest_at(hours, promo_end_hours=13):
+        return build_manifest(compile_timeline(schedules(promo_end_hours), CONTENTS, "bar", *manifest_horizon(T0 + timedelta(hours=hours))))
+
+    morning = manifest_at(10)
+    assert manifest_at(11) == morning and manifest_at(23.5)["version"] == morning["version"]
+    assert morning["valid_until"] == (T0 + timedelta(days=8)).isoformat()
+    assert manifest_at(11, promo_end_hours=14)["version"] != morning["version"]
+
+    # A new day moves the horizon: the first day's three items go, the rest keep their keys
+    tomorrow = manifest_at(25)
+    assert tomorrow["version"] != morning["version"]
+    carried = [item["key"] for item in tomorrow["items"] if item["valid_until"] <= morning["valid_until"]]
+    assert len(carried) == len(morning["items"]) - 3 and set(carried) <= {item["key"] for item in morning["items"]}
+
+    # A horizon that cuts into an occurrence keeps the occurrence's key
+    clipped = build_manifest(compile_timeline(schedules(), CONTENTS, "bar", T0 + timedelta(hours=10)))
+    assert clipped["items"][0]["valid_from"] == (T0 + timedelta(hours=10)).isoformat()
+    assert clipped["items"][0]["key"] == morning["items"][0]["key"] == f"menu@{(T0 + timedelta(hours=9)).isoformat()}"
+
+
+def test_delta_lists_only_what_changed():
+    old = build_manifest(compile_timeline(schedules(), CONTENTS, "bar", T0))
+    new = build_manifest(compile_timeline(schedules(14), CONTENTS, "bar", T0))
+    delta = diff_items(old["items"], new["items"])
+    # The promo runs an hour longer and the afternoon menu starts an hour later
+    assert [(i["content_id"], i["valid_from"][11:16]) for i in delta["upserted"]] == [("promo", "12:00"), ("menu", "14:00")]
+    # The afternoon menu is the rest of the 09:00 occurrence, so it is keyed by both starts
+    assert delta["removed"] == [f"menu@{(T0 + timedelta(hours=9)).isoformat()}+{(T0 + timedelta(hours=13)).isoformat()}"]
+
+    store = ManifestStore(redis=FakeRedis())
+    asyncio.run(store.remember("bar", old))
+    delta = asyncio.run(signage_manifest.get_delta("bar", old["version"], new, store=store))
+    assert delta["version"] == new["version"] and len(delta["upserted"]) == 2
+    assert asyncio.run(signage_manifest.get_delta("bar", "unknown", new, store=store)) is None
+
+
+@pytest.mark.query_budget(0)
+def test_manifest_endpoint_etag_and_since(monkeypatch):
+    old = build_manifest(compile_timeline(schedules(), CONTENTS, "bar", T0))
+    new = build_manifest(compile_timeline(schedules(14), CONTENTS, "bar", T0))
+
+    async def get_manifest(db, display_id):
+        return new
+
+    async def get_delta(display_id, since, manifest):
+        return {"version": manifest["version"], "since": since, **diff_items(old["items"], manifest["items"])} if since == old["version"] else None
+
+    monkeypatch.setattr(signage_manifest, "get_manifest", get_manifest)
+    monkeypatch.setattr(signage_manifest, "get_delta", get_delta)
+
+    response = client.get("/signage/displays/bar/manifest")
+    assert response.status_code == 200
+    assert response.json()["full"] is True
+    etag = response.headers["etag"]
+    assert etag == f'"{new["version"]}"'
+
+    assert client.get("/signage/displays/bar/manifest", headers={"If-None-Match": etag}).status_code == 304
+    assert client.get("/signage/displays/bar/manifest", params={"since": new["version"]}).status_code == 304
+
+    delta = client.get("/signage/displays/bar/manifest", params={"since": old["version"]}).json()
+    assert delta["full"] is False and len(delta["upserted"]) == 2 and len(delta["removed"]) == 1
+    assert client.get("/signage/displays/bar/manifest", params={"since": "stale"}).json()["full"] is True
@@ -0,0 +1,76 @@
+from datetime import datetime, timedelta, timezone
+
+from backend.signage_timeline import compile_timeline, occurrences, segment_at, segments_between
+
+# A Monday
+T0 = datetime(2026, 11, 2, 0, 0, tzinfo=timezone.utc)
+CONTENTS = {
+    cid: {"id": cid, "filename": f"{cid}.png", "content_type": "image", "url": f"r2://signage/{cid}.png"}
+    for cid in ("menu", "promo", "lobby", "gone")
+}
+
+
+def schedule(sid, content_id, start_hours, end_hours, repeat=None, display_id=None, created_minutes=0):
+    return {
+        "id": sid, "content_id": content_id, "display_id": display_id, "repeat_pattern": repeat,
+        "start_time": T0 + timedelta(hours=start_hours), "end_time": T0 + timedelta(hours=end_hours),
+        "created_at": T0 - timedelta(days=30) + timedelta(minutes=created_minutes),
+    }
+
+
+def content_at(timeline, when):
+    segment = segment_at(timeline, when)
+    return segment["content"]["id"] if segment else None
+
+
+def test_recurrences_expand_over_the_horizon():
+    horizon_end = T0 + timedelta(days=7)
+
+    def starts(pattern):
+        base_start, base_end = T0 - timedelta(days=20) + timedelta(hours=9), T0 - timedelta(days=20) + timedelta(hours=10)
+        return [s.weekday() for s, _ in occurrences(base_start, base_end, pattern, T0, horizon_end)]
+
+    assert starts("daily") == [0, 1, 2, 3, 4, 5, 6]
+    assert starts("weekdays") == [0, 1, 2, 3, 4]
+    assert starts("weekends") == [5, 6]
+    assert len(starts("weekly")) == 1
+    assert starts(None) == []
+    # A one-off window partly inside the horizon is kept
+    assert list(occurrences(T0 - timedelta(hours=1), T0 + timedelta(hours=1), "once", T0, horizon_end)) == [(T0 - timedelta(hours=1), T0 + timedelta(hours=1))]
+
+
+def test_overlaps_resolve_by_display_then_recency():
+    timeline = compile_timeline([
+        schedule("all-day", "menu", 0, 24, repeat="daily"),
+        schedule("promo", "promo", 12, 13, repeat="daily", created_minutes=5),
+        schedule("lobby", "lobby", 12, 12.5, display_id="lobby", repeat="weekdays"),
+        schedule("orphan", "missing", 0, 24),
+    ], CONTENTS, "lobby", T0)
+
+    assert content_at(timeline, T0 + timedelta(hours=8)) == "menu"
+    assert content_at(timeline, T0 + timedelta(hours=12, minutes=10)) == "lobby"
+    assert content_at(timeline, T0 + timedelta(hours=12, minutes=40)) == "promo"
+    assert content_at(timeline, T0 + timedelta(hours=13)) == "menu"
+    # Saturday: the weekday-only display schedule does not apply
+    assert content_at(timeline, T0 + timedelta(days=5, hours=12, minutes=10)) == "promo"
+    assert content_at(timeline, T0 + timedelta(days=7)) is None
+    # Per day: menu, lobby, promo, menu; adjacent menu segments across midnight merge
+    assert len(timeline["starts"]) == 5 * 3 + 2 * 2 + 1
+    assert [c["id"] for c in timeline["contents"]] == ["menu", "lobby", "promo"]
+
+
+def test_other_displays_do_not_see_display_specific_priority():
+    timeline = compile_timeline([
+        schedule("promo", "promo", 12, 13, created_minutes=5),
+        schedule("lobby", "lobby", 12, 13, display_id="lobby"),
+    ], CONTENTS, "bar", T0)
+    assert content_at(timeline, T0 + timedelta(hours=12, minutes=30)) == "promo"
+
+
+def test_segments_between():
+    timeline = compile_timeline([
+        schedule("a", "menu", 1, 2), schedule("b", "promo", 3, 4), schedule("c", "lobby", 5, 6),
+    ], CONTENTS, None, T0)
+    segments = segments_between(timeline, T0 + timedelta(hours=1, minutes=30), T0 + timedelta(hours=5))
+    assert [s["content"]["id"] for s in segments] == ["menu", "promo"]
+    assert segments[0]["end_time"] == T0 + timedelta(hours=2)
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from backend.singleflight import SingleFlight
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    calls = []
+
+    async def load():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return {"id": 7}
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("track", "7", load) for _ in range(50)))
+
+    results = asyncio.run(scenario())
+    assert len(calls) == 1
+    assert all(result == {"id": 7} for result in results)
+    assert flight.stats["track"] == {"calls": 50, "executions": 1, "collapsed": 49}
+    assert flight.snapshot()["in_flight"] == 0
+
+def test_sequential_calls_are_not_collapsed():
+    flight = SingleFlight()
+
+    async def load():
+        return 1
+
+    async def scenario():
+        await flight.do("track", "1", load)
+        await flight.do("track", "1", load)
+
+    asyncio.run(scenario())
+    assert flight.stats["track"]["executions"] == 2
+
+def test_errors_reach_every_waiter():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.01)
+        raise LookupError("missing")
+
+    async def scenario():
+        return await asyncio.gather(*(flight.do("track", "x", load) for _ in range(3)), return_exceptions=True)
+
+    results = asyncio.run(scenario())
+    assert all(isinstance(result, LookupError) for result in results)
+
+def test_cancelled_caller_does_not_cancel_shared_read():
+    flight = SingleFlight()
+
+    async def load():
+        await asyncio.sleep(0.02)
+        return "done"
+
+    async def scenario():
+        leader = asyncio.create_task(flight.do("track", "1", load))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(flight.do("track", "1", load))
+        await asyncio.sleep(0)
+        leader.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await leader
+        return await follower
+
+    assert asyncio.run(scenario()) == "done"
+
+class SlowSession:
+    opened = closed = 0
+
+    async def __aenter__(self):
+        SlowSession.opened += 1
+        return self
+
+    async def __aexit__(self, *exc):
+        SlowSession.closed += 1
+
+    async def execute(self, stmt):
+        await asyncio.sleep(0.02)
+        return self
+
+    def mappings(self):
+        return self
+
+    def one_or_none(self):
+        return {"id": "7", "title": "Shared"}
+
+def test_shared_track_load_outlives_the_request_that_started_it(monkeypatch):
+    from backend import api
+
+    async def get_or_load(key, variant, loader):
+        return await loader()
+
+    monkeypatch.setattr(api, "SessionLocal", SlowSession)
+    monkeypatch.setattr(api.catalog_cache, "get_or_load", get_or_load)
+
+    async def scenario():
+        leader = asyncio.create_task(api.get_track("7"))
+        await asyncio.sleep(0)
+        follower = asyncio.create_task(api.get_track("7"))
+        await asyncio.sleep(0)
+        leader.cancel()
+        return await follower
+
+    response = asyncio.run(scenario())
+    assert response.body == b'{"id":"7","title":"Shared"}'
+    assert SlowSession.opened == SlowSession.closed == 1
@@ -0,0 +1,48 @@
+import pytest
+from fastapi.testclient import TestClient
+from backend.main import app
+from backend.suggest import SuggestIndex, suggest_index, normalize
+
+client = TestClient(app)
+
+def test_normalize_strips_accents_and_punctuation():
+    assert normalize("Beyoncé - Crazy in Love!") == "beyonce crazy in love"
+
+def test_suggest_matches_title_artist_and_word_starts():
+    index = SuggestIndex()
+    index.build([(1, "One More Time", "Daft Punk"), (2, "Punk Rock Girl", "Dead Milkmen")])
+    assert [t["id"] for t in index.suggest("one m")] == [1]
+    assert sorted(t["id"] for t in index.suggest("punk")) == [1, 2]
+    assert index.suggest("time")[0]["title"] == "One More Time"
+
+def test_incremental_add_and_remove():
+    index = SuggestIndex()
+    index.build([(1, "Around the World", "Daft Punk")])
+    index.add(2, "Digital Love", "Daft Punk")
+    assert sorted(t["id"] for t in index.suggest("daft")) == [1, 2]
+    index.remove(1)
+    assert [t["id"] for t in index.suggest("daft")] == [2]
+    assert index.suggest("around") == []
+    assert len(index) == 1
+
+@pytest.mark.query_budget(0)
+def test_suggest_endpoint():
+    suggest_index.add(9001, "Stayin' Alive", "Bee Gees")
+    try:
+        response = client.get("/search/suggest", params={"q": "stayin"})
+        assert response.status_code == 200
+        assert response.json()[0]["id"] == 9001
+    finally:
+        suggest_index.remove(9001)
+
+def test_keys_sort_as_text_and_survive_compaction():
+    index = SuggestIndex()
+    index.build([(1, "Émotion", "Señor Coconut"), (2, "Emo Girl", None), (3, "Zzz", "Ñu")])
+    assert [t["id"] for t in index.suggest("emo")] == [2, 1]
+    assert [t["id"] for t in index.suggest("nu")] == [3]
+    # Replacing titles leaves dead text behind until the index rebuilds itself
+    for n in range(20):
+        index.add(2, f"Emo Girl {n}", None)
+    assert len(index._text) < 200
+    assert [t["title"] for t in index.suggest("emo g")] == ["Emo Girl 19"]
+    assert [t["id"] for t in index.suggest("senor")] == [1]
@@ -0,0 +1,100 @@
+import asyncio
+from types import SimpleNamespace
+
+from backend.suggest import SuggestIndex
+from backend.suggest_sync import SuggestSync
+
+
+class SharedRedis:
+    """Counter and channel shared by the workers; published changes queue up until delivered."""
+
+    def __init__(self):
+        self.values = {}
+        self.published = []
+
+    async def get(self, key):
+        return self.values.get(key)
+
+    async def incr(self, key):
+        self.values[key] = self.values.get(key, 0) + 1
+        return self.values[key]
+
+    async def publish(self, channel, data):
+        self.published.append(data)
+
+
+class Table:
+    """The tracks table as a session factory for ``SuggestIndex.load``."""
+
+    def __init__(self):
+        self.rows = {}
+
+    def __call__(self):
+        return self
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        pass
+
+    async def stream(self, stmt):
+        async def rows():
+            for track_id, (title, artist) in self.rows.items():
+                yield SimpleNamespace(id=track_id, title=title, artist=artist)
+        return rows()
+
+
+def workers(n=2):
+    redis, table = SharedRedis(), Table()
+    syncs = [SuggestSync(index=SuggestIndex(), redis=redis, session_factory=table) for _ in range(n)]
+    for sync in syncs:
+        asyncio.run(sync.reload())
+    return redis, table, syncs
+
+
+def deliver_all(redis, syncs):
+    async def pump():
+        for data in redis.published:
+            for sync in syncs:
+                await sync.deliver(data)
+        redis.published.clear()
+
+    asyncio.run(pump())
+
+
+def ids(sync, prefix):
+    return sorted(t["id"] for t in sync.index.suggest(prefix))
+
+
+def test_tracks_added_and_deleted_on_one_worker_reach_the_others():
+    redis, table, (a, b) = workers()
+    asyncio.run(a.add([(1, "Around the World", "Daft Punk")]))
+    assert ids(a, "daft") == ["1"] and ids(b, "daft") == []
+    deliver_all(redis, [a, b])
+    assert ids(b, "around") == ["1"]
+
+    # A bulk import batch travels as one change
+    asyncio.run(b.add([(2, "Digital Love", "Daft Punk", "r2://2.mp3"), (3, "Aerodynamic", "Daft Punk", "r2://3.mp3")]))
+    asyncio.run(a.remove(1))
+    deliver_all(redis, [a, b])
+    assert ids(a, "daft") == ids(b, "daft") == ["2", "3"]
+    assert a.generation == b.generation == 3
+    assert b.stats["reloads"] == 1  # only the initial load
+
+
+def test_a_missed_change_reloads_from_the_table():
+    redis, table, (a, b) = workers()
+    table.rows[1] = ("One More Time", "Daft Punk")
+    asyncio.run(a.add([(1, "One More Time", "Daft Punk")]))
+    redis.published.clear()  # lost on the way to b
+    table.rows[2] = ("Punk Rock Girl", "Dead Milkmen")
+    asyncio.run(a.add([(2, "Punk Rock Girl", "Dead Milkmen")]))
+    deliver_all(redis, [b])
+    assert ids(b, "punk") == ["1", "2"]
+    assert b.generation == 2 and b.stats["reloads"] == 2
+
+    # Ids are strings whether loaded or relayed, so a later delete finds the track
+    asyncio.run(a.remove(1))
+    deliver_all(redis, [b])
+    assert ids(b, "punk") == ["2"]
@@ -0,0 +1,11 @@
+from datetime import datetime
+from backend.pagination import encode_cursor, decode_cursor, parse_fields
+
+def test_cursor_round_trip():
+    created_at = datetime(2025, 7, 25, 3, 6, 12, 785791)
+    cursor = encode_cursor(created_at, 42)
+    assert decode_cursor(cursor) == (created_at, 42)
+
+def test_parse_fields_keeps_order_and_drops_duplicates():
+    assert parse_fields("title,id,title", ["id", "title", "artist"]) == ["title", "id"]
+    assert parse_fields(None, ["id"]) is None
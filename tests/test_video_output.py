@@ -4,6 +4,8 @@ from backend.main import app
 
 client = TestClient(app)
 
+pytestmark = pytest.mark.query_budget(0)
+
 def test_video_output_state():
     response = client.get("/video-output/state")
     assert response.status_code == 200
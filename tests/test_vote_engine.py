@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from backend import vote_engine
+from backend.vote_engine import VoteAggregator, sign_voter, voter_from_token
+
+class RecordingQueue:
+    keys = ["queue:items", "queue:votes", "queue:seq"]
+
+    def __init__(self, fail=False):
+        self.calls = []
+        self.fail = fail
+
+    async def vote_many(self, deltas):
+        if self.fail:
+            raise ConnectionError("redis unavailable")
+        self.calls.append(dict(deltas))
+        return [{"track_id": t, "votes": d, "position": i + 1} for i, (t, d) in enumerate(deltas.items())]
+
+class RecordingManager:
+    def __init__(self):
+        self.messages = []
+
+    async def broadcast_to_type(self, message, client_type):
+        self.messages.append((client_type, message))
+
+def test_flush_coalesces_votes_into_one_batch_and_one_broadcast():
+    queue, manager = RecordingQueue(), RecordingManager()
+    aggregator = VoteAggregator(queue=queue, manager=manager)
+    for track_id, up in [("a", True), ("a", True), ("b", True), ("a", False), ("c", True), ("c", False)]:
+        aggregator._pending[track_id] += 1 if up else -1
+
+    asyncio.run(aggregator.flush_queue())
+
+    assert queue.calls == [{"a": 1, "b": 1}]
+    assert len(manager.messages) == 1
+    assert manager.messages[0][1]["type"] == "queue_votes"
+    assert dict(aggregator._durable) == {"a": 1, "b": 1}
+
+def test_failed_flush_keeps_votes_for_next_batch():
+    aggregator = VoteAggregator(queue=RecordingQueue(fail=True), manager=RecordingManager())
+    aggregator._pending["a"] += 2
+    with pytest.raises(ConnectionError):
+        asyncio.run(aggregator.flush_queue())
+    assert dict(aggregator._pending) == {"a": 2}
+
+class CountingRedis:
+    def __init__(self):
+        self.counts = {}
+        self.expiring = set()
+
+    def register_script(self, script):
+        return None
+
+    async def incr(self, key):
+        self.counts[key] = self.counts.get(key, 0) + 1
+        return self.counts[key]
+
+    async def expire(self, key, seconds):
+        self.expiring.add(key)
+
+def test_voter_tokens_are_server_signed():
+    token = sign_voter("abc123")
+    assert voter_from_token(token) == "abc123"
+    assert voter_from_token("abc124." + token.rpartition(".")[2]) is None
+    assert voter_from_token(token[:-1]) is None
+    assert voter_from_token("phone-1") is None
+    assert voter_from_token(None) is None
+
+def test_new_voters_are_capped_per_address(monkeypatch):
+    monkeypatch.setattr(vote_engine, "VOTER_ISSUE_LIMIT", 3)
+    redis = CountingRedis()
+    aggregator = VoteAggregator(queue=RecordingQueue(), redis=redis, manager=RecordingManager())
+
+    async def issue(address, times):
+        return [await aggregator.issue_voter(address) for _ in range(times)]
+
+    tokens = asyncio.run(issue("10.0.0.7", 4))
+    assert len({voter_from_token(token) for token in tokens[:3]}) == 3
+    assert tokens[3] is None
+    assert asyncio.run(issue("10.0.0.8", 1))[0] is not None
+    assert redis.expiring == {"queue:voter_issue:10.0.0.7", "queue:voter_issue:10.0.0.8"}
@@ -1,7 +1,22 @@
+import importlib.util
+import time
+from pathlib import Path
+
 import pytest
-from backend.player_control_service import app, socketio, status_monitor
+
+pytest.importorskip("flask_socketio")
+
+# The service lives in a directory that is not a valid module name; load it by path
+SERVICE_PATH = Path(__file__).resolve().parent.parent / "backend" / "player-control-service" / "__init__.py"
+spec = importlib.util.spec_from_file_location("player_control_service", SERVICE_PATH)
+player_control_service = importlib.util.module_from_spec(spec)
+spec.loader.exec_module(player_control_service)
+
 from backend.models import Media
-from datetime import datetime
+
+app = player_control_service.app
+socketio = player_control_service.socketio
+status_monitor = player_control_service.status_monitor
 
 @pytest.fixture
 def socket_client():
@@ -46,3 +61,14 @@ def test_status_monitor():
     assert monitor.current_status.state == 'playing'
     monitor.stop_monitoring()
     assert monitor.current_status is None
+
+def test_status_is_emitted_on_transitions_only(socket_client):
+    socket_client.get_received()
+    status_monitor.start_monitoring(1)
+    time.sleep(1.2)
+    status_monitor.pause()
+    statuses = [r['args'][0] for r in socket_client.get_received() if r['name'] == 'playback_status']
+    assert [(s['state'], s['rate']) for s in statuses] == [('playing', 1.0), ('paused', 0.0)]
+    assert statuses[1]['position'] >= 1.0
+    assert statuses[1]['monotonic'] > statuses[0]['monotonic']
+    status_monitor.stop_monitoring()
@@ -0,0 +1,190 @@
+import asyncio
+import json
+
+import pytest
+
+from backend import websocket_manager
+from backend.serialization import unpackb
+from backend.websocket_manager import COALESCE, DISCONNECT, DROP_OLDEST, MSGPACK_ENCODING, ConnectionManager, negotiate_encoding
+
+
+class FakeSocket:
+    def __init__(self, fail=False):
+        self.sent = []
+        self.closed_with = None
+        self.fail = fail
+        # Cleared to stall the client mid-send
+        self.unblocked = asyncio.Event()
+        self.unblocked.set()
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        if self.fail:
+            raise RuntimeError("connection reset")
+        await self.unblocked.wait()
+        self.sent.append(json.loads(data))
+
+    async def send_bytes(self, data):
+        await self.unblocked.wait()
+        self.sent.append(unpackb(data))
+
+    async def close(self, code=1000):
+        self.closed_with = code
+
+
+async def drain():
+    for _ in range(50):
+        await asyncio.sleep(0)
+
+
+def test_slow_client_does_not_delay_the_others():
+    async def scenario():
+        manager = ConnectionManager(queue_size=8)
+        fast, slow = FakeSocket(), FakeSocket()
+        slow.unblocked.clear()
+        await manager.connect(fast, "player")
+        await manager.connect(slow, "player")
+        for i in range(3):
+            await manager.broadcast_to_type({"n": i}, "player")
+        await drain()
+        assert fast.sent == [{"n": 0}, {"n": 1}, {"n": 2}]
+        assert slow.sent == []
+        slow.unblocked.set()
+        await drain()
+        assert slow.sent == [{"n": 0}, {"n": 1}, {"n": 2}]
+        stats = manager.snapshot()
+        assert stats["sent"] == 6 and stats["queued"] == 0
+        assert stats["send_latency_ms_p99"] is not None
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def stalled_client(policy):
+    manager = ConnectionManager(queue_size=3, policy=policy)
+    socket = FakeSocket()
+    socket.unblocked.clear()
+    return manager, socket
+
+
+def test_drop_policy_discards_oldest():
+    async def scenario():
+        manager, socket = stalled_client(DROP_OLDEST)
+        await manager.connect(socket, "player")
+        await manager.broadcast_to_type({"n": 0}, "player")
+        await drain()  # the writer is now stuck sending n=0
+        for i in range(1, 6):
+            await manager.broadcast_to_type({"n": i}, "player")
+        socket.unblocked.set()
+        await drain()
+        assert socket.sent == [{"n": 0}, {"n": 3}, {"n": 4}, {"n": 5}]
+        assert manager.stats["dropped"] == 2
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_coalesce_policy_replaces_queued_state():
+    async def scenario():
+        manager, socket = stalled_client(COALESCE)
+        await manager.connect(socket, "player")
+        await manager.broadcast_to_type({"n": 0}, "player")
+        await drain()
+        await manager.broadcast_to_type({"type": "status", "v": 1}, "player", coalesce_key="status")
+        await manager.broadcast_to_type({"type": "other"}, "player")
+        await manager.broadcast_to_type({"type": "other"}, "player")
+        await manager.broadcast_to_type({"type": "status", "v": 2}, "player", coalesce_key="status")
+        socket.unblocked.set()
+        await drain()
+        assert socket.sent == [{"n": 0}, {"type": "status", "v": 2}, {"type": "other"}, {"type": "other"}]
+        assert manager.stats["coalesced"] == 1 and manager.stats["dropped"] == 0
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_repeated_resyncs_replace_the_pending_one():
+    async def scenario():
+        manager, socket = stalled_client(COALESCE)
+        await manager.connect(socket, "player", greeting=lambda: [{"g": 0}, {"g": 1}])
+        await drain()  # the writer is now stuck sending g=0
+        await manager.broadcast_to_type({"n": 1}, "player")
+        for i in range(100):
+            await manager.send_all(socket, [{"r": i, "part": part} for part in range(3)])
+        assert manager.snapshot()["queued"] == 4
+        socket.unblocked.set()
+        await drain()
+        assert socket.sent == [{"g": 0}, {"r": 99, "part": 0}, {"r": 99, "part": 1}, {"r": 99, "part": 2}, {"n": 1}]
+        assert manager.stats["resyncs_replaced"] == 100 and manager.stats["dropped"] == 0
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_disconnect_policy_closes_slow_client():
+    async def scenario():
+        manager, socket = stalled_client(DISCONNECT)
+        await manager.connect(socket, "signage")
+        for i in range(5):
+            await manager.broadcast_to_type({"n": i}, "signage")
+        await drain()
+        assert socket.closed_with == 1013
+        assert socket not in manager.active_connections["signage"]
+        assert manager.stats["slow_disconnects"] == 1
+        assert manager.snapshot()["connections"]["signage"] == 0
+
+    asyncio.run(scenario())
+
+
+def test_failed_sends_remove_the_connection():
+    async def scenario():
+        manager = ConnectionManager()
+        broken, healthy = FakeSocket(fail=True), FakeSocket()
+        await manager.connect(broken, "player")
+        await manager.connect(healthy, "system")
+        await manager.broadcast({"type": "system_alert"})
+        await drain()
+        assert broken not in manager.active_connections["player"]
+        assert healthy.sent == [{"type": "system_alert"}]
+        assert manager.stats["send_errors"] == 1
+        await manager.close()
+
+    asyncio.run(scenario())
+
+
+def test_broadcasts_are_encoded_once_per_encoding(monkeypatch):
+    pytest.importorskip("msgpack")
+    calls = []
+    for name, encode in list(websocket_manager.ENCODERS.items()):
+        monkeypatch.setitem(websocket_manager.ENCODERS, name, lambda message, name=name, encode=encode: calls.append(name) or encode(message))
+
+    async def scenario():
+        manager = ConnectionManager()
+        sockets = [FakeSocket() for _ in range(10)]
+        for i, socket in enumerate(sockets):
+            await manager.connect(socket, "player", MSGPACK_ENCODING if i % 2 else "json")
+        await manager.broadcast_to_type({"type": "queue_votes", "changes": [["t1", 3, 1]]}, "player")
+        await drain()
+        assert all(socket.sent == [{"type": "queue_votes", "changes": [["t1", 3, 1]]}] for socket in sockets)
+        assert manager.snapshot()["encodings"] == {"json": 5, "msgpack": 5}
+        await manager.close()
+
+    asyncio.run(scenario())
+    assert sorted(calls) == ["json", "msgpack"]
+
+
+class Handshake:
+    def __init__(self, protocols="", query=None):
+        self.headers = {"sec-websocket-protocol": protocols} if protocols else {}
+        self.query_params = query or {}
+
+
+def test_encoding_negotiation():
+    pytest.importorskip("msgpack")
+    assert negotiate_encoding(Handshake()) == ("json", None)
+    assert negotiate_encoding(Handshake(query={"encoding": "msgpack"})) == ("msgpack", None)
+    assert negotiate_encoding(Handshake("msgpack, json")) == ("msgpack", "msgpack")
+    assert negotiate_encoding(Handshake("json")) == ("json", "json")
+    assert negotiate_encoding(Handshake(query={"encoding": "xml"})) == ("json", None)
@@ -0,0 +1,124 @@
+import asyncio
+import json
+import multiprocessing
+import os
+import uuid
+
+import pytest
+import redis
+import redis.asyncio as aioredis
+
+from backend import websocket_manager
+from backend.websocket_manager import ConnectionManager, Frame, RedisFanout, pack_envelope, unpack_envelope
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+WORKERS = 3
+MESSAGES = 200
+
+
+def redis_available():
+    try:
+        return redis.Redis.from_url(REDIS_URL, socket_connect_timeout=0.5).ping()
+    except redis.RedisError:
+        return False
+
+
+class RecordingSocket:
+    def __init__(self):
+        self.sent = []
+        self.received = asyncio.Event()
+        self.expected = 0
+
+    async def accept(self, subprotocol=None):
+        pass
+
+    async def send_text(self, data):
+        self.sent.append(json.loads(data))
+        if len(self.sent) >= self.expected:
+            self.received.set()
+
+
+def test_envelope_round_trip():
+    payload = pack_envelope({"type": "player_status", "status": "playing"}, "player_status")
+    assert unpack_envelope(payload) == ("player_status", '{"type":"player_status","status":"playing"}')
+    assert unpack_envelope(pack_envelope({"a": "line\nbreak"}).encode()) == (None, '{"a":"line\\nbreak"}')
+
+
+def test_delivered_json_is_not_re_encoded(monkeypatch):
+    monkeypatch.setitem(websocket_manager.ENCODERS, "json", lambda message: pytest.fail("re-encoded"))
+    frame = Frame.from_json('{"n":1}')
+    assert frame.encoded("json") == '{"n":1}'
+    if "msgpack" in websocket_manager.ENCODERS:
+        assert frame.message is not None and frame.encoded("msgpack")
+        assert frame.message == {"n": 1}
+
+
+def test_deliver_routes_by_channel():
+    async def scenario():
+        manager = ConnectionManager()
+        player, signage = RecordingSocket(), RecordingSocket()
+        await manager.connect(player, "player")
+        await manager.connect(signage, "signage")
+        fanout = RedisFanout(manager, redis=None, prefix="test:")
+        for n in range(3):
+            await fanout.deliver("test:player", pack_envelope({"n": n}))
+        await fanout.deliver(b"test:signage", pack_envelope({"n": "s"}).encode())
+        for _ in range(20):
+            await asyncio.sleep(0)
+        await manager.close()
+        return player.sent, signage.sent
+
+    assert asyncio.run(scenario()) == ([{"n": 0}, {"n": 1}, {"n": 2}], [{"n": "s"}])
+
+
+def _worker(prefix, ready, results):
+    async def run():
+        client = aioredis.from_url(REDIS_URL, decode_responses=True)
+        manager = ConnectionManager(queue_size=MESSAGES)
+        fanout = RedisFanout(manager, redis=client, prefix=prefix)
+        socket = RecordingSocket()
+        socket.expected = MESSAGES
+        await manager.connect(socket, "player")
+        fanout.start()
+        await asyncio.wait_for(fanout.subscribed.wait(), 5)
+        ready.put(os.getpid())
+        try:
+            await asyncio.wait_for(socket.received.wait(), 10)
+        except asyncio.TimeoutError:
+            pass
+        results.put([message["n"] for message in socket.sent])
+        await fanout.stop()
+        await manager.close()
+        await client.aclose()
+
+    asyncio.run(run())
+
+
+@pytest.mark.skipif(not redis_available(), reason="needs a Redis server at REDIS_URL")
+def test_broadcasts_reach_every_worker_in_order():
+    context = multiprocessing.get_context("fork")
+    prefix = f"ws-test-{uuid.uuid4().hex}:"
+    ready, results = context.Queue(), context.Queue()
+    workers = [context.Process(target=_worker, args=(prefix, ready, results)) for _ in range(WORKERS)]
+    for worker in workers:
+        worker.start()
+    try:
+        for _ in workers:
+            ready.get(timeout=10)
+
+        async def publish():
+            client = aioredis.from_url(REDIS_URL, decode_responses=True)
+            # The publisher has no sockets of its own; it only publishes
+            fanout = RedisFanout(ConnectionManager(), redis=client, prefix=prefix)
+            for n in range(MESSAGES):
+                await fanout.broadcast_to_type({"type": "queue_votes", "n": n}, "player")
+            await client.aclose()
+
+        asyncio.run(publish())
+        received = [results.get(timeout=15) for _ in workers]
+    finally:
+        for worker in workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+    assert received == [list(range(MESSAGES))] * WORKERS